@@ -0,0 +1,221 @@
+import argparse
+import gc
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dungeon_generator.mapa import mapa
+from dungeon_generator.player import explorador
+from dungeon_generator.save import guardar_partida, cargar_partida
+from dungeon_generator import combate
+from calibracion import calibrar, factor
+
+# benchmarks de escala: para cada tamano genera un mapa con semilla fija y
+# mide tiempo y memoria pico (tracemalloc) de cada operacion
+# compara contra base.json y termina con codigo 1 si alguna operacion empeora
+# mas que el umbral; --guardar-base reescribe la base con esta maquina
+# los tiempos se comparan relativos a la vuelta de calibracion (calibracion.py)
+# y la memoria en absoluto
+
+BASE = Path(__file__).resolve().parent / "base.json"
+TAMANOS = [10 ** k for k in range(2, 7)]
+SEED = 1234
+# densidad de habitaciones sobre la rejilla
+DENSIDAD = 0.5
+# tamano maximo por operacion; json con 10^6 habitaciones pasa de 1 gb
+MAXIMO = {
+    "to_dict": 10 ** 5,
+    "from_dict": 10 ** 5,
+    "guardar_json": 10 ** 5,
+    "cargar_json": 10 ** 5,
+}
+
+
+def dimensiones(n: int) -> int:
+    return max(2, math.ceil(math.sqrt(n / DENSIDAD)))
+
+
+def preparar(n: int) -> mapa:
+    lado = dimensiones(n)
+    m = mapa(lado, lado, seed=SEED)
+    m.generar_estructura(n)
+    m.colocar_contenido(seed=SEED)
+    return m
+
+
+def lejana(m: mapa):
+    # habitacion mas lejana del inicio en manhattan, destino de los caminos
+    x0, y0 = m.habitacion_inicial.pos
+    return max(m.habitaciones, key=lambda c: abs(c[0] - x0) + abs(c[1] - y0))
+
+
+def operaciones(n: int, carpeta: str) -> Dict[str, Callable[[dict], None]]:
+    # cada operacion recibe un dict de estado compartido y lo puede llenar
+    # para las siguientes (el mapa, su dict, los archivos guardados)
+    lado = dimensiones(n)
+    json_f = os.path.join(carpeta, "partida.json")
+    bin_f = os.path.join(carpeta, "partida.dgnb")
+
+    def generar(st):
+        m = mapa(lado, lado, seed=SEED)
+        m.generar_estructura(n)
+        st["mapa"] = m
+
+    def contenido(st):
+        st["mapa"].colocar_contenido(seed=SEED)
+
+    def a_dict(st):
+        st["dict"] = st["mapa"].to_dict()
+
+    def de_dict(st):
+        if "dict" not in st:
+            a_dict(st)
+        mapa.from_dict(st["dict"])
+
+    def guardar_json(st):
+        m = st["mapa"]
+        guardar_partida(m, explorador(m), json_f)
+
+    def cargar_json(st):
+        if not os.path.exists(json_f):
+            guardar_json(st)
+        cargar_partida(json_f)
+
+    def guardar_bin(st):
+        m = st["mapa"]
+        guardar_partida(m, explorador(m), bin_f, formato="binario")
+
+    def cargar_bin(st):
+        if not os.path.exists(bin_f):
+            guardar_bin(st)
+        cargar_partida(bin_f)
+
+    def camino(st):
+        # cache de rutas fria en cada repeticion
+        m = st["mapa"]
+        m.rutas.invalidar()
+        explorador(m).encontrar_camino(st.setdefault("destino", lejana(m)))
+
+    def combates(st):
+        m = st["mapa"]
+        peleas = [(10, h.contenido.vida, h.contenido.ataque) for h in m.habitaciones.values()
+                  if getattr(h.contenido, "tipo", None) == "monstruo"]
+        combate.resolver_lote(peleas, "monstruo", m.rng.combate)
+
+    return {
+        "generar_estructura": generar,
+        "colocar_contenido": contenido,
+        "to_dict": a_dict,
+        "from_dict": de_dict,
+        "guardar_json": guardar_json,
+        "cargar_json": cargar_json,
+        "guardar_binario": guardar_bin,
+        "cargar_binario": cargar_bin,
+        "encontrar_camino": camino,
+        "combate": combates,
+    }
+
+
+def medir(fn: Callable[[dict], None], st: dict, repeticiones: int) -> Dict[str, float]:
+    # tiempo: el minimo de varias corridas sin tracemalloc
+    # memoria: una corrida aparte con tracemalloc, pico sobre lo ya asignado
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        gc.collect()
+        t = time.perf_counter()
+        fn(st)
+        mejor = min(mejor, time.perf_counter() - t)
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    fn(st)
+    pico = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return {"segundos": round(mejor, 6), "memoria_kb": round(pico / 1024, 1)}
+
+
+def correr(tamanos: List[int], solo: Optional[List[str]] = None, sin_limites: bool = False) -> Dict[str, Dict[str, dict]]:
+    resultados: Dict[str, Dict[str, dict]] = {}
+    with tempfile.TemporaryDirectory() as carpeta:
+        for n in tamanos:
+            ops = operaciones(n, carpeta)
+            st = {"mapa": preparar(n)}
+            # las corridas cortas se repiten para bajar el ruido
+            repeticiones = 5 if n <= 10 ** 4 else 1
+            for nombre, fn in ops.items():
+                if solo and nombre not in solo:
+                    continue
+                if not sin_limites and n > MAXIMO.get(nombre, n):
+                    continue
+                r = medir(fn, st, repeticiones)
+                resultados.setdefault(str(n), {})[nombre] = r
+                print(f"{n:>8} {nombre:<18} {r['segundos']:>10.4f} s {r['memoria_kb']:>12.1f} kb", flush=True)
+            st.clear()
+            for f in os.listdir(carpeta):
+                os.unlink(os.path.join(carpeta, f))
+            gc.collect()
+    return resultados
+
+
+def comparar(actual: dict, base: dict, umbral: float, minimo: float, escala: float = 1.0) -> List[str]:
+    # lista las operaciones que empeoran mas que umbral respecto de la base
+    # escala lleva los tiempos de la base a esta maquina (ver calibracion.py)
+    # tiempos bajo minimo segundos se ignoran: son puro ruido
+    regresiones = []
+    for n, ops in actual.items():
+        for nombre, r in ops.items():
+            b = base.get(n, {}).get(nombre)
+            if b is None:
+                continue
+            esperado = b["segundos"] * escala
+            if max(r["segundos"], esperado) >= minimo and r["segundos"] > esperado * (1 + umbral):
+                regresiones.append(f"{nombre} n={n}: {esperado:.4f} s -> {r['segundos']:.4f} s")
+            if b["memoria_kb"] > 0 and r["memoria_kb"] > b["memoria_kb"] * (1 + umbral) and r["memoria_kb"] - b["memoria_kb"] > 64:
+                regresiones.append(f"{nombre} n={n}: {b['memoria_kb']:.0f} kb -> {r['memoria_kb']:.0f} kb")
+    return regresiones
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="benchmarks de escala del generador")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=TAMANOS)
+    parser.add_argument("--solo", nargs="+", default=None, help="operaciones a medir")
+    parser.add_argument("--umbral", type=float, default=0.5, help="empeoramiento tolerado (0.5 = 50%%)")
+    parser.add_argument("--minimo", type=float, default=0.02, help="tiempos menores se ignoran al comparar")
+    parser.add_argument("--base", default=str(BASE))
+    parser.add_argument("--guardar-base", action="store_true", help="escribe los resultados como nueva base")
+    parser.add_argument("--sin-limites", action="store_true", help="mide todas las operaciones en todos los tamanos")
+    args = parser.parse_args(argv)
+
+    calibracion = calibrar()
+    print(f"calibracion {calibracion:.4f} s")
+    actual = correr(args.tamanos, args.solo, args.sin_limites)
+    if args.guardar_base:
+        with open(args.base, "w", encoding="utf-8") as f:
+            json.dump({**actual, "calibracion": calibracion}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"base guardada en {args.base}")
+        return 0
+    if not Path(args.base).exists():
+        print("no hay base para comparar, usa --guardar-base")
+        return 0
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    regresiones = comparar(actual, base, args.umbral, args.minimo, factor(base, calibracion))
+    for r in regresiones:
+        print("regresion:", r)
+    if regresiones:
+        return 1
+    print("sin regresiones")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
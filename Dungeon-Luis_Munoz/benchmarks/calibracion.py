@@ -0,0 +1,44 @@
+import time
+from collections import deque
+
+# vuelta de calibracion: mide cuanto tarda esta maquina en un trabajo fijo de
+# python puro (dicts, tuplas y un bfs sobre rejilla, como el generador)
+# las bases guardan este tiempo junto a sus mediciones y al comparar los
+# tiempos se escalan por calibracion_actual / calibracion_base, asi el umbral
+# detecta cambios del codigo y no diferencias entre maquinas
+
+LADO = 150
+
+
+def _trabajo() -> int:
+    celdas = {(x, y): (x * 31 + y) % 7 for x in range(LADO) for y in range(LADO)}
+    dist = {(0, 0): 0}
+    cola = deque([(0, 0)])
+    while cola:
+        x, y = cola.popleft()
+        d = dist[(x, y)] + 1
+        for v in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if v in celdas and v not in dist and celdas[v] != 0:
+                dist[v] = d
+                cola.append(v)
+    return sum(dist.values())
+
+
+def calibrar(intentos: int = 5) -> float:
+    # el minimo de varias vueltas, en segundos
+    mejor = float("inf")
+    for _ in range(intentos):
+        t = time.perf_counter()
+        _trabajo()
+        mejor = min(mejor, time.perf_counter() - t)
+    return round(mejor, 6)
+
+
+def factor(base: dict, actual: float) -> float:
+    # cuanto mas lenta es esta maquina que la de la base; las bases viejas sin
+    # calibracion se comparan en tiempo absoluto
+    ref = base.get("calibracion")
+    if not ref:
+        print("la base no tiene calibracion, se comparan tiempos absolutos")
+        return 1.0
+    return actual / ref
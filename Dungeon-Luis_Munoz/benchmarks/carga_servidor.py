@@ -0,0 +1,165 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dungeon_generator.servidor import FIN
+
+# generador de carga para dungeon_generator.servidor: abre muchos clientes
+# concurrentes que juegan con comandos al azar y mide la latencia de cada
+# comando (desde que se manda la linea hasta recibir FIN) y de cada conexion
+# (hasta recibir la bienvenida, incluye generar el mapa)
+# con --lanzar levanta su propio servidor en un socket unix temporal
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+async def leer_bloque(reader: asyncio.StreamReader) -> Optional[List[str]]:
+    # lineas de un bloque de respuesta, o None si el servidor cerro
+    lineas = []
+    while True:
+        linea = await reader.readline()
+        if not linea:
+            return None
+        linea = linea.decode("utf-8").rstrip("\n")
+        if linea == FIN:
+            return lineas
+        lineas.append(linea)
+
+
+def elegir_comando(bloque: List[str], rng: random.Random) -> str:
+    # explora si hay contenido, si no se mueve a una direccion disponible
+    direcciones = []
+    contenido = False
+    for linea in bloque:
+        if linea.startswith("direcciones disponibles:"):
+            direcciones = [d.strip() for d in linea.split(":", 1)[1].split(",") if d.strip()]
+        elif linea.startswith("contenido:"):
+            contenido = True
+    r = rng.random()
+    if contenido and r < 0.8:
+        return "explorar"
+    if r < 0.05:
+        return "inventario"
+    if r < 0.08:
+        return "mapa"
+    if direcciones:
+        return rng.choice(direcciones)
+    return "explorar"
+
+
+async def abrir(args):
+    if args.unix:
+        return await asyncio.open_unix_connection(args.unix)
+    return await asyncio.open_connection(args.host, args.puerto)
+
+
+async def cliente(args, n: int, lat: Dict[str, List[float]]):
+    # juega hasta completar args.comandos; si la partida termina abre otra
+    rng = random.Random(n)
+    enviados = 0
+    while enviados < args.comandos:
+        t = time.perf_counter()
+        reader, writer = await abrir(args)
+        bloque = await leer_bloque(reader)
+        lat["conexion"].append(time.perf_counter() - t)
+        while bloque is not None and enviados < args.comandos:
+            comando = elegir_comando(bloque, rng)
+            t = time.perf_counter()
+            writer.write((comando + "\n").encode("utf-8"))
+            await writer.drain()
+            bloque = await leer_bloque(reader)
+            lat["comando"].append(time.perf_counter() - t)
+            enviados += 1
+            if bloque is not None and any(l.startswith("=== fin del juego ===") for l in bloque):
+                # el servidor cierra despues del resumen
+                bloque = None
+        writer.close()
+
+
+def percentiles(valores: List[float]) -> Dict[str, float]:
+    if not valores:
+        return {}
+    v = sorted(valores)
+
+    def p(q):
+        return round(v[min(len(v) - 1, int(q * len(v)))] * 1000, 3)
+    return {"n": len(v), "p50_ms": p(0.5), "p95_ms": p(0.95), "p99_ms": p(0.99), "max_ms": round(v[-1] * 1000, 3)}
+
+
+async def correr(args) -> dict:
+    lat: Dict[str, List[float]] = {"conexion": [], "comando": []}
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente(args, i, lat) for i in range(args.clientes)))
+    segundos = time.perf_counter() - inicio
+    return {
+        "clientes": args.clientes,
+        # una latencia de conexion por sesion
+        "sesiones": len(lat["conexion"]),
+        "segundos": round(segundos, 3),
+        "comandos_por_segundo": round(len(lat["comando"]) / segundos, 1) if segundos > 0 else None,
+        "comando": percentiles(lat["comando"]),
+        "conexion": percentiles(lat["conexion"]),
+    }
+
+
+def lanzar_servidor(ruta: str, args) -> subprocess.Popen:
+    cmd = [sys.executable, "-m", "dungeon_generator.servidor", "--unix", ruta,
+           "--ancho", str(args.ancho), "--alto", str(args.alto), "--habitaciones", str(args.habitaciones),
+           "--max-sesiones", str(max(1000, args.clientes))]
+    if args.plantilla:
+        cmd.append("--plantilla")
+    proc = subprocess.Popen(cmd, cwd=RAIZ, stderr=subprocess.DEVNULL)
+    limite = time.monotonic() + 10
+    while not os.path.exists(ruta):
+        if proc.poll() is not None or time.monotonic() > limite:
+            proc.kill()
+            raise RuntimeError("no se pudo lanzar el servidor")
+        time.sleep(0.02)
+    return proc
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="generador de carga para el servidor de partidas")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=7777)
+    parser.add_argument("--unix", default=None)
+    parser.add_argument("--lanzar", action="store_true", help="levanta un servidor propio en un socket unix")
+    parser.add_argument("--clientes", type=int, default=200)
+    parser.add_argument("--comandos", type=int, default=50, help="comandos por cliente")
+    parser.add_argument("--ancho", type=int, default=8)
+    parser.add_argument("--alto", type=int, default=6)
+    parser.add_argument("--habitaciones", type=int, default=15)
+    parser.add_argument("--plantilla", action="store_true", help="con --lanzar, sesiones sobre una plantilla compartida")
+    parser.add_argument("--max-p95", type=float, default=None, help="sale con codigo 1 si el p95 por comando (ms) lo supera")
+    args = parser.parse_args(argv)
+
+    proc = None
+    with tempfile.TemporaryDirectory() as carpeta:
+        if args.lanzar:
+            args.unix = os.path.join(carpeta, "servidor.sock")
+            proc = lanzar_servidor(args.unix, args)
+        try:
+            resumen = asyncio.run(correr(args))
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait()
+    print(json.dumps(resumen, indent=2))
+    if args.max_p95 is not None and resumen["comando"].get("p95_ms", 0) > args.max_p95:
+        print(f"regresion: p95 {resumen['comando']['p95_ms']} ms > {args.max_p95} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
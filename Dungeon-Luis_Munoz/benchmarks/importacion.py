@@ -0,0 +1,98 @@
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from calibracion import calibrar, factor
+
+# tiempo de importacion en frio de los caminos sin interfaz
+# cada escenario corre en un proceso nuevo y se queda con el mejor de varios
+# intentos; falla (codigo 1) si un escenario sin interfaz carga rich o si
+# tarda mas que la base por encima del umbral, con la base escalada por la
+# vuelta de calibracion (calibracion.py)
+
+RAIZ = Path(__file__).resolve().parent.parent
+BASE = Path(__file__).resolve().parent / "base_importacion.json"
+
+# nombre -> (modulos a importar, puede cargar rich)
+ESCENARIOS = {
+    "nucleo": (["dungeon_generator.mapa", "dungeon_generator.room", "dungeon_generator.content",
+                "dungeon_generator.player"], False),
+    "paquete": (["dungeon_generator"], False),
+    "guardado": (["dungeon_generator.save"], False),
+    "simulacion": (["dungeon_generator.simulacion"], False),
+    "servidor": (["dungeon_generator.servidor"], False),
+    "main": (["main"], False),
+    "juego_interactivo": (["juego_interactivo"], False),
+    "display": (["dungeon_generator.display"], True),
+}
+
+_SONDA = """
+import sys, time
+t = time.perf_counter()
+for nombre in sys.argv[1:]:
+    __import__(nombre)
+print(time.perf_counter() - t, "rich" in sys.modules)
+"""
+
+
+def medir(modulos: List[str], intentos: int) -> Dict[str, object]:
+    mejor = float("inf")
+    carga_rich = False
+    for _ in range(intentos):
+        salida = subprocess.run([sys.executable, "-c", _SONDA, *modulos], cwd=RAIZ,
+                                capture_output=True, text=True, check=True).stdout.split()
+        mejor = min(mejor, float(salida[0]))
+        carga_rich = carga_rich or salida[1] == "True"
+    return {"ms": round(mejor * 1000, 2), "rich": carga_rich}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="tiempo de importacion del paquete")
+    parser.add_argument("--intentos", type=int, default=7)
+    parser.add_argument("--umbral", type=float, default=0.5, help="empeoramiento tolerado (0.5 = 50%%)")
+    parser.add_argument("--minimo", type=float, default=5.0, help="diferencias menores en ms se ignoran")
+    parser.add_argument("--base", default=str(BASE))
+    parser.add_argument("--guardar-base", action="store_true")
+    args = parser.parse_args(argv)
+
+    calibracion = calibrar()
+    print(f"calibracion {calibracion:.4f} s")
+    actual = {}
+    fallas = []
+    for nombre, (modulos, permite_rich) in ESCENARIOS.items():
+        r = medir(modulos, args.intentos)
+        actual[nombre] = r
+        print(f"{nombre:<18} {r['ms']:>8.2f} ms  rich={'si' if r['rich'] else 'no'}")
+        if r["rich"] and not permite_rich:
+            fallas.append(f"{nombre} importa rich")
+
+    if args.guardar_base:
+        with open(args.base, "w", encoding="utf-8") as f:
+            json.dump({**actual, "calibracion": calibracion}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"base guardada en {args.base}")
+    elif Path(args.base).exists():
+        with open(args.base, encoding="utf-8") as f:
+            base = json.load(f)
+        escala = factor(base, calibracion)
+        for nombre, r in actual.items():
+            b = base.get(nombre)
+            if b is None:
+                continue
+            esperado = b["ms"] * escala
+            if r["ms"] > esperado * (1 + args.umbral) and r["ms"] - esperado >= args.minimo:
+                fallas.append(f"{nombre}: {esperado:.2f} ms -> {r['ms']:.2f} ms")
+
+    for f in fallas:
+        print("regresion:", f)
+    if fallas:
+        return 1
+    print("sin regresiones")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
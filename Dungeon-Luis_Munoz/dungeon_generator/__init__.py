@@ -6,4 +6,19 @@ __all__ = [
     "content",
     "display",
     "save",
+    "binario",
+    "diario",
+    "rng",
+    "rejilla",
+    "lotes",
+    "combate",
+    "rutas",
+    "conectividad",
+    "mundo",
+    "simulacion",
+    "instrumentacion",
+    "comandos",
+    "servidor",
+    "plantilla",
+    "cache",
 ]  
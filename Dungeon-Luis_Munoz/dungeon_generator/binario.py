@@ -0,0 +1,585 @@
+from __future__ import annotations
+import json
+import mmap
+import struct
+import sys
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+from .mapa import mapa
+from .room import habitacion, DELTAS
+from .content import contenido_habitacion, tesoro, monstruo, jefe, evento
+from .items import objeto
+from .rejilla import rejilla_compacta
+from .instrumentacion import medido, contar
+
+# formato binario columnar de partidas
+# cabecera: MAGIA, version u16, reservado u16, largo de meta u32, meta json
+# despues, alineadas a 8 bytes, las columnas empaquetadas little-endian;
+# meta["columnas"] indica offset, bytes y typecode de cada una
+# version 2 agrega un indice por regiones de REGION x REGION celdas
+# (region_inicio, region_filas) para cargar la partida por partes
+# la columna opcional "orden" guarda en que orden se crearon las conexiones
+# de cada habitacion; sin ella se conectan en el orden de DELTAS
+MAGIA = b"DGNB"
+VERSION = 2
+REGION = 32
+_CABECERA = struct.Struct("<4sHHI")
+
+BITS = {"norte": 1, "sur": 2, "este": 4, "oeste": 8}
+VISITADA = 1
+INICIAL = 2
+
+# columnas con una fila por habitacion
+_COLUMNAS_HAB = ("id", "x", "y", "flags", "conexiones", "tipo", "nombre", "vida", "ataque",
+                 "extra", "efecto", "obj")
+
+# codigos de tipo de contenido
+TIPOS = {None: 0, "tesoro": 1, "monstruo": 2, "jefe": 3, "evento": 4}
+
+_INDICE_DIR = {dir_name: i for i, (dir_name, _, _) in enumerate(DELTAS)}
+
+
+def es_binario(archivo: str) -> bool:
+    with open(archivo, "rb") as f:
+        return f.read(len(MAGIA)) == MAGIA
+
+
+class _tabla_cadenas:
+    # cadenas sin repetir; las columnas guardan su indice
+    def __init__(self):
+        self.indices: Dict[str, int] = {}
+        self.lista: List[str] = []
+
+    def __call__(self, s: Optional[str]) -> int:
+        if s is None:
+            return -1
+        i = self.indices.get(s)
+        if i is None:
+            i = self.indices[s] = len(self.lista)
+            self.lista.append(s)
+        return i
+
+    def columnas(self) -> Tuple[array, bytes]:
+        datos = [s.encode("utf-8") for s in self.lista]
+        offsets = array("I", [0])
+        total = 0
+        for b in datos:
+            total += len(b)
+            offsets.append(total)
+        return offsets, b"".join(datos)
+
+
+def _mascara(hab: habitacion) -> int:
+    m = 0
+    x, y = hab.pos
+    for dir_name, dx, dy in DELTAS:
+        otra = hab.conexiones.get(dir_name)
+        if otra is None:
+            continue
+        if tuple(otra.pos) != (x + dx, y + dy):
+            raise ValueError("el formato binario solo admite conexiones entre celdas adyacentes")
+        m |= BITS[dir_name]
+    return m
+
+
+def _orden(hab: habitacion) -> int:
+    # indices en DELTAS de las conexiones en orden de creacion, 2 bits cada una
+    codigo = 0
+    for i, dir_name in enumerate(hab.conexiones):
+        codigo |= _INDICE_DIR[dir_name] << (2 * i)
+    return codigo
+
+
+def _indice_regiones(xs: array, ys: array, ancho: int, alto: int, region: int) -> Tuple[array, array]:
+    # ordena las filas por region (counting sort); region_inicio[r] y
+    # region_inicio[r+1] delimitan en region_filas las filas de la region r
+    por_fila = (ancho + region - 1) // region
+    total = por_fila * ((alto + region - 1) // region)
+    claves = [(y // region) * por_fila + x // region for x, y in zip(xs, ys)]
+    inicio = array("I", [0]) * (total + 1)
+    for k in claves:
+        inicio[k + 1] += 1
+    for r in range(total):
+        inicio[r + 1] += inicio[r]
+    siguiente = array("I", inicio)
+    filas = array("I", [0]) * len(claves)
+    for fila, k in enumerate(claves):
+        filas[siguiente[k]] = fila
+        siguiente[k] += 1
+    return inicio, filas
+
+
+def guardar(m: mapa, datos_explorador: Dict[str, Any], archivo: str, region: int = REGION) -> None:
+    # escribe el mapa como columnas y el explorador dentro de meta
+    cadena = _tabla_cadenas()
+    objetos: Dict[str, int] = {}
+    obj_cols = {k: array("i") for k in ("obj_nombre", "obj_valor", "obj_desc", "obj_cat", "obj_efecto")}
+
+    def indice_objeto(o: objeto) -> int:
+        clave = json.dumps(o.to_dict(), sort_keys=True)
+        i = objetos.get(clave)
+        if i is None:
+            i = objetos[clave] = len(objetos)
+            obj_cols["obj_nombre"].append(cadena(o.nombre))
+            obj_cols["obj_valor"].append(o.valor)
+            obj_cols["obj_desc"].append(cadena(o.descripcion))
+            obj_cols["obj_cat"].append(cadena(o.categoria))
+            obj_cols["obj_efecto"].append(cadena(json.dumps(dict(o.efecto))) if o.efecto else -1)
+        return i
+
+    cols: Dict[str, array] = {k: array("i") for k in ("id", "x", "y", "nombre", "vida", "ataque",
+                                                       "extra", "efecto", "obj")}
+    for k in ("flags", "conexiones", "orden", "tipo"):
+        cols[k] = array("B")
+
+    for hab in m.habitaciones.values():
+        x, y = hab.pos
+        cols["id"].append(hab.id)
+        cols["x"].append(x)
+        cols["y"].append(y)
+        cols["flags"].append((VISITADA if hab.visitada else 0) | (INICIAL if hab.inicial else 0))
+        cols["conexiones"].append(_mascara(hab))
+        cols["orden"].append(_orden(hab))
+        c = hab.contenido
+        tipo = getattr(c, "tipo", None) if c is not None else None
+        if tipo not in TIPOS:
+            raise ValueError(f"tipo de contenido desconocido: {tipo}")
+        cols["tipo"].append(TIPOS[tipo])
+        nombre = vida = ataque = extra = efecto = obj = -1
+        if tipo == "tesoro":
+            obj = indice_objeto(c.recompensa)
+        elif tipo in ("monstruo", "jefe"):
+            nombre, vida, ataque = cadena(c.nombre), c.vida, c.ataque
+            if tipo == "jefe":
+                obj = indice_objeto(c.recompensa_especial)
+        elif tipo == "evento":
+            nombre = cadena(c.nombre)
+            extra = cadena(c.to_dict().get("descripcion", ""))
+            efecto = cadena(json.dumps(dict(c.efecto)))
+        cols["nombre"].append(nombre)
+        cols["vida"].append(vida)
+        cols["ataque"].append(ataque)
+        cols["extra"].append(extra)
+        cols["efecto"].append(efecto)
+        cols["obj"].append(obj)
+
+    cols.update(obj_cols)
+    offsets, blob = cadena.columnas()
+    cols["cadenas_offsets"] = offsets
+    cols["region_inicio"], cols["region_filas"] = _indice_regiones(cols["x"], cols["y"], m.ancho, m.alto, region)
+
+    # arma el bloque de datos alineando cada columna a 8 bytes
+    directorio = {}
+    partes = []
+    pos = 0
+    for nombre_col, arr in cols.items():
+        if sys.byteorder == "big" and arr.itemsize > 1:
+            arr = array(arr.typecode, arr)
+            arr.byteswap()
+        crudo = arr.tobytes()
+        directorio[nombre_col] = [pos, len(crudo), arr.typecode]
+        partes.append(crudo)
+        pos += len(crudo)
+        relleno = (-pos) % 8
+        partes.append(b"\0" * relleno)
+        pos += relleno
+    directorio["cadenas"] = [pos, len(blob), "B"]
+    partes.append(blob)
+
+    inicio = list(m.habitacion_inicial.pos) if m.habitacion_inicial else None
+    meta = {
+        "ancho": m.ancho,
+        "alto": m.alto,
+        "n": len(cols["id"]),
+        "siguiente_id": m._next_id,
+        "region": region,
+        "inicio": inicio,
+        "explorador": datos_explorador,
+        "columnas": directorio,
+    }
+    meta_bytes = json.dumps(meta).encode("utf-8")
+    cabecera = _CABECERA.pack(MAGIA, VERSION, 0, len(meta_bytes))
+    relleno = b"\0" * ((-(len(cabecera) + len(meta_bytes))) % 8)
+
+    with open(archivo, "wb") as f:
+        f.write(cabecera)
+        f.write(meta_bytes)
+        f.write(relleno)
+        for p in partes:
+            f.write(p)
+
+
+class lector:
+    # abre un archivo binario con mmap y expone cada columna como memoryview
+    # sin copiar; usar como context manager para cerrar el mapeo
+
+    def __init__(self, archivo: str):
+        self._f = open(archivo, "rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        magia, version, _, largo = _CABECERA.unpack_from(self._mm, 0)
+        if magia != MAGIA:
+            raise ValueError("no es una partida en formato binario")
+        if version > VERSION:
+            raise ValueError(f"version de formato no soportada: {version}")
+        self.version = version
+        inicio_meta = _CABECERA.size
+        self.meta = json.loads(bytes(self._mm[inicio_meta:inicio_meta + largo]).decode("utf-8"))
+        self._datos = inicio_meta + largo + ((-(inicio_meta + largo)) % 8)
+        self._vistas: List[memoryview] = []
+        self._cadenas: Optional[List[Optional[str]]] = None
+
+    def columna(self, nombre: str):
+        off, nbytes, typecode = self.meta["columnas"][nombre]
+        inicio = self._datos + off
+        crudo = memoryview(self._mm)[inicio:inicio + nbytes]
+        if sys.byteorder == "big" and typecode != "B":
+            arr = array(typecode, bytes(crudo))
+            arr.byteswap()
+            crudo.release()
+            return arr
+        vista = crudo.cast(typecode)
+        self._vistas.append(crudo)
+        self._vistas.append(vista)
+        return vista
+
+    def cadena(self, i: int) -> Optional[str]:
+        # decodifica cadenas bajo demanda y las recuerda
+        if i < 0:
+            return None
+        if self._cadenas is None:
+            self._offsets = self.columna("cadenas_offsets")
+            self._blob = self.columna("cadenas")
+            self._cadenas = [None] * (len(self._offsets) - 1)
+        s = self._cadenas[i]
+        if s is None:
+            s = self._cadenas[i] = bytes(self._blob[self._offsets[i]:self._offsets[i + 1]]).decode("utf-8")
+        return s
+
+    def objetos(self) -> List[objeto]:
+        nombres, valores = self.columna("obj_nombre"), self.columna("obj_valor")
+        descs, cats, efectos = self.columna("obj_desc"), self.columna("obj_cat"), self.columna("obj_efecto")
+        res = []
+        for i in range(len(nombres)):
+            efecto = json.loads(self.cadena(efectos[i])) if efectos[i] >= 0 else None
+            res.append(objeto.compartido(self.cadena(nombres[i]), valores[i], self.cadena(descs[i]),
+                                         self.cadena(cats[i]), efecto))
+        return res
+
+    def contenido(self, fila: int, cols: Dict[str, Any], objs: List[objeto]) -> Optional[contenido_habitacion]:
+        tipo = cols["tipo"][fila]
+        if tipo == 0:
+            return None
+        if tipo == 1:
+            return tesoro(objs[cols["obj"][fila]])
+        if tipo == 2:
+            return monstruo(self.cadena(cols["nombre"][fila]), cols["vida"][fila], cols["ataque"][fila])
+        if tipo == 3:
+            return jefe(self.cadena(cols["nombre"][fila]), cols["vida"][fila], cols["ataque"][fila],
+                        objs[cols["obj"][fila]])
+        return evento(self.cadena(cols["nombre"][fila]), self.cadena(cols["extra"][fila]) or "",
+                      json.loads(self.cadena(cols["efecto"][fila])))
+
+    def cerrar(self):
+        for v in reversed(self._vistas):
+            v.release()
+        self._vistas.clear()
+        self._offsets = self._blob = None
+        self._mm.close()
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+@medido("binario.cargar")
+def cargar(archivo: str, backend: str = "dict") -> Tuple[mapa, Dict[str, Any]]:
+    # reconstruye el mapa desde las columnas; retorna (mapa, datos del explorador)
+    with lector(archivo) as lec:
+        meta = lec.meta
+        m = mapa(meta["ancho"], meta["alto"], backend=backend)
+        cols = {k: lec.columna(k) for k in _COLUMNAS_HAB}
+        objs = lec.objetos()
+        ids, xs, ys, flags = cols["id"], cols["x"], cols["y"], cols["flags"]
+        habitaciones = m.habitaciones
+        # carga en bloque: indice, estadisticas y conjuntos se recalculan
+        # una vez en la primera consulta en lugar de avisar por cada cambio
+        m._estadisticas_sucias = True
+        m._conjuntos.sucio = True
+        m._version_topologia += 1
+        for fila in range(meta["n"]):
+            coord = (xs[fila], ys[fila])
+            if m._rejilla is not None:
+                hab = m._rejilla.crear(ids[fila], coord, bool(flags[fila] & INICIAL))
+            else:
+                hab = habitacion(ids[fila], coord, bool(flags[fila] & INICIAL))
+                hab._mapa = m
+                habitaciones[coord] = hab
+            hab.visitada = bool(flags[fila] & VISITADA)
+            hab.contenido = lec.contenido(fila, cols, objs)
+            m._next_id = max(m._next_id, ids[fila] + 1)
+        # las conexiones se aplican cuando todas las habitaciones existen
+        mascaras = cols["conexiones"]
+        if m._rejilla is not None:
+            # la rejilla guarda las mismas mascaras: se copian directo
+            rejilla = m._rejilla
+            for fila in range(meta["n"]):
+                rejilla.mascaras[ys[fila] * m.ancho + xs[fila]] = mascaras[fila]
+        else:
+            # cada habitacion arma su diccionario de conexiones en el orden en
+            # que se crearon (columna orden) o en el de DELTAS si no esta
+            ordenes = lec.columna("orden") if "orden" in meta["columnas"] else None
+            for fila in range(meta["n"]):
+                mascara = mascaras[fila]
+                if not mascara:
+                    continue
+                x, y = xs[fila], ys[fila]
+                if ordenes is not None:
+                    codigo = ordenes[fila]
+                    dirs = [DELTAS[(codigo >> (2 * i)) & 3] for i in range(bin(mascara).count("1"))]
+                else:
+                    dirs = [d for d in DELTAS if mascara & BITS[d[0]]]
+                conexiones = habitaciones[(x, y)]._conexiones
+                for dir_name, dx, dy in dirs:
+                    otra = habitaciones.get((x + dx, y + dy))
+                    if otra is not None:
+                        conexiones[dir_name] = otra
+            del ordenes
+        del cols, ids, xs, ys, flags, mascaras
+        if meta.get("inicio"):
+            m.habitacion_inicial = habitaciones[tuple(meta["inicio"])]
+        return m, meta.get("explorador", {})
+
+
+class _arreglo_por_regiones:
+    # arreglo indexado por y*ancho+x que reserva un bloque de region x region
+    # celdas la primera vez que se escribe en esa region; leer una region sin
+    # bloque da el valor vacio. la memoria crece con las regiones cargadas,
+    # no con ancho*alto
+    __slots__ = ("ancho", "alto", "region", "por_fila", "typecode", "vacio", "bloques")
+
+    def __init__(self, typecode: str, vacio: int, ancho: int, alto: int, region: int):
+        self.ancho, self.alto, self.region = ancho, alto, region
+        self.por_fila = (ancho + region - 1) // region
+        self.typecode = typecode
+        self.vacio = vacio
+        self.bloques: Dict[int, array] = {}
+
+    def _ubicar(self, idx: int) -> Tuple[int, int]:
+        y, x = divmod(idx, self.ancho)
+        region = self.region
+        return (y // region) * self.por_fila + x // region, (y % region) * region + x % region
+
+    def __getitem__(self, idx: int) -> int:
+        r, off = self._ubicar(idx)
+        bloque = self.bloques.get(r)
+        return self.vacio if bloque is None else bloque[off]
+
+    def __setitem__(self, idx: int, valor: int):
+        r, off = self._ubicar(idx)
+        bloque = self.bloques.get(r)
+        if bloque is None:
+            bloque = self.bloques[r] = array(self.typecode, [self.vacio]) * (self.region * self.region)
+        bloque[off] = valor
+
+    def plano(self, destino):
+        # copia los bloques en un arreglo plano del tamano de la rejilla
+        region, ancho = self.region, self.ancho
+        for r, bloque in self.bloques.items():
+            ry, rx = divmod(r, self.por_fila)
+            x0, y0 = rx * region, ry * region
+            w = min(region, ancho - x0)
+            for fy in range(min(region, self.alto - y0)):
+                inicio = (y0 + fy) * ancho + x0
+                destino[inicio:inicio + w] = bloque[fy * region:fy * region + w]
+        return destino
+
+
+class rejilla_perezosa(rejilla_compacta):
+    # rejilla compacta que se llena por regiones desde un archivo binario
+    # cada acceso a una celda hidrata antes su region (ids, flags, mascara y
+    # contenido); recorrer todo el mapa hidrata todas las regiones pendientes
+    # y al terminar cierra el archivo
+    # mientras falten regiones ids, mascaras y flags se guardan por region
+    # (_arreglo_por_regiones); al completarse pasan a arreglos planos
+
+    def __init__(self, lec: lector):
+        meta = lec.meta
+        self._lec = lec
+        self._region = meta["region"]
+        super().__init__(meta["ancho"], meta["alto"])
+        self._n = meta["n"]
+        self._por_fila = (self.ancho + self._region - 1) // self._region
+        self._cols = {k: lec.columna(k) for k in _COLUMNAS_HAB}
+        self._objs = lec.objetos()
+        self._inicio_reg = lec.columna("region_inicio")
+        self._filas_reg = lec.columna("region_filas")
+        total = len(self._inicio_reg) - 1
+        self._cargadas = bytearray(total)
+        self._pendientes = 0
+        for r in range(total):
+            if self._inicio_reg[r] == self._inicio_reg[r + 1]:
+                self._cargadas[r] = 1
+            else:
+                self._pendientes += 1
+        if not self._pendientes:
+            self._terminar()
+
+    def _arreglos(self):
+        if self._lec is None:
+            return super()._arreglos()
+        ancho, alto, region = self.ancho, self.alto, self._region
+        return (_arreglo_por_regiones("i", -1, ancho, alto, region),
+                _arreglo_por_regiones("B", 0, ancho, alto, region),
+                _arreglo_por_regiones("B", 0, ancho, alto, region))
+
+    @property
+    def completa(self) -> bool:
+        return self._lec is None
+
+    def regiones_cargadas(self) -> int:
+        return sum(self._cargadas)
+
+    def _asegurar(self, idx: int):
+        if self._lec is not None:
+            y, x = divmod(idx, self.ancho)
+            r = (y // self._region) * self._por_fila + x // self._region
+            if not self._cargadas[r]:
+                self._hidratar(r)
+
+    def _hidratar(self, r: int):
+        cols, lec, objs = self._cols, self._lec, self._objs
+        ids, xs, ys, flags, mascaras = cols["id"], cols["x"], cols["y"], cols["flags"], cols["conexiones"]
+        for i in range(self._inicio_reg[r], self._inicio_reg[r + 1]):
+            fila = self._filas_reg[i]
+            idx = ys[fila] * self.ancho + xs[fila]
+            self.ids[idx] = ids[fila]
+            self.flags[idx] = flags[fila]
+            self.mascaras[idx] = mascaras[fila]
+            c = lec.contenido(fila, cols, objs)
+            if c is not None:
+                self.contenidos[idx] = c
+            self.orden.append(idx)
+        self._cargadas[r] = 1
+        self._pendientes -= 1
+        contar("binario.regiones_hidratadas")
+        contar("binario.habitaciones_hidratadas", self._inicio_reg[r + 1] - self._inicio_reg[r])
+        if not self._pendientes:
+            self._terminar()
+
+    def hidratar_todo(self):
+        for r in range(len(self._cargadas)):
+            if self._lec is None:
+                break
+            if not self._cargadas[r]:
+                self._hidratar(r)
+
+    def _terminar(self):
+        # todo cargado: arreglos planos, orden por id como el backend dict y se
+        # suelta el archivo
+        ids, mascaras, flags = rejilla_compacta._arreglos(self)
+        self.ids = self.ids.plano(ids)
+        self.mascaras = self.mascaras.plano(mascaras)
+        self.flags = self.flags.plano(flags)
+        ids = self.ids
+        self.orden = array("i", sorted(self.orden, key=ids.__getitem__))
+        self._cols = self._inicio_reg = self._filas_reg = None
+        self._objs = None
+        self._lec.cerrar()
+        self._lec = None
+
+    # accesos que tocan celdas: primero se asegura su region
+
+    def _vista(self, idx: int):
+        self._asegurar(idx)
+        return super()._vista(idx)
+
+    def __getitem__(self, coord):
+        self._asegurar(self.indice(coord))
+        return super().__getitem__(coord)
+
+    def get(self, coord, default=None):
+        x, y = coord
+        if 0 <= x < self.ancho and 0 <= y < self.alto:
+            self._asegurar(y * self.ancho + x)
+        return super().get(coord, default)
+
+    def __contains__(self, coord) -> bool:
+        x, y = coord
+        if 0 <= x < self.ancho and 0 <= y < self.alto:
+            self._asegurar(y * self.ancho + x)
+        return super().__contains__(coord)
+
+    def conexiones_de(self, coord):
+        self._asegurar(self.indice(coord))
+        return super().conexiones_de(coord)
+
+    def crear(self, id, coord, inicial=False):
+        self._asegurar(self.indice(coord))
+        return super().crear(id, coord, inicial)
+
+    def conectar(self, idx, bit, otro_idx):
+        self._asegurar(idx)
+        self._asegurar(otro_idx)
+        super().conectar(idx, bit, otro_idx)
+
+    def desconectar(self, idx, bit):
+        self._asegurar(idx)
+        self._asegurar(self.vecino(idx, bit))
+        super().desconectar(idx, bit)
+
+    def __delitem__(self, coord):
+        self.hidratar_todo()
+        super().__delitem__(coord)
+
+    # recorridos completos: hidratan todo
+
+    def __iter__(self):
+        self.hidratar_todo()
+        return super().__iter__()
+
+    def __len__(self) -> int:
+        if self._lec is not None:
+            return self._n
+        return super().__len__()
+
+    def habitaciones_dict(self):
+        self.hidratar_todo()
+        return super().habitaciones_dict()
+
+    def clear(self):
+        if self._lec is not None:
+            self._lec.cerrar()
+            self._lec = None
+            self._cols = self._inicio_reg = self._filas_reg = self._objs = None
+        super().clear()
+
+    def __repr__(self):
+        estado = "completa" if self._lec is None else f"{self.regiones_cargadas()}/{len(self._cargadas)} regiones"
+        return f"rejilla_perezosa({self.ancho}x{self.alto}, habitaciones={len(self)}, {estado})"
+
+
+def cargar_perezoso(archivo: str) -> Tuple[mapa, Dict[str, Any]]:
+    # lee solo la cabecera y el indice; las habitaciones se hidratan por
+    # region al accederlas. requiere un archivo de version 2 o mayor
+    lec = lector(archivo)
+    meta = lec.meta
+    if lec.version < 2:
+        lec.cerrar()
+        return cargar(archivo, backend="compacto")
+    # se arma con el backend dict para no reservar una rejilla plana que se
+    # reemplaza enseguida
+    m = mapa(meta["ancho"], meta["alto"])
+    m.backend = "compacto"
+    rejilla = rejilla_perezosa(lec)
+    rejilla._mapa = m
+    m._rejilla = rejilla
+    m.habitaciones = rejilla
+    m._next_id = meta.get("siguiente_id", meta["n"])
+    m._conjuntos.sucio = True
+    m._estadisticas_sucias = True
+    if meta.get("inicio"):
+        m.habitacion_inicial = rejilla[tuple(meta["inicio"])]
+    return m, meta.get("explorador", {})
@@ -0,0 +1,187 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+from .mapa import mapa, VERSION_GENERADOR
+from . import binario
+from .instrumentacion import contar
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except Exception:
+    fcntl = None
+    HAS_FCNTL = False
+
+# cache en disco de mapas generados, direccionada por contenido: la clave es
+# el sha256 de los parametros de generacion, VERSION_GENERADOR y la version
+# del formato binario, asi un cambio en el generador nunca lee mapas viejos
+# cada mapa se guarda en formato binario (carga rapida con mmap) junto con el
+# estado de sus flujos rng, y un acierto da el mismo mapa que generar de nuevo
+#
+# varios procesos pueden compartir el directorio: los archivos se escriben a
+# un temporal y se publican con os.replace, la generacion de una clave se
+# serializa con flock para no generarla dos veces y el recorte lru (por
+# fecha de ultimo uso) corre bajo un bloqueo global
+# sin fcntl (windows) no hay bloqueos: puede haber trabajo repetido pero
+# nunca archivos a medias
+
+EXTENSION = ".dgnb"
+# bloqueos por clave repartidos en este numero de archivos fijos, para no
+# borrar nunca un archivo de bloqueo que otro proceso pueda estar usando
+FRANJAS = 64
+
+
+def generar(ancho: int, alto: int, n_habitaciones: int, seed: Optional[int] = None,
+            escala: str = "manhattan", backend: str = "dict") -> mapa:
+    # la generacion de referencia que guarda la cache
+    m = mapa(ancho, alto, seed=seed, backend=backend)
+    m.generar_estructura(n_habitaciones)
+    m.colocar_contenido(escala=escala)
+    return m
+
+
+def clave(ancho: int, alto: int, n_habitaciones: int, seed: int, escala: str = "manhattan") -> str:
+    parametros = {
+        "ancho": int(ancho),
+        "alto": int(alto),
+        "n_habitaciones": int(n_habitaciones),
+        "seed": int(seed),
+        "escala": escala,
+        "generador": VERSION_GENERADOR,
+        "formato": binario.VERSION,
+    }
+    return hashlib.sha256(json.dumps(parametros, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+@contextmanager
+def _bloqueo(ruta: Path):
+    if not HAS_FCNTL:
+        yield
+        return
+    with open(ruta, "a+b") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class cache_mapas:
+    def __init__(self, directorio: str, max_bytes: int = 512 * 1024 * 1024):
+        if max_bytes <= 0:
+            raise ValueError("max_bytes debe ser positivo")
+        self.directorio = Path(directorio)
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_bytes)
+        self.aciertos = 0
+        self.fallos = 0
+
+    def _ruta(self, k: str) -> Path:
+        return self.directorio / f"{k}{EXTENSION}"
+
+    def _bloqueo_clave(self, k: str) -> Path:
+        return self.directorio / f"franja_{int(k[:8], 16) % FRANJAS:02d}.lock"
+
+    def _leer(self, k: str, backend: str) -> Optional[mapa]:
+        ruta = self._ruta(k)
+        try:
+            m, meta = binario.cargar(str(ruta), backend=backend)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # archivo danado: se descarta y se vuelve a generar
+            ruta.unlink(missing_ok=True)
+            return None
+        if meta.get("clave") != k:
+            return None
+        m.rng.restaurar(meta["rng"])
+        try:
+            # marca de uso para el lru
+            os.utime(ruta)
+        except OSError:
+            pass
+        return m
+
+    def _escribir(self, k: str, m: mapa):
+        # el estado rng va en el lugar de los datos del explorador
+        datos = {"clave": k, "rng": m.rng.estado()}
+        fd, temporal = tempfile.mkstemp(prefix=".tmp_", suffix=EXTENSION, dir=self.directorio)
+        os.close(fd)
+        try:
+            binario.guardar(m, datos, temporal)
+            os.replace(temporal, self._ruta(k))
+        except BaseException:
+            Path(temporal).unlink(missing_ok=True)
+            raise
+
+    def obtener(self, ancho: int, alto: int, n_habitaciones: int, seed: Optional[int],
+                escala: str = "manhattan", backend: str = "dict") -> mapa:
+        # el mapa generado con estos parametros, de la cache si esta
+        # sin seed el mapa es al azar y no se guarda
+        if seed is None:
+            return generar(ancho, alto, n_habitaciones, None, escala, backend)
+        k = clave(ancho, alto, n_habitaciones, seed, escala)
+        m = self._leer(k, backend)
+        if m is not None:
+            self.aciertos += 1
+            contar("cache.acierto")
+            return m
+        with _bloqueo(self._bloqueo_clave(k)):
+            # otro proceso pudo generarlo mientras se esperaba el bloqueo
+            m = self._leer(k, backend)
+            if m is not None:
+                self.aciertos += 1
+                contar("cache.acierto")
+                return m
+            # el estado rng se captura antes de que nadie use el mapa
+            m = generar(ancho, alto, n_habitaciones, seed, escala, backend)
+            self._escribir(k, m)
+        self.fallos += 1
+        contar("cache.fallo")
+        self.recortar(conservar=k)
+        return m
+
+    def _entradas(self):
+        entradas = []
+        for ruta in self.directorio.glob(f"*{EXTENSION}"):
+            if ruta.name.startswith(".tmp_"):
+                continue
+            try:
+                st = ruta.stat()
+            except FileNotFoundError:
+                continue
+            entradas.append((st.st_mtime, st.st_size, ruta))
+        return entradas
+
+    def tamano(self) -> int:
+        return sum(tamano for _, tamano, _ in self._entradas())
+
+    def recortar(self, conservar: Optional[str] = None) -> int:
+        # borra los mapas usados hace mas tiempo hasta entrar en max_bytes;
+        # retorna cuantos borro
+        borrados = 0
+        with _bloqueo(self.directorio / "cache.lock"):
+            entradas = sorted(self._entradas(), key=lambda e: e[0])
+            total = sum(tamano for _, tamano, _ in entradas)
+            for _, tamano, ruta in entradas:
+                if total <= self.max_bytes:
+                    break
+                if conservar is not None and ruta.name == f"{conservar}{EXTENSION}":
+                    continue
+                ruta.unlink(missing_ok=True)
+                total -= tamano
+                borrados += 1
+        return borrados
+
+    def limpiar(self):
+        with _bloqueo(self.directorio / "cache.lock"):
+            for _, _, ruta in self._entradas():
+                ruta.unlink(missing_ok=True)
+
+    def __repr__(self):
+        return f"cache_mapas({self.directorio}, aciertos={self.aciertos}, fallos={self.fallos})"
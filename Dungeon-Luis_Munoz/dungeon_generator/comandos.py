@@ -0,0 +1,150 @@
+from __future__ import annotations
+from typing import List, Tuple
+from .mapa import mapa
+from .player import explorador
+
+# comandos del juego en texto plano, compartidos por juego_interactivo y el
+# servidor: cada funcion arma el texto en lugar de imprimirlo
+
+# alias -> direccion
+DIRECCIONES = {
+    "n": "norte", "norte": "norte",
+    "s": "sur", "sur": "sur",
+    "e": "este", "este": "este",
+    "o": "oeste", "oeste": "oeste",
+}
+SALIR = ("salir", "quit", "q")
+
+# tipo de contenido -> letra en los mapas ascii
+_LETRAS = {"monstruo": "M", "jefe": "J", "tesoro": "T", "evento": "E"}
+
+
+def _letra(hab) -> str:
+    return _LETRAS.get(hab.contenido.tipo, ".")
+
+
+def minimapa_texto(m: mapa, exp: explorador, vista_radio: int = 3) -> str:
+    # minimapa ascii simple sin colores
+    ex, ey = exp.posicion_actual
+    lineas = ["\nmapa local:"]
+    for y in range(ey - vista_radio, ey + vista_radio + 1):
+        linea = ""
+        for x in range(ex - vista_radio, ex + vista_radio + 1):
+            if (x, y) == (ex, ey):
+                linea += " @ "  # explorador
+            elif (x, y) in m.habitaciones:
+                hab = m.habitaciones[(x, y)]
+                if hab.contenido:
+                    linea += f" {_letra(hab)} "
+                else:
+                    linea += " . " if hab.visitada else " ? "
+            else:
+                linea += " # "
+        lineas.append(linea)
+    return "\n".join(lineas)
+
+
+def mapa_completo_texto(m: mapa, exp: explorador) -> str:
+    # mapa completo ascii simple
+    lineas = ["\nmapa completo:", "  " + "".join(f" {x} " for x in range(m.ancho))]
+    for y in range(m.alto):
+        linea = f"{y} "
+        for x in range(m.ancho):
+            if (x, y) == exp.posicion_actual:
+                linea += " @ "
+            elif (x, y) in m.habitaciones:
+                hab = m.habitaciones[(x, y)]
+                if hab.inicial:
+                    linea += " S "
+                elif hab.contenido:
+                    linea += f" {_letra(hab)} "
+                else:
+                    linea += " . "
+            else:
+                linea += " # "
+        lineas.append(linea)
+    lineas.append("\nleyenda: @ = tu | S = inicio | M = monstruo | J = jefe | T = tesoro")
+    lineas.append("         E = evento | . = vacio | ? = no visitado | # = sin habitacion\n")
+    return "\n".join(lineas)
+
+
+def estado_texto(m: mapa, exp: explorador) -> str:
+    # lo que se muestra antes de cada comando: minimapa, vida, inventario,
+    # contenido de la habitacion y direcciones
+    lineas = [minimapa_texto(m, exp)]
+    lineas.append(f"\nposicion: ({exp.posicion_actual[0]}, {exp.posicion_actual[1]})")
+    lineas.append(f"vida: {exp.vida}")
+    if exp.inventario:
+        lineas.append(f"inventario: {', '.join([o.nombre for o in exp.inventario])}")
+    else:
+        lineas.append("inventario: vacio")
+    hab = m.habitaciones.get(exp.posicion_actual)
+    if hab:
+        if hab.contenido:
+            lineas.append(f"\ncontenido: {hab.contenido.tipo}")
+        else:
+            lineas.append("\nhabitacion vacia")
+    direcciones = exp.obtener_habitaciones_adyacentes()
+    lineas.append(f"\ndirecciones disponibles: {', '.join(direcciones)}")
+    lineas.append("\ncomandos: n/s/e/o (mover), explorar, inventario, mapa, salir")
+    return "\n".join(lineas)
+
+
+def ayuda_texto() -> str:
+    return "\n".join([
+        "\ncomandos:",
+        "  n/norte, s/sur, e/este, o/oeste - movimiento",
+        "  explorar/x - explorar habitacion",
+        "  inventario/i - ver items",
+        "  mapa/m - ver mapa completo",
+        "  ayuda/h - esta ayuda",
+        "  salir/q - salir",
+    ])
+
+
+def ejecutar(m: mapa, exp: explorador, comando: str) -> Tuple[str, bool]:
+    # procesa un comando; retorna (texto de respuesta, sigue jugando)
+    comando = comando.strip().lower()
+    if comando in SALIR:
+        return "\nsaliendo del juego...", False
+
+    if comando in DIRECCIONES:
+        direccion = DIRECCIONES[comando]
+        if exp.mover(direccion):
+            return f"te mueves al {direccion}", True
+        return f"no puedes ir al {direccion}", True
+
+    if comando in ("explorar", "x"):
+        salida = [f"\n{exp.explorar_habitacion()}"]
+        if not exp.esta_vivo:
+            salida.append("\n*** has muerto ***")
+        return "\n".join(salida), exp.esta_vivo
+
+    if comando in ("inventario", "i", "inv"):
+        if not exp.inventario:
+            return "\ninventario vacio", True
+        lineas: List[str] = ["\ninventario:"]
+        for i, obj in enumerate(exp.inventario):
+            lineas.append(f"  {i+1}. {obj.nombre} (valor: {obj.valor})")
+        return "\n".join(lineas), True
+
+    if comando in ("mapa", "m"):
+        return mapa_completo_texto(m, exp), True
+
+    if comando in ("ayuda", "h", "help", "?"):
+        return ayuda_texto(), True
+
+    return f"comando desconocido: {comando}\nescribe 'ayuda' para ver comandos disponibles", True
+
+
+def resumen_final(exp: explorador) -> str:
+    lineas = ["\n" + "=" * 60, "=== fin del juego ==="]
+    if exp.esta_vivo:
+        lineas.append(f"sobreviviste con {exp.vida} puntos de vida")
+    else:
+        lineas.append("has muerto en el dungeon")
+    lineas.append(f"items recogidos: {len(exp.inventario)}")
+    valor_total = sum(obj.valor for obj in exp.inventario)
+    lineas.append(f"valor total: {valor_total}")
+    lineas.append("=" * 60)
+    return "\n".join(lineas)
@@ -0,0 +1,165 @@
+from __future__ import annotations
+import random
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from .lotes import np, HAS_NUMPY
+
+# reglas de combate compartidas por monstruo y jefe
+# tipo "monstruo": empieza cualquiera al 50%, el jugador pega 1..2
+# tipo "jefe": el jugador empieza con 35%, pega 1..2+ataque//2
+# en ambos el enemigo pega 1..ataque
+
+
+class resultado_combate(NamedTuple):
+    gana: bool
+    vida_jugador: int
+    vida_enemigo: int
+    danio_recibido: int
+
+
+def danio_max_jugador(tipo: str, ataque: int) -> int:
+    if tipo == "jefe":
+        return 2 + int(ataque / 2)
+    return 2
+
+
+def primer_turno(tipo: str, rng) -> int:
+    # 0 = ataca el jugador, 1 = ataca el enemigo
+    if tipo == "jefe":
+        return 0 if rng.random() < 0.35 else 1
+    return rng.choice([0, 1])
+
+
+def resolver(vida_jugador: int, vida_enemigo: int, ataque: int, tipo: str = "monstruo",
+             rng=random, log: Optional[List[str]] = None, nombre: str = "") -> resultado_combate:
+    # resuelve un combate completo; solo arma texto por turno si recibe log
+    # consume el rng igual con o sin log, asi ambos modos dan el mismo resultado
+    inicial = vida_jugador
+    turno = primer_turno(tipo, rng)
+    max_jugador = danio_max_jugador(tipo, ataque)
+    randint = rng.randint
+    while vida_enemigo > 0 and vida_jugador > 0:
+        if turno == 0:
+            danio = randint(1, max_jugador)
+            vida_enemigo -= danio
+            if log is not None:
+                log.append(f"atacas y haces {danio} de dano enemigo {max(0, vida_enemigo)} pv")
+            turno = 1
+        else:
+            danio = randint(1, ataque)
+            vida_jugador -= danio
+            if log is not None:
+                log.append(f"{nombre} te golpea por {danio} tus pv {max(0, vida_jugador)}")
+            turno = 0
+    vida_jugador = max(0, vida_jugador)
+    return resultado_combate(vida_enemigo <= 0, vida_jugador, max(0, vida_enemigo), inicial - vida_jugador)
+
+
+def resolver_lote(peleas: Sequence[Tuple[int, int, int]], tipo: str = "monstruo",
+                  rng=random) -> Dict[str, List]:
+    # resuelve muchos combates (vida jugador, vida enemigo, ataque) a la vez
+    # con numpy avanza todas las peleas activas en paralelo, turno a turno
+    if not peleas:
+        return {"gana": [], "vida_jugador": [], "vida_enemigo": [], "danio_recibido": []}
+    if not HAS_NUMPY:
+        res = [resolver(vj, ve, atk, tipo, rng) for vj, ve, atk in peleas]
+        return {
+            "gana": [r.gana for r in res],
+            "vida_jugador": [r.vida_jugador for r in res],
+            "vida_enemigo": [r.vida_enemigo for r in res],
+            "danio_recibido": [r.danio_recibido for r in res],
+        }
+
+    gen = np.random.default_rng(rng.getrandbits(64))
+    datos = np.asarray(peleas, dtype=np.int64)
+    vj, ve, atk = datos[:, 0].copy(), datos[:, 1].copy(), datos[:, 2]
+    inicial = vj.copy()
+    n = len(datos)
+    if tipo == "jefe":
+        turno = np.where(gen.random(n) < 0.35, 0, 1)
+        max_jugador = 2 + atk // 2
+    else:
+        turno = gen.integers(0, 2, size=n)
+        max_jugador = np.full(n, 2, dtype=np.int64)
+
+    activos = np.flatnonzero((vj > 0) & (ve > 0))
+    while activos.size:
+        t = turno[activos]
+        jug = activos[t == 0]
+        ene = activos[t == 1]
+        if jug.size:
+            ve[jug] -= gen.integers(1, max_jugador[jug] + 1)
+        if ene.size:
+            vj[ene] -= gen.integers(1, atk[ene] + 1)
+        turno[activos] = 1 - t
+        activos = activos[(vj[activos] > 0) & (ve[activos] > 0)]
+
+    vj = np.maximum(vj, 0)
+    return {
+        "gana": (ve <= 0).tolist(),
+        "vida_jugador": vj.tolist(),
+        "vida_enemigo": np.maximum(ve, 0).tolist(),
+        "danio_recibido": (inicial - vj).tolist(),
+    }
+
+
+class analisis_combate(NamedTuple):
+    prob_victoria: float
+    vida_esperada: float
+    perdida_esperada: float
+
+
+def analizar(vida_jugador: int, vida_enemigo: int, ataque: int, tipo: str = "monstruo") -> analisis_combate:
+    # probabilidad exacta de ganar y vida esperada al terminar, por programacion
+    # dinamica sobre la cadena de markov del combate; memoizado en _analizar
+    return _analizar(int(vida_jugador), int(vida_enemigo), int(ataque), tipo)
+
+
+@lru_cache(maxsize=8192)
+def _analizar(vida_jugador: int, vida_enemigo: int, ataque: int, tipo: str) -> analisis_combate:
+    if vida_jugador <= 0:
+        return analisis_combate(0.0, 0.0, 0.0)
+    if vida_enemigo <= 0:
+        return analisis_combate(1.0, float(vida_jugador), 0.0)
+    dj = danio_max_jugador(tipo, ataque)
+    de = max(1, ataque)
+
+    # cada golpe baja un solo indice, asi que se llena de menor a mayor:
+    # gj/hj = prob. de ganar y vida final esperada con turno del jugador,
+    # ge/he = lo mismo con turno del enemigo; los promedios sobre cada rango
+    # de dano salen de sumas prefijas, asi el costo es O(vida_jugador * vida_enemigo)
+    ancho = vida_enemigo + 1
+    gj, hj, ge, he = ([[0.0] * ancho] for _ in range(4))
+    acum_gj, acum_hj = [[0.0] * ancho], [[0.0] * ancho]
+    for j in range(1, vida_jugador + 1):
+        fila_gj, fila_hj = [0.0] * ancho, [0.0] * ancho
+        fila_ge, fila_he = [0.0] * ancho, [0.0] * ancho
+        pre_ge, pre_he = [0.0] * ancho, [0.0] * ancho
+        bajo_j = max(0, j - de - 1)
+        for e in range(1, ancho):
+            # turno del jugador: el enemigo queda en e-d con d en 1..dj
+            letales = max(0, dj - e + 1)
+            bajo = max(0, e - dj - 1)
+            fila_gj[e] = (letales + pre_ge[e - 1] - pre_ge[bajo]) / dj
+            fila_hj[e] = (letales * j + pre_he[e - 1] - pre_he[bajo]) / dj
+            # turno del enemigo: el jugador queda en j-d con d en 1..de
+            # los golpes letales aportan 0 a ambas sumas
+            fila_ge[e] = (acum_gj[j - 1][e] - acum_gj[bajo_j][e]) / de
+            fila_he[e] = (acum_hj[j - 1][e] - acum_hj[bajo_j][e]) / de
+            pre_ge[e] = pre_ge[e - 1] + fila_ge[e]
+            pre_he[e] = pre_he[e - 1] + fila_he[e]
+        gj.append(fila_gj)
+        hj.append(fila_hj)
+        ge.append(fila_ge)
+        he.append(fila_he)
+        acum_gj.append([a + b for a, b in zip(acum_gj[-1], fila_gj)])
+        acum_hj.append([a + b for a, b in zip(acum_hj[-1], fila_hj)])
+
+    VJ, VE = vida_jugador, vida_enemigo
+    if tipo == "jefe":
+        p0 = 0.35
+    else:
+        p0 = 0.5
+    ganar = p0 * gj[VJ][VE] + (1 - p0) * ge[VJ][VE]
+    vida = p0 * hj[VJ][VE] + (1 - p0) * he[VJ][VE]
+    return analisis_combate(ganar, vida, VJ - vida)
@@ -0,0 +1,53 @@
+from __future__ import annotations
+from array import array
+
+
+class union_find:
+    # conjuntos disjuntos sobre indices de celda (y*ancho+x)
+    # padre[i] < 0 marca una raiz y guarda -tamano del conjunto
+    # no soporta quitar aristas: quien desconecta marca sucio y el dueno
+    # reconstruye la estructura antes de la siguiente consulta
+
+    def __init__(self, total: int, reservar: bool = True):
+        # reservar=False no reserva el arreglo todavia: queda sucio hasta el
+        # primer reiniciar, asi un mapa que nunca consulta no paga ancho*alto
+        self.total = total
+        self.padre = array("i", [-1]) * total if reservar else array("i")
+        self.sucio = not reservar
+
+    def reiniciar(self):
+        self.padre = array("i", [-1]) * self.total
+        self.sucio = False
+
+    def raiz(self, i: int) -> int:
+        padre = self.padre
+        while padre[i] >= 0:
+            abuelo = padre[padre[i]]
+            if abuelo >= 0:
+                # compresion por mitades
+                padre[i] = abuelo
+                i = abuelo
+            else:
+                i = padre[i]
+        return i
+
+    def unir(self, a: int, b: int) -> bool:
+        # une por tamano; retorna False si ya estaban juntos
+        ra, rb = self.raiz(a), self.raiz(b)
+        if ra == rb:
+            return False
+        padre = self.padre
+        if padre[ra] > padre[rb]:
+            ra, rb = rb, ra
+        padre[ra] += padre[rb]
+        padre[rb] = ra
+        return True
+
+    def conectados(self, a: int, b: int) -> bool:
+        return self.raiz(a) == self.raiz(b)
+
+    def tamano(self, i: int) -> int:
+        return -self.padre[self.raiz(i)]
+
+    def __repr__(self):
+        return f"union_find(total={self.total}, sucio={self.sucio})"
@@ -1,11 +1,27 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Tuple
-import random
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Tuple
+import sys
 from .items import objeto
+from . import combate
+from .instrumentacion import medido
+
+
+def _rng_combate(explorador):
+    # flujo de combate del explorador o, si no tiene, el de su mapa; nunca el
+    # random global, que romperia la reproducibilidad por semilla
+    rng = getattr(explorador, "rng", None)
+    if rng is None:
+        rng = getattr(getattr(getattr(explorador, "mapa", None), "rng", None), "combate", None)
+    if rng is None:
+        raise ValueError("el explorador no tiene flujo rng de combate")
+    return rng
 
 
 class contenido_habitacion(ABC):
+    __slots__ = ()
+
     @property
     @abstractmethod
     def descripcion(self) -> str:
@@ -17,7 +33,7 @@ class contenido_habitacion(ABC):
         ...
 
     @abstractmethod
-    def interactuar(self, explorador) -> str:
+    def interactuar(self, explorador, narrar: bool = True) -> str:
         ...
 
     @abstractmethod
@@ -30,6 +46,8 @@ class contenido_habitacion(ABC):
         ...
 
 class tesoro(contenido_habitacion):
+    __slots__ = ("recompensa",)
+
     def __init__(self, recompensa: objeto):
         self.recompensa = recompensa
 
@@ -41,8 +59,9 @@ class tesoro(contenido_habitacion):
     def tipo(self) -> str:
         return "tesoro"
 
-    def interactuar(self, explorador) -> str:
-        explorador.inventario.append(self.recompensa)
+    @medido("tesoro.interactuar")
+    def interactuar(self, explorador, narrar: bool = True) -> str:
+        explorador.inventario.append(self.recompensa.copia())
         return f"recogiste: {self.recompensa.nombre} valor {self.recompensa.valor}"
 
     def to_dict(self) -> Dict[str, Any]:
@@ -50,13 +69,15 @@ class tesoro(contenido_habitacion):
 
     @staticmethod
     def from_dict(d: Dict[str, Any]) -> "tesoro":
-        obj = objeto.from_dict(d["recompensa"])
+        obj = objeto.compartido_from_dict(d["recompensa"])
         return tesoro(obj)
 
 
 class monstruo(contenido_habitacion):
+    __slots__ = ("nombre", "vida", "ataque")
+
     def __init__(self, nombre: str, vida: int, ataque: int):
-        self.nombre = nombre
+        self.nombre = sys.intern(nombre)
         self.vida = int(vida)
         self.ataque = int(ataque)
 
@@ -68,31 +89,25 @@ class monstruo(contenido_habitacion):
     def tipo(self) -> str:
         return "monstruo"
 
-    def interactuar(self, explorador) -> str:
-        log = []
-        vida_enemigo = self.vida
-        vida_jugador = explorador.vida
-        turno = random.choice([0, 1])
-        log.append(f"comienza combate contra {self.nombre} vida: {vida_enemigo}")
-        
-        while vida_enemigo > 0 and vida_jugador > 0:
-            if turno == 0:
-                danio = random.randint(1, 2)
-                vida_enemigo -= danio
-                log.append(f"atacas y haces {danio} de dano enemigo {max(0, vida_enemigo)} pv")
-                turno = 1
-            else:
-                danio = random.randint(1, self.ataque)
-                vida_jugador -= danio
-                explorador.recibir_dano(danio)
-                log.append(f"{self.nombre} te golpea por {danio} tus pv {max(0, vida_jugador)}")
-                turno = 0
-
-        self.vida = max(0, vida_enemigo)
+    @medido("monstruo.interactuar")
+    def interactuar(self, explorador, narrar: bool = True) -> str:
+        # narrar=False resuelve el combate sin armar el registro por turno
+        rng = _rng_combate(explorador)
+        log = [f"comienza combate contra {self.nombre} vida: {self.vida}"] if narrar else None
+        res = combate.resolver(explorador.vida, self.vida, self.ataque, self.tipo, rng, log, self.nombre)
+        explorador.recibir_dano(res.danio_recibido)
+
+        self.vida = res.vida_enemigo
         if self.vida <= 0 and explorador.vida > 0:
-            log.append(f"derrotaste a {self.nombre}")
+            final = f"derrotaste a {self.nombre}"
         elif explorador.vida <= 0:
-            log.append("fuiste derrotado")
+            final = "fuiste derrotado"
+        else:
+            final = ""
+        if log is None:
+            return final
+        if final:
+            log.append(final)
         return "\n".join(log)
 
     def to_dict(self) -> Dict[str, Any]:
@@ -104,6 +119,8 @@ class monstruo(contenido_habitacion):
 
 
 class jefe(monstruo):
+    __slots__ = ("recompensa_especial",)
+
     def __init__(self, nombre: str, vida: int, ataque: int, recompensa_especial: objeto):
         super().__init__(nombre, vida, ataque)
         self.recompensa_especial = recompensa_especial
@@ -112,32 +129,25 @@ class jefe(monstruo):
     def tipo(self) -> str:
         return "jefe"
 
-    def interactuar(self, explorador) -> str:
-        log = []
-        vida_jugador = explorador.vida
-        vida_enemigo = self.vida
-        turno = 0 if random.random() < 0.35 else 1
-        log.append(f"enfrentas al jefe {self.nombre} vida: {vida_enemigo}")
-        
-        while vida_enemigo > 0 and vida_jugador > 0:
-            if turno == 0:
-                danio = random.randint(1, 2 + int(self.ataque/2))
-                vida_enemigo -= danio
-                log.append(f"atacas y haces {danio} de dano enemigo {max(0, vida_enemigo)} pv")
-                turno = 1
-            else:
-                danio = random.randint(1, self.ataque)
-                vida_jugador -= danio
-                explorador.recibir_dano(danio)
-                log.append(f"{self.nombre} te golpea por {danio} tus pv {max(0, vida_jugador)}")
-                turno = 0
-
-        self.vida = max(0, vida_enemigo)
+    @medido("jefe.interactuar")
+    def interactuar(self, explorador, narrar: bool = True) -> str:
+        rng = _rng_combate(explorador)
+        log = [f"enfrentas al jefe {self.nombre} vida: {self.vida}"] if narrar else None
+        res = combate.resolver(explorador.vida, self.vida, self.ataque, self.tipo, rng, log, self.nombre)
+        explorador.recibir_dano(res.danio_recibido)
+
+        self.vida = res.vida_enemigo
         if self.vida <= 0 and explorador.vida > 0:
-            explorador.inventario.append(self.recompensa_especial)
-            log.append(f"derrotaste al jefe {self.nombre} y obtienes {self.recompensa_especial.nombre}")
+            explorador.inventario.append(self.recompensa_especial.copia())
+            final = f"derrotaste al jefe {self.nombre} y obtienes {self.recompensa_especial.nombre}"
         elif explorador.vida <= 0:
-            log.append("fuiste derrotado por el jefe")
+            final = "fuiste derrotado por el jefe"
+        else:
+            final = ""
+        if log is None:
+            return final
+        if final:
+            log.append(final)
         return "\n".join(log)
 
     def to_dict(self) -> Dict[str, Any]:
@@ -148,14 +158,17 @@ class jefe(monstruo):
 
     @staticmethod
     def from_dict(d: Dict[str, Any]) -> "jefe":
-        recompensa = objeto.from_dict(d["recompensa_especial"])
+        recompensa = objeto.compartido_from_dict(d["recompensa_especial"])
         return jefe(d["nombre"], int(d["vida"]), int(d["ataque"]), recompensa)
 
 class evento(contenido_habitacion):
-    def __init__(self, nombre: str, descripcion: str, efecto: Dict[str, Any]):
-        self.nombre = nombre
-        self._descripcion = descripcion
-        self.efecto = efecto  
+    __slots__ = ("nombre", "_descripcion", "efecto")
+
+    def __init__(self, nombre: str, descripcion: str, efecto: Mapping[str, Any]):
+        self.nombre = sys.intern(nombre)
+        self._descripcion = sys.intern(descripcion)
+        # solo lectura: las definiciones de EVENTOS se comparten entre eventos
+        self.efecto = efecto if isinstance(efecto, MappingProxyType) else MappingProxyType(dict(efecto))
 
     @property
     def descripcion(self) -> str:
@@ -165,7 +178,8 @@ class evento(contenido_habitacion):
     def tipo(self) -> str:
         return "evento"
 
-    def interactuar(self, explorador) -> str:
+    @medido("evento.interactuar")
+    def interactuar(self, explorador, narrar: bool = True) -> str:
         tipo_efecto = self.efecto.get("tipo")
         if tipo_efecto == "curar":
             amount = int(self.efecto.get("valor", 1))
@@ -182,7 +196,10 @@ class evento(contenido_habitacion):
         return "evento misterioso"
 
     def to_dict(self) -> Dict[str, Any]:
-        return {"tipo": self.tipo, "nombre": self.nombre, "descripcion": self._descripcion, "efecto": self.efecto}
+        return {"tipo": self.tipo, "nombre": self.nombre, "descripcion": self._descripcion, "efecto": dict(self.efecto)}
+
+    def __reduce__(self):
+        return (evento, (self.nombre, self._descripcion, dict(self.efecto)))
 
     @staticmethod
     def from_dict(d: Dict[str, Any]) -> "evento":
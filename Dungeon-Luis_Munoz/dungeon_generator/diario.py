@@ -0,0 +1,148 @@
+from __future__ import annotations
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from .mapa import mapa
+from .player import explorador
+from .content import contenido_from_dict
+from .items import objeto
+from .save import guardar_partida, cargar_partida
+from .instrumentacion import medido, contar, temporizador
+
+# autoguardado por diario: una foto base (guardar_partida) y un archivo
+# .diario de lineas json con los cambios posteriores
+# cada registro lleva el estado absoluto de lo que cambio, asi repetir la
+# reproduccion sobre una foto mas nueva da el mismo resultado
+
+
+class diario_partida:
+    def __init__(self, ruta: str, formato: str = "binario", compactar_cada: int = 1000):
+        self.ruta = ruta
+        self.ruta_diario = ruta + ".diario"
+        self.formato = formato
+        self.compactar_cada = max(1, int(compactar_cada))
+        self.registros = 0
+        self._f = None
+        # ultimo estado escrito de lo que se vigila
+        self._posicion: Optional[Tuple[int, int]] = None
+        self._vida: Optional[int] = None
+        self._inventario: List[Any] = []
+        self._habs: Dict[Tuple[int, int], tuple] = {}
+
+    @staticmethod
+    def _firma_hab(hab) -> tuple:
+        c = hab.contenido
+        return (hab.visitada, id(c), getattr(c, "vida", None))
+
+    def iniciar(self, m: mapa, exp: explorador) -> None:
+        # escribe la foto base y empieza un diario vacio
+        self._escribir_base(m, exp)
+
+    def _escribir_base(self, m: mapa, exp: explorador) -> None:
+        # la foto se escribe aparte y se reemplaza de forma atomica
+        temporal = self.ruta + ".tmp"
+        guardar_partida(m, exp, temporal, formato=self.formato)
+        os.replace(temporal, self.ruta)
+        if self._f is not None:
+            self._f.close()
+        self._f = open(self.ruta_diario, "w", encoding="utf-8")
+        self.registros = 0
+        self._posicion = tuple(exp.posicion_actual)
+        self._vida = exp.vida
+        self._inventario = list(exp.inventario)
+        self._habs.clear()
+
+    def _anotar(self, registro: Dict[str, Any]) -> None:
+        self._f.write(json.dumps(registro, separators=(",", ":")))
+        self._f.write("\n")
+        self.registros += 1
+        contar("diario.registros")
+
+    def registrar(self, exp: explorador, *coords: Tuple[int, int]) -> int:
+        # anota lo que cambio desde el ultimo registro; por defecto revisa la
+        # habitacion actual, que es la unica que tocan mover y explorar
+        # retorna cuantos registros se escribieron
+        if self._f is None:
+            self.iniciar(exp.mapa, exp)
+        antes = self.registros
+        pos = tuple(exp.posicion_actual)
+        if pos != self._posicion:
+            self._anotar({"op": "pos", "v": list(pos)})
+            self._posicion = pos
+        if exp.vida != self._vida:
+            self._anotar({"op": "vida", "v": exp.vida})
+            self._vida = exp.vida
+        inv = exp.inventario
+        if len(inv) != len(self._inventario) or any(a is not b for a, b in zip(inv, self._inventario)):
+            self._anotar({"op": "inv", "v": [o.to_dict() for o in inv if o is not None]})
+            self._inventario = list(inv)
+        for coord in (coords or (pos,)):
+            hab = exp.mapa.habitaciones.get(tuple(coord))
+            if hab is None:
+                continue
+            firma = self._firma_hab(hab)
+            if self._habs.get(hab.pos) != firma:
+                c = hab.contenido
+                self._anotar({
+                    "op": "hab",
+                    "pos": list(hab.pos),
+                    "visitada": hab.visitada,
+                    "contenido": c.to_dict() if c is not None else None,
+                })
+                self._habs[hab.pos] = firma
+        self._f.flush()
+        if self.registros >= self.compactar_cada:
+            self.compactar(exp.mapa, exp)
+        return self.registros - antes
+
+    @medido("diario.compactar")
+    def compactar(self, m: mapa, exp: explorador) -> None:
+        # vuelca el estado actual en una foto nueva y vacia el diario
+        self._escribir_base(m, exp)
+
+    def cerrar(self) -> None:
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+@medido("diario.cargar_diario")
+def cargar_diario(ruta: str, backend: str = "dict") -> Tuple[mapa, explorador]:
+    # carga la foto base y le aplica el diario en orden
+    m, exp = cargar_partida(ruta, backend=backend)
+    p = Path(ruta + ".diario")
+    if not p.exists():
+        return m, exp
+    with temporizador("diario.reproducir"), open(p, encoding="utf-8") as f:
+        for linea in f:
+            linea = linea.strip()
+            if not linea:
+                continue
+            contar("diario.reproducidos")
+            try:
+                r = json.loads(linea)
+            except ValueError:
+                # la ultima linea puede quedar a medias si se corto la escritura
+                break
+            op = r.get("op")
+            if op == "pos":
+                exp.posicion_actual = tuple(r["v"])
+            elif op == "vida":
+                exp.vida = int(r["v"])
+            elif op == "inv":
+                exp.inventario = [objeto.from_dict(o) for o in r["v"]]
+            elif op == "hab":
+                hab = m.habitaciones.get(tuple(r["pos"]))
+                if hab is None:
+                    continue
+                hab.visitada = bool(r.get("visitada", False))
+                cont = r.get("contenido")
+                hab.contenido = contenido_from_dict(cont) if cont is not None else None
+    return m, exp
@@ -1,15 +1,148 @@
 from __future__ import annotations
-from rich.console import Console
+from rich.console import Console, Group
 from rich.table import Table
 from rich.panel import Panel
 from rich.text import Text
 from rich.align import Align
 from rich.box import SIMPLE_HEAVY, ROUNDED
-from typing import Tuple
+from rich.live import Live
+from rich.measure import Measurement
+from rich.segment import Segment
+from rich.style import Style
+from typing import Dict, List, Optional, Tuple
 from .mapa import mapa
 from .player import explorador
+from .instrumentacion import medido
+
+# la consola se crea en el primer uso, con obtener_consola() o al leer
+# display.console (tambien "from display import console"); asignar
+# display.console la reemplaza
+
+
+def obtener_consola() -> Console:
+    consola = globals().get("console")
+    if consola is None:
+        consola = globals()["console"] = Console()
+    return consola
+
+
+def __getattr__(nombre: str):
+    # solo se llama mientras display.console no existe todavia
+    if nombre == "console":
+        return obtener_consola()
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
+# segmentos ya estilizados por (texto, estilo); se reutilizan entre cuadros
+_GLIFOS: Dict[Tuple[str, str], Segment] = {}
+
+
+def _glifo(texto: str, estilo: str) -> Segment:
+    seg = _GLIFOS.get((texto, estilo))
+    if seg is None:
+        seg = _GLIFOS[(texto, estilo)] = Segment(texto, Style.parse(estilo) if estilo else Style.null())
+    return seg
+
+
+class _marco_minimapa:
+    # cuadro persistente del minimapa: una fila de segmentos por linea del
+    # viewport; al pintar, las celdas vecinas con el mismo estilo se funden
+    # en un solo segmento y la fila fundida se guarda hasta que cambie
+    def __init__(self, filas: List[List[Segment]], cell_h: int):
+        self.cell_h = cell_h
+        self.poner_filas(filas)
+
+    def poner_filas(self, filas: List[List[Segment]]):
+        self.filas = filas
+        self._fundidas: List[Optional[List[Segment]]] = [None] * len(filas)
+
+    def poner(self, fila: int, i: int, seg: Segment):
+        self.filas[fila][i] = seg
+        self._fundidas[fila] = None
+
+    @staticmethod
+    def _fundir(fila: List[Segment]) -> List[Segment]:
+        res: List[Segment] = []
+        texto, estilo = [], None
+        for seg in fila:
+            if seg.style != estilo and texto:
+                res.append(Segment("".join(texto), estilo))
+                texto = []
+            estilo = seg.style
+            texto.append(seg.text)
+        if texto:
+            res.append(Segment("".join(texto), estilo))
+        return res
+
+    def __rich_console__(self, console, options):
+        salto = Segment.line()
+        for i, fila in enumerate(self.filas):
+            fundida = self._fundidas[i]
+            if fundida is None:
+                fundida = self._fundidas[i] = self._fundir(fila)
+            for _ in range(self.cell_h):
+                yield from fundida
+                yield salto
+
+    def __rich_measure__(self, console, options):
+        ancho = sum(len(seg.text) for seg in self.filas[0]) if self.filas else 0
+        return Measurement(ancho, ancho)
+
+
+class _pagina_mapa:
+    # una pagina del mapa completo: solo recorre las habitaciones que existen
+    # dentro de la pagina; cada tramo de celdas vacias sale como un segmento
+    # cubeta son las columnas ocupadas de la pagina por fila (ver
+    # visualizador._cubetas), para no recorrer todo el mapa en cada pagina
+    def __init__(self, vis: "visualizador", x0: int, y0: int, w: int, h: int, niebla: bool,
+                 cubeta: Optional[Dict[int, List[int]]] = None):
+        self.vis = vis
+        self.x0, self.y0, self.w, self.h = x0, y0, w, h
+        self.niebla = niebla
+        self.cubeta = cubeta
+
+    def _habitaciones(self) -> Dict[int, List[Tuple[int, object]]]:
+        # habitaciones de la pagina por fila; sin cubeta prueba celda a celda
+        habitaciones = self.vis.mapa.habitaciones
+        x0, y0, x1, y1 = self.x0, self.y0, self.x0 + self.w, self.y0 + self.h
+        filas: Dict[int, List[Tuple[int, object]]] = {}
+        if self.cubeta is None:
+            for y in range(y0, y1):
+                for x in range(x0, x1):
+                    hab = habitaciones.get((x, y))
+                    if hab is not None:
+                        filas.setdefault(y, []).append((x, hab))
+        else:
+            for y, xs in self.cubeta.items():
+                filas[y] = [(x, habitaciones[(x, y)]) for x in xs]
+        return filas
+
+    def __rich_console__(self, console, options):
+        vis = self.vis
+        cw = vis._ancho_celda()
+        vacio = vis._glifo_vacio()
+        etiqueta = _glifo("", "bold")
+        salto = Segment.line()
+        yield Segment(" " * 5 + "".join(str(x % 1000).center(cw) for x in range(self.x0, self.x0 + self.w)),
+                      etiqueta.style)
+        yield salto
+        fin = self.x0 + self.w
+        filas = self._habitaciones()
+        for y in range(self.y0, self.y0 + self.h):
+            yield Segment(f"{y:>4} ", etiqueta.style)
+            cursor = self.x0
+            for x, hab in filas.get(y, ()):
+                if x > cursor:
+                    yield Segment(vacio.text * (x - cursor), vacio.style)
+                yield vis._glifo_hab(hab, self.niebla)
+                cursor = x + 1
+            if fin > cursor:
+                yield Segment(vacio.text * (fin - cursor), vacio.style)
+            yield salto
+
+    def __rich_measure__(self, console, options):
+        ancho = 5 + self.w * self.vis._ancho_celda()
+        return Measurement(ancho, ancho)
 
-console = Console()
 
 class visualizador:
     TYPE_STYLE = {
@@ -39,6 +172,10 @@ class visualizador:
         self.minimap_box_height = max(5, int(minimap_box_height))
         self.cell_w = max(1, int(cell_w))
         self.cell_h = max(1, int(cell_h))
+        # glifos del mapa completo por (tipo, inicial, visitada)
+        self._glifos: Dict[tuple, Segment] = {}
+        # habitaciones repartidas por pagina: (clave, {(px, py): {y: [x, ...]}})
+        self._paginado: Optional[Tuple[tuple, Dict[Tuple[int, int], Dict[int, List[int]]]]] = None
 
     
     def _sym_and_style_for_hab(self, hab):
@@ -77,31 +214,96 @@ class visualizador:
             return ("E", "bold white on magenta")
         return ("o", "bold")
 
-    def mostrar_mapa_completo(self) -> None:
-        # muestra el mapa completo con rich o ascii compacto
-        ancho = self.mapa.ancho
-        alto = self.mapa.alto
+    def _ancho_celda(self) -> int:
+        return 2 if self.compact else 3
 
-        if self.compact:
-            lines = []
-            header = "   " + "".join(f"{x:2}" for x in range(ancho))
-            lines.append(header)
-            for y in range(alto):
-                row = [f"{y:2} "]
-                for x in range(ancho):
-                    coord = (x, y)
-                    if coord in self.mapa.habitaciones:
-                        hab = self.mapa.habitaciones[coord]
-                        sym, style = self._sym_and_style_for_hab(hab)
-                        cell = Text(sym.center(2), style=style)
-                        row.append(cell.plain)
-                    else:
-                        row.append("· ")
-                lines.append("".join(row))
-            panel_text = "\n".join(lines)
-            console.print(Panel(panel_text, title="Mapa completo (compacto)", padding=(0,1)))
+    def _glifo_vacio(self) -> Segment:
+        return _glifo("·".center(self._ancho_celda()), "dim")
+
+    def _glifo_hab(self, hab, niebla: bool = False) -> Segment:
+        # segmento ya estilizado de una habitacion; con niebla las no
+        # visitadas se muestran como ?
+        clave = (getattr(hab.contenido, "tipo", None), bool(hab.inicial), bool(hab.visitada) or not niebla)
+        seg = self._glifos.get(clave)
+        if seg is None:
+            if not clave[2] and not clave[1]:
+                sym, style = ("?", "dim")
+            else:
+                sym, style = self._sym_and_style_for_hab(hab)
+            seg = self._glifos[clave] = _glifo(sym.center(self._ancho_celda()), style)
+        return seg
+
+    def paginas(self, consola: Optional[Console] = None) -> Tuple[int, int, int, int]:
+        # (ancho de pagina, alto de pagina, paginas en x, paginas en y) segun
+        # el tamano de la consola
+        c = consola or obtener_consola()
+        w = max(1, min(self.mapa.ancho, (c.width - 9) // self._ancho_celda()))
+        h = max(1, min(self.mapa.alto, c.height - 6))
+        return w, h, -(-self.mapa.ancho // w), -(-self.mapa.alto // h)
+
+    def _cubetas(self, w: int, h: int) -> Dict[Tuple[int, int], Dict[int, List[int]]]:
+        # reparte las habitaciones por pagina y fila en un solo recorrido, asi
+        # dibujar todas las paginas cuesta O(habitaciones); se rehace si cambia
+        # el tamano de pagina o el mapa
+        m = self.mapa
+        clave = (w, h, getattr(m, "_version_topologia", None), len(m.habitaciones))
+        if self._paginado is None or self._paginado[0] != clave:
+            cubetas: Dict[Tuple[int, int], Dict[int, List[int]]] = {}
+            for x, y in m.habitaciones:
+                cubetas.setdefault((x // w, y // h), {}).setdefault(y, []).append(x)
+            for filas in cubetas.values():
+                for fila in filas.values():
+                    fila.sort()
+            self._paginado = (clave, cubetas)
+        return self._paginado[1]
+
+    def pagina(self, px: int, py: int, *, niebla: bool = False, consola: Optional[Console] = None) -> Panel:
+        # panel con la pagina (px, py) del mapa completo
+        w, h, nx, ny = self.paginas(consola)
+        if not (0 <= px < nx and 0 <= py < ny):
+            raise ValueError(f"pagina fuera de rango: {px},{py}")
+        x0, y0 = px * w, py * h
+        cubeta = None
+        if w * h > len(self.mapa.habitaciones):
+            # pagina rala: se lee de las cubetas en lugar de probar cada celda
+            cubeta = self._cubetas(w, h).get((px, py), {})
+        w, h = min(w, self.mapa.ancho - x0), min(h, self.mapa.alto - y0)
+        titulo = "Mapa completo"
+        if nx * ny > 1:
+            titulo += f" — pagina {px},{py} de {nx}x{ny} (x {x0}..{x0 + w - 1}, y {y0}..{y0 + h - 1})"
+        return Panel(_pagina_mapa(self, x0, y0, w, h, niebla, cubeta), title=titulo, padding=(0, 1), expand=False)
+
+    def _leyenda_mapa(self) -> Panel:
+        leyenda = Text()
+        leyenda.append(" S ", style="bold white on blue"); leyenda.append("  inicio  ")
+        leyenda.append(" M ", style=self.TYPE_STYLE["monstruo"][1]); leyenda.append("  monstruo  ")
+        leyenda.append(" J ", style=self.TYPE_STYLE["jefe"][1]); leyenda.append("  jefe  ")
+        leyenda.append(" T ", style=self.TYPE_STYLE["tesoro"][1]); leyenda.append("  tesoro  ")
+        leyenda.append(" E ", style=self.TYPE_STYLE["evento"][1]); leyenda.append("  evento  ")
+        leyenda.append(" 0 ", style=self.TYPE_STYLE["vacia"][1]); leyenda.append("  habitacion vacia")
+        return Panel(leyenda, style="dim", padding=(0,1))
+
+    @medido("visualizador.mostrar_mapa_completo")
+    def mostrar_mapa_completo(self, pagina: Optional[Tuple[int, int]] = None, *, niebla: bool = False) -> None:
+        # muestra el mapa completo; si no cabe en la consola lo parte en
+        # paginas y las muestra todas, o solo la indicada en pagina=(px, py)
+        # solo dibuja las habitaciones que existen, con glifos cacheados
+        if self.show_ids:
+            self._mostrar_tabla_con_ids()
             return
+        if pagina is not None:
+            obtener_consola().print(self.pagina(*pagina, niebla=niebla))
+        else:
+            _, _, nx, ny = self.paginas()
+            for py in range(ny):
+                for px in range(nx):
+                    obtener_consola().print(self.pagina(px, py, niebla=niebla))
+        obtener_consola().print(self._leyenda_mapa())
 
+    def _mostrar_tabla_con_ids(self) -> None:
+        # tabla celda por celda con el id de cada habitacion; solo para mapas chicos
+        ancho = self.mapa.ancho
+        alto = self.mapa.alto
         t = Table(title="Mapa completo", box=SIMPLE_HEAVY, show_lines=False, pad_edge=True)
         t.add_column("Y\\X", width=4, no_wrap=True, justify="center", style="bold")
         col_width = 6
@@ -127,18 +329,11 @@ class visualizador:
                 row.append(cell)
             t.add_row(*row)
 
-        leyenda = Text()
-        leyenda.append(" S ", style="bold white on blue"); leyenda.append("  inicio  ")
-        leyenda.append(" M ", style=self.TYPE_STYLE["monstruo"][1]); leyenda.append("  monstruo  ")
-        leyenda.append(" J ", style=self.TYPE_STYLE["jefe"][1]); leyenda.append("  jefe  ")
-        leyenda.append(" T ", style=self.TYPE_STYLE["tesoro"][1]); leyenda.append("  tesoro  ")
-        leyenda.append(" E ", style=self.TYPE_STYLE["evento"][1]); leyenda.append("  evento  ")
-        leyenda.append(" 0 ", style=self.TYPE_STYLE["vacia"][1]); leyenda.append("  habitacion vacia")
-        console.print(t)
-        console.print(Panel(leyenda, style="dim", padding=(0,1)))
+        obtener_consola().print(t)
+        obtener_consola().print(self._leyenda_mapa())
 
-    def mostrar_minimapa(self, exp: explorador, *, show_all: bool = False) -> None:
-        # muestra minimapa centrado en el explorador
+    def _viewport(self, ex: int, ey: int) -> Tuple[int, int, int, int]:
+        # tamano del viewport del minimapa y su esquina, centrado en (ex, ey)
         ancho_map = self.mapa.ancho
         alto_map = self.mapa.alto
         inner_w = self.minimap_box_width - 2
@@ -147,7 +342,6 @@ class visualizador:
         max_cells_y = max(1, inner_h // (self.cell_h))
         vw = min(ancho_map, max_cells_x)
         vh = min(alto_map, max_cells_y)
-        ex, ey = tuple(exp.posicion_actual)
         half_w = vw // 2
         half_h = vh // 2
         x0 = max(0, ex - half_w)
@@ -156,6 +350,29 @@ class visualizador:
             x0 = max(0, ancho_map - vw)
         if y0 + vh > alto_map:
             y0 = max(0, alto_map - vh)
+        return vw, vh, x0, y0
+
+    def _celda_minimapa(self, coord, pos, show_all: bool) -> Tuple[str, str]:
+        # caracter y estilo de una celda del minimapa
+        if coord == pos:
+            return ("X", "bold black on white")
+        hab = self.mapa.habitaciones.get(coord)
+        if hab is None:
+            return (" ", "dim")
+        if not show_all and not getattr(hab, "visitada", False):
+            return ("·", "dim")
+        return self._style_for_coord(coord)
+
+    def minimapa_vivo(self, exp: explorador, *, show_all: bool = False,
+                      consola: Optional[Console] = None) -> "minimapa_vivo":
+        # minimapa en una pantalla viva que solo rehace las celdas que cambian
+        return minimapa_vivo(self, exp, show_all=show_all, consola=consola)
+
+    @medido("visualizador.mostrar_minimapa")
+    def mostrar_minimapa(self, exp: explorador, *, show_all: bool = False) -> None:
+        # muestra minimapa centrado en el explorador
+        ex, ey = tuple(exp.posicion_actual)
+        vw, vh, x0, y0 = self._viewport(ex, ey)
         x1 = x0 + vw - 1
         y1 = y0 + vh - 1
 
@@ -203,15 +420,16 @@ class visualizador:
             box=ROUNDED,
             padding=(0, 1),
         )
-        console.print(panel)
-        console.print(Panel(ley, style="dim", padding=(0,1)))
+        obtener_consola().print(panel)
+        obtener_consola().print(Panel(ley, style="dim", padding=(0,1)))
 
+    @medido("visualizador.mostrar_habitacion_actual")
     def mostrar_habitacion_actual(self, exp: explorador) -> None:
         # muestra informacion de la habitacion donde esta el explorador
         coord = tuple(exp.posicion_actual)
         hab = self.mapa.habitaciones.get(coord)
         if not hab:
-            console.print(Panel("no hay habitacion en la posicion actual", style="red"))
+            obtener_consola().print(Panel("no hay habitacion en la posicion actual", style="red"))
             return
         tipo = getattr(hab.contenido, "tipo", None)
         descripcion = getattr(hab.contenido, "descripcion", "Sin descripción")
@@ -230,8 +448,9 @@ class visualizador:
             contenido_txt = Text("vacia", style="dim")
         t.add_row("contenido:", contenido_txt)
         t.add_row("descripcion:", descripcion)
-        console.print(Panel(t, title="habitacion actual", padding=(0,1)))
+        obtener_consola().print(Panel(t, title="habitacion actual", padding=(0,1)))
 
+    @medido("visualizador.mostrar_estado_explorador")
     def mostrar_estado_explorador(self, exp: explorador) -> None:
             # muestra estado del explorador en un panel compacto
             t = Table.grid(padding=(0, 1))
@@ -253,4 +472,116 @@ class visualizador:
                 width=38,
                 style="bold white",
             )
-            console.print(panel)
+            obtener_consola().print(panel)
+
+
+class minimapa_vivo:
+    # minimapa sobre rich.live con un cuadro persistente de segmentos
+    # cada actualizar() rehace solo las celdas de la posicion anterior, la
+    # actual y las coords que se pasen; la vista se mueve solo cuando el
+    # explorador se acerca al borde, asi un paso normal toca dos celdas
+    #
+    #   with vis.minimapa_vivo(exp) as mm:
+    #       exp.mover("norte")
+    #       mm.actualizar()
+
+    LEYENDA = (("X", "bold black on white", "  explorador "), ("M", "bold white on red", " monstruo "),
+               ("J", "bold white on green", " jefe "), ("T", "bold black on yellow", " tesoro "),
+               ("*", "dim", " habitacion recorrida"))
+
+    def __init__(self, vis: visualizador, exp: explorador, *, show_all: bool = False,
+                 consola: Optional[Console] = None):
+        self.vis = vis
+        self.exp = exp
+        self.show_all = show_all
+        self._pos = tuple(exp.posicion_actual)
+        self._vw, self._vh, self._x0, self._y0 = vis._viewport(*self._pos)
+        # margen en celdas antes de mover la vista
+        self._margen_x = self._vw // 4
+        self._margen_y = self._vh // 4
+        self._estado: List[List[Optional[Tuple[str, str]]]] = []
+        self._marco = _marco_minimapa([], vis.cell_h)
+        self.celdas_redibujadas = 0
+        self._rearmar()
+        ley = Text()
+        for ch, estilo, nombre in self.LEYENDA:
+            ley.append(f" {ch} ", style=estilo); ley.append(nombre)
+        self._panel = Panel(
+            self._marco,
+            title=self._titulo(),
+            width=vis.minimap_box_width,
+            box=ROUNDED,
+            padding=(0, 1),
+        )
+        self._live = Live(Group(self._panel, Panel(ley, style="dim", padding=(0, 1))),
+                          console=consola or obtener_consola(), auto_refresh=False)
+
+    def _titulo(self) -> str:
+        ex, ey = self._pos
+        return f"Minimapa (viewport {self._vw}×{self._vh}) — centro: {ex},{ey}"
+
+    def _poner(self, coord):
+        # reestiliza una celda si su caracter o estilo cambio
+        col, fila = coord[0] - self._x0, coord[1] - self._y0
+        if not (0 <= col < self._vw and 0 <= fila < self._vh):
+            return
+        celda = self.vis._celda_minimapa(coord, self._pos, self.show_all)
+        if self._estado[fila][col] == celda:
+            return
+        self._estado[fila][col] = celda
+        ch, estilo = celda
+        self._marco.poner(fila, 2 * col, _glifo(ch.center(self.vis.cell_w), estilo))
+        self.celdas_redibujadas += 1
+
+    def _rearmar(self):
+        # arma todas las celdas del viewport actual
+        self._estado = [[None] * self._vw for _ in range(self._vh)]
+        separador = _glifo(" ", "")
+        filas = []
+        for _ in range(self._vh):
+            fila = [separador] * (2 * self._vw - 1)
+            filas.append(fila)
+        self._marco.poner_filas(filas)
+        for y in range(self._y0, self._y0 + self._vh):
+            for x in range(self._x0, self._x0 + self._vw):
+                self._poner((x, y))
+
+    def _vista_valida(self) -> bool:
+        ex, ey = self._pos
+        ancho_map, alto_map = self.vis.mapa.ancho, self.vis.mapa.alto
+        x_ok = (self._x0 + self._margen_x <= ex or self._x0 == 0) and \
+               (ex < self._x0 + self._vw - self._margen_x or self._x0 + self._vw >= ancho_map)
+        y_ok = (self._y0 + self._margen_y <= ey or self._y0 == 0) and \
+               (ey < self._y0 + self._vh - self._margen_y or self._y0 + self._vh >= alto_map)
+        return x_ok and y_ok and self._x0 <= ex < self._x0 + self._vw and self._y0 <= ey < self._y0 + self._vh
+
+    @medido("minimapa_vivo.actualizar")
+    def actualizar(self, *coords) -> None:
+        # refleja el estado actual: nueva posicion del explorador y las
+        # habitaciones indicadas (por defecto solo la actual y la anterior)
+        anterior = self._pos
+        self._pos = tuple(self.exp.posicion_actual)
+        if not self._vista_valida():
+            _, _, self._x0, self._y0 = self.vis._viewport(*self._pos)
+            self._rearmar()
+        else:
+            self._poner(anterior)
+            self._poner(self._pos)
+            for coord in coords:
+                self._poner(tuple(coord))
+        if self._pos != anterior:
+            self._panel.title = self._titulo()
+        self._live.refresh()
+
+    def iniciar(self):
+        self._live.start(refresh=True)
+
+    def detener(self):
+        self._live.stop()
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, *exc):
+        self.detener()
@@ -0,0 +1,168 @@
+from __future__ import annotations
+import functools
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+# instrumentacion opcional: temporizadores y contadores sobre los caminos
+# calientes del paquete (generacion, contenido, combate, rutas, guardado y
+# dibujo), enviados a uno o mas sumideros
+# apagada por defecto: cada punto medido solo revisa ACTIVO y sigue de largo
+#
+#   from dungeon_generator import instrumentacion as ins
+#   mem = ins.sumidero_memoria()
+#   ins.activar(mem)
+#   ...
+#   print(mem.resumen())
+#   ins.desactivar()
+
+ACTIVO = False
+_sumideros: List[Any] = []
+
+
+class sumidero_memoria:
+    # histograma por metrica en memoria; los tiempos se agrupan en cubetas de
+    # potencias de 2 microsegundos, asi el costo por medicion es fijo
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.metricas: Dict[str, Dict[str, Any]] = {}
+
+    def registrar(self, nombre: str, tipo: str, valor: float):
+        with self._lock:
+            m = self.metricas.get(nombre)
+            if m is None:
+                m = self.metricas[nombre] = {"tipo": tipo, "n": 0, "total": 0.0,
+                                             "min": valor, "max": valor, "cubetas": {}}
+            m["n"] += 1
+            m["total"] += valor
+            m["min"] = min(m["min"], valor)
+            m["max"] = max(m["max"], valor)
+            if tipo == "tiempo":
+                cubeta = max(0, math.ceil(math.log2(max(valor * 1e6, 1))))
+                m["cubetas"][cubeta] = m["cubetas"].get(cubeta, 0) + 1
+
+    def percentil(self, nombre: str, p: float) -> Optional[float]:
+        # cota superior en segundos de la cubeta que contiene el percentil p
+        m = self.metricas.get(nombre)
+        if not m or not m["cubetas"]:
+            return None
+        objetivo = p * m["n"]
+        acumulado = 0
+        for cubeta in sorted(m["cubetas"]):
+            acumulado += m["cubetas"][cubeta]
+            if acumulado >= objetivo:
+                return round(min(m["max"], (2 ** cubeta) / 1e6), 6)
+        return round(m["max"], 6)
+
+    def resumen(self) -> Dict[str, Dict[str, Any]]:
+        res = {}
+        with self._lock:
+            nombres = list(self.metricas)
+        for nombre in nombres:
+            m = self.metricas[nombre]
+            r = {"tipo": m["tipo"], "n": m["n"], "total": round(m["total"], 6)}
+            if m["tipo"] == "tiempo":
+                r.update({
+                    "media": round(m["total"] / m["n"], 6),
+                    "min": round(m["min"], 6),
+                    "max": round(m["max"], 6),
+                    "p50": self.percentil(nombre, 0.5),
+                    "p95": self.percentil(nombre, 0.95),
+                })
+            res[nombre] = r
+        return res
+
+    def limpiar(self):
+        with self._lock:
+            self.metricas.clear()
+
+
+class sumidero_jsonl:
+    # una linea json por medicion
+
+    def __init__(self, ruta: str):
+        self._lock = threading.Lock()
+        self._f = open(ruta, "a", encoding="utf-8")
+
+    def registrar(self, nombre: str, tipo: str, valor: float):
+        linea = json.dumps({"t": time.time(), "nombre": nombre, "tipo": tipo, "valor": valor})
+        with self._lock:
+            self._f.write(linea + "\n")
+
+    def cerrar(self):
+        with self._lock:
+            if not self._f.closed:
+                self._f.close()
+
+
+class sumidero_callback:
+    # reenvia cada medicion a fn(nombre, tipo, valor)
+
+    def __init__(self, fn: Callable[[str, str, float], None]):
+        self.fn = fn
+
+    def registrar(self, nombre: str, tipo: str, valor: float):
+        self.fn(nombre, tipo, valor)
+
+
+def activar(*sumideros) -> None:
+    # agrega sumideros y enciende la instrumentacion; un callable suelto se
+    # envuelve en sumidero_callback
+    global ACTIVO
+    for s in sumideros:
+        _sumideros.append(s if hasattr(s, "registrar") else sumidero_callback(s))
+    ACTIVO = bool(_sumideros)
+
+
+def desactivar() -> None:
+    # apaga la instrumentacion y suelta los sumideros (cierra los de archivo)
+    global ACTIVO
+    ACTIVO = False
+    for s in _sumideros:
+        cerrar = getattr(s, "cerrar", None)
+        if cerrar is not None:
+            cerrar()
+    _sumideros.clear()
+
+
+def emitir(nombre: str, tipo: str, valor: float) -> None:
+    for s in _sumideros:
+        s.registrar(nombre, tipo, valor)
+
+
+def contar(nombre: str, n: int = 1) -> None:
+    if ACTIVO:
+        emitir(nombre, "contador", n)
+
+
+@contextmanager
+def temporizador(nombre: str):
+    # mide un bloque; apagado solo cuesta entrar y salir del with
+    if not ACTIVO:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        emitir(nombre, "tiempo", time.perf_counter() - inicio)
+
+
+def medido(nombre: str):
+    # decorador que mide cada llamada de la funcion con el nombre dado
+    def decorador(fn):
+        @functools.wraps(fn)
+        def envoltura(*args, **kwargs):
+            if not ACTIVO:
+                return fn(*args, **kwargs)
+            inicio = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                emitir(nombre, "tiempo", time.perf_counter() - inicio)
+        return envoltura
+    return decorador
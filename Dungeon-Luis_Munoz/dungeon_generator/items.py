@@ -1,48 +1,101 @@
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Mapping
+import sys
+
+# efecto vacio compartido por los objetos sin efecto
+_SIN_EFECTO: Mapping[str, Any] = MappingProxyType({})
+
+
 class objeto:
     # representa un objeto del juego: tesoro, equipamiento o consumible
+    # es inmutable (el efecto tambien, es una vista de solo lectura), por eso
+    # el contenido generado de las habitaciones comparte las definiciones
+    # iguales (compartido); lo que entra al inventario es siempre una instancia
+    # propia, el inventario compara por identidad
+    __slots__ = ("_nombre", "_valor", "_descripcion", "_categoria", "_efecto")
     
     def __init__(self, nombre: str, valor: int = 0, descripcion: str = "", 
                  categoria: str = "normal", efecto: dict = None):
-        self._datos = {
-            "nombre": nombre,
-            "valor": int(valor),
-            "descripcion": descripcion,
-            "categoria": categoria,
-            "efecto": efecto if efecto else {}
-        }
+        self._nombre = sys.intern(nombre)
+        self._valor = int(valor)
+        self._descripcion = sys.intern(descripcion)
+        self._categoria = sys.intern(categoria)
+        self._efecto = MappingProxyType(dict(efecto)) if efecto else _SIN_EFECTO
     
     @property
     def nombre(self) -> str:
-        return self._datos["nombre"]
+        return self._nombre
     
     @property
     def valor(self) -> int:
-        return self._datos["valor"]
+        return self._valor
     
     @property
     def descripcion(self) -> str:
-        return self._datos["descripcion"]
+        return self._descripcion
     
     @property
     def categoria(self) -> str:
-        return self._datos["categoria"]
+        return self._categoria
     
     @property
-    def efecto(self) -> dict:
-        return self._datos["efecto"]
+    def efecto(self) -> Mapping[str, Any]:
+        return self._efecto
 
     def to_dict(self) -> dict:
-        return dict(self._datos)
+        return {
+            "nombre": self._nombre,
+            "valor": self._valor,
+            "descripcion": self._descripcion,
+            "categoria": self._categoria,
+            "efecto": dict(self._efecto),
+        }
+
+    @staticmethod
+    def compartido(nombre: str, valor: int = 0, descripcion: str = "",
+                   categoria: str = "normal", efecto: dict = None) -> "objeto":
+        # flyweight: retorna una instancia compartida para definiciones iguales
+        # si el efecto no es hasheable se crea una instancia nueva
+        try:
+            clave = tuple(sorted(efecto.items())) if efecto else ()
+            hash(clave)
+        except TypeError:
+            return objeto(nombre, valor, descripcion, categoria, efecto)
+        return _objeto_internado(nombre, int(valor), descripcion, categoria, clave)
 
     @staticmethod
     def from_dict(d: dict) -> "objeto":
-        return objeto(
-            d.get("nombre", "obj"),
-            int(d.get("valor", 0)),
-            d.get("descripcion", ""),
-            d.get("categoria", "normal"),
-            d.get("efecto"),
-        )
+        return objeto(*_campos(d))
+
+    @staticmethod
+    def compartido_from_dict(d: dict) -> "objeto":
+        # para plantillas de solo lectura, como la recompensa de un tesoro
+        return objeto.compartido(*_campos(d))
+
+    def copia(self) -> "objeto":
+        # instancia propia con los mismos datos, para el inventario
+        return objeto(self._nombre, self._valor, self._descripcion, self._categoria, self._efecto)
+
+    def __reduce__(self):
+        # pickle y deepcopy: la vista del efecto no se serializa, se rearma
+        # los objetos compartidos siguen compartidos por la memo de pickle
+        return (objeto, (self._nombre, self._valor, self._descripcion, self._categoria, dict(self._efecto)))
 
     def __repr__(self):
         return f"objeto({self.nombre}, valor={self.valor})"
+
+
+def _campos(d: dict) -> tuple:
+    return (
+        d.get("nombre", "obj"),
+        int(d.get("valor", 0)),
+        d.get("descripcion", ""),
+        d.get("categoria", "normal"),
+        d.get("efecto"),
+    )
+
+
+@lru_cache(maxsize=4096)
+def _objeto_internado(nombre: str, valor: int, descripcion: str, categoria: str, efecto: tuple) -> objeto:
+    return objeto(nombre, valor, descripcion, categoria, dict(efecto))
@@ -0,0 +1,86 @@
+from __future__ import annotations
+from typing import Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except Exception:
+    np = None
+    HAS_NUMPY = False
+
+# operaciones por lotes para colocar contenido; usan numpy si esta instalado
+# y si no una version en python puro que da exactamente los mismos enteros
+
+
+def distancias_manhattan(coords: Sequence[Tuple[int, int]], origen: Tuple[int, int]) -> List[int]:
+    # distancia manhattan de cada coord al origen en una sola pasada
+    if not coords:
+        return []
+    ox, oy = origen
+    if HAS_NUMPY:
+        arr = np.asarray(coords, dtype=np.int64)
+        return (np.abs(arr[:, 0] - ox) + np.abs(arr[:, 1] - oy)).tolist()
+    return [abs(x - ox) + abs(y - oy) for x, y in coords]
+
+
+def distancias_campo(coords: Sequence[Tuple[int, int]], campo: Sequence[int], ancho: int,
+                     origen: Tuple[int, int]) -> List[int]:
+    # distancia de cada coord leida de un campo plano indexado por y*ancho+x
+    # (mapa.campo_distancias); las celdas que no alcanza usan la manhattan
+    if not coords:
+        return []
+    if HAS_NUMPY:
+        arr = np.asarray(coords, dtype=np.int64)
+        d = np.frombuffer(campo, dtype=np.intc)[arr[:, 1] * ancho + arr[:, 0]].astype(np.int64)
+        faltan = d < 0
+        if faltan.any():
+            d[faltan] = np.abs(arr[faltan, 0] - origen[0]) + np.abs(arr[faltan, 1] - origen[1])
+        return d.tolist()
+    ox, oy = origen
+    res = []
+    for x, y in coords:
+        d = campo[y * ancho + x]
+        res.append(d if d >= 0 else abs(x - ox) + abs(y - oy))
+    return res
+
+
+def atributos(tipo: str, distancias: Sequence[int]) -> Dict[str, List[int]]:
+    # estadisticas por tipo de contenido como expresiones sobre el arreglo
+    # de distancias; las formulas son las de mapa._generar_*
+    if HAS_NUMPY:
+        d = np.asarray(distancias, dtype=np.int64)
+        if tipo == "jefes":
+            cols = {"vida": 8 + d, "ataque": 3 + d // 3, "valor": 50 + d * 5}
+        elif tipo == "monstruos":
+            cols = {"vida": 5 + d // 2, "ataque": 1 + d // 4}
+        elif tipo == "tesoros":
+            cols = {"valor": 10 + d * 2}
+        else:
+            cols = {}
+        return {k: v.tolist() for k, v in cols.items()}
+    if tipo == "jefes":
+        return {
+            "vida": [8 + d for d in distancias],
+            "ataque": [3 + d // 3 for d in distancias],
+            "valor": [50 + d * 5 for d in distancias],
+        }
+    if tipo == "monstruos":
+        return {
+            "vida": [5 + d // 2 for d in distancias],
+            "ataque": [1 + d // 4 for d in distancias],
+        }
+    if tipo == "tesoros":
+        return {"valor": [10 + d * 2 for d in distancias]}
+    return {}
+
+
+def repartir(cantidades: Dict[str, int], total: int) -> Dict[str, Tuple[int, int]]:
+    # asigna a cada tipo un tramo [inicio, fin) de la permutacion barajada
+    # en el orden de cantidades, cortando cuando se acaban las coords
+    tramos = {}
+    inicio = 0
+    for tipo, cantidad in cantidades.items():
+        fin = min(total, inicio + cantidad)
+        tramos[tipo] = (inicio, fin)
+        inicio = fin
+    return tramos
@@ -1,26 +1,114 @@
 from __future__ import annotations
-import random
-from typing import Dict, Tuple, List, Optional
-from .room import habitacion
+from typing import Dict, Tuple, List, Optional, Set
+from .room import habitacion, DELTAS
+from array import array
 from collections import deque
 import math
+from types import MappingProxyType
 from .content import tesoro, monstruo, jefe, evento, contenido_from_dict
 from .items import objeto
+from .rng import flujos_rng
+from .rejilla import rejilla_compacta
+from . import lotes, combate
+from .rutas import servicio_rutas
+from .conectividad import union_find
+from .instrumentacion import medido
+
+# version de la generacion: subirla cuando generar_estructura o
+# colocar_contenido den otro resultado para la misma semilla (invalida la
+# cache de mapas en disco)
+VERSION_GENERADOR = 1
+
+# backends de almacenamiento de habitaciones
+BACKENDS = ("dict", "compacto")
+# distancia con la que colocar_contenido escala el poder del contenido
+ESCALAS = ("manhattan", "camino")
+
+# eventos posibles: nombre -> (descripcion, efecto)
+EVENTOS = {
+    "trampa": ("una trampa", {"tipo": "trampa", "valor": 2}),
+    "fuente": ("restaura vida", {"tipo": "curar", "valor": 2}),
+    "portal": ("teletransportador", {"tipo": "portal"}),
+}
+# efecto de solo lectura por evento, compartido por todos los eventos iguales
+_EFECTOS = {nombre: MappingProxyType(efecto) for nombre, (_, efecto) in EVENTOS.items()}
+
+# tipo de contenido -> clave en obtener_estadisticas_mapa
+CATEGORIAS = {"tesoro": "tesoros", "monstruo": "monstruos", "jefe": "jefes", "evento": "eventos"}
 
 def manhattan(a: Tuple[int, int], b: Tuple[int, int]) -> int:
     return abs(a[0] - b[0]) + abs(a[1] - b[1])
 
 class mapa:
-    def __init__(self, ancho: int, alto: int, seed: Optional[int] = None):
+    def __init__(self, ancho: int, alto: int, seed: Optional[int] = None, backend: str = "dict"):
         if ancho <= 0 or alto <= 0:
             raise ValueError("ancho y alto deben ser positivos")
+        if backend not in BACKENDS:
+            raise ValueError(f"backend desconocido: {backend}")
         self.ancho = ancho
         self.alto = alto
-        self.habitaciones: Dict[Tuple[int, int], habitacion] = {}
+        self.backend = backend
+        # con backend compacto las habitaciones viven en arreglos planos
+        # y habitaciones entrega vistas habitacion_compacta
+        self._rejilla: Optional[rejilla_compacta] = None
+        if backend == "compacto":
+            self._rejilla = rejilla_compacta(ancho, alto)
+            self._rejilla._mapa = self
+            self.habitaciones = self._rejilla
+        else:
+            self.habitaciones: Dict[Tuple[int, int], habitacion] = {}
         self.habitacion_inicial: Optional[habitacion] = None
         self._next_id = 0
-        if seed is not None:
-            random.seed(seed)
+        # flujos propios: estructura, contenido y combate
+        self.rng = flujos_rng(seed)
+        # cambia con cada conectar/desconectar; invalida caches de rutas
+        self._version_topologia = 0
+        self.rutas = servicio_rutas(self)
+        # componentes conexas mantenidas al conectar; el arreglo se reserva al
+        # generar la estructura o en la primera consulta de conectividad
+        self._conjuntos = union_find(ancho * alto, reservar=False)
+        # indice tipo de contenido -> coords y total de entradas de conexion,
+        # mantenidos por los avisos de las habitaciones; si alguna carga
+        # masiva se los salta queda sucio y se recuentan una vez
+        self._por_tipo: Dict[str, Set[Tuple[int, int]]] = {}
+        self._suma_conexiones = 0
+        self._estadisticas_sucias = False
+        # campo de distancias por camino desde el inicio: ((version, inicio), arreglo)
+        self._campo: Optional[Tuple[tuple, array]] = None
+
+    def __getstate__(self):
+        # con backend dict las habitaciones se enlazan entre si y pickle
+        # recorreria el mapa entero por recursion; se guardan planas con sus
+        # vecinos por coordenada, asi el mapa vuelve de un executor de procesos
+        estado = self.__dict__.copy()
+        if self._rejilla is None:
+            estado["habitaciones"] = [
+                (h.id, h.pos, h.inicial, h._contenido, h.visitada,
+                 {d: otra.pos for d, otra in h._conexiones.items()})
+                for h in self.habitaciones.values()
+            ]
+            if self.habitacion_inicial is not None:
+                estado["habitacion_inicial"] = self.habitacion_inicial.pos
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        if self._rejilla is not None:
+            return
+        habitaciones: Dict[Tuple[int, int], habitacion] = {}
+        for id_, pos, inicial, contenido, visitada, _ in estado["habitaciones"]:
+            hab = habitacion(id_, pos, inicial)
+            hab._contenido = contenido
+            hab.visitada = visitada
+            hab._mapa = self
+            habitaciones[hab.pos] = hab
+        for _, pos, _, _, _, conexiones in estado["habitaciones"]:
+            hab = habitaciones[pos]
+            for d, otra in conexiones.items():
+                hab._conexiones[d] = habitaciones[otra]
+        self.habitaciones = habitaciones
+        if self.habitacion_inicial is not None:
+            self.habitacion_inicial = habitaciones[self.habitacion_inicial]
 
     def _coords_en_borde(self) -> List[Tuple[int, int]]:
         bordes = []
@@ -32,6 +120,7 @@ class mapa:
             bordes.append((self.ancho - 1, y))
         return list(dict.fromkeys(bordes))
 
+    @medido("mapa.generar_estructura")
     def generar_estructura(self, n_habitaciones: int):
         # genera habitaciones conectadas usando algoritmo recursivo
         self._validar_parametros(n_habitaciones)
@@ -49,59 +138,188 @@ class mapa:
     def _inicializar_mapa(self):
         self.habitaciones.clear()
         self._next_id = 0
+        self._version_topologia += 1
+        self._conjuntos.reiniciar()
+        # el mapa queda vacio: indice y conteos empiezan de cero con cualquier backend
+        self._por_tipo = {}
+        self._suma_conexiones = 0
+        self._estadisticas_sucias = False
     
+    @medido("mapa._crear_habitacion_inicial")
     def _crear_habitacion_inicial(self):
         bordes = self._coords_en_borde()
-        coord = random.choice(bordes)
-        self.habitacion_inicial = habitacion(self._next_id, coord, inicial=True)
-        self.habitaciones[coord] = self.habitacion_inicial
-        self._next_id += 1
+        coord = self.rng.estructura.choice(bordes)
+        self.habitacion_inicial = self._nueva_habitacion(coord, inicial=True)
     
+    @medido("mapa._expandir_mapa")
     def _expandir_mapa(self, objetivo: int):
-        # usa cola para expansion por niveles
-        deltas = {"norte": (0, -1), "sur": (0, 1), "este": (1, 0), "oeste": (-1, 0)}
-        cola = [self.habitacion_inicial]
+        # frontera con eleccion aleatoria y borrado swap-remove, ambos O(1)
+        # cada entrada guarda sus vecinos candidatos calculados una sola vez
+        rng = self.rng.estructura
+        habitaciones = self.habitaciones
+        frontera = [self.habitacion_inicial]
+        candidatos = [self._vecinos_en_rango(self.habitacion_inicial.pos)]
         
-        while self._next_id < objetivo and cola:
-            actual = random.choice(cola)
-            expandio = False
+        while self._next_id < objetivo and frontera:
+            i = rng.randrange(len(frontera))
+            actual = frontera[i]
             
             # intenta agregar vecino
-            vecinos = self._obtener_vecinos_libres(actual, deltas)
+            vecinos = [c for c in candidatos[i] if c[1] not in habitaciones]
+            candidatos[i] = vecinos
             if vecinos:
-                dir_name, coord = random.choice(vecinos)
+                dir_name, coord = rng.choice(vecinos)
                 nueva = self._crear_y_conectar(actual, dir_name, coord)
-                cola.append(nueva)
-                expandio = True
+                frontera.append(nueva)
+                candidatos.append(self._vecinos_en_rango(coord))
                 
                 # conexiones extras
-                if random.random() < 0.3:
-                    self._conectar_vecinos_existentes(nueva, deltas)
-            
-            if not expandio:
-                cola.remove(actual)
+                if rng.random() < 0.3:
+                    self._conectar_vecinos_existentes(nueva)
+            else:
+                frontera[i] = frontera[-1]
+                candidatos[i] = candidatos[-1]
+                frontera.pop()
+                candidatos.pop()
     
-    def _obtener_vecinos_libres(self, hab: habitacion, deltas: dict) -> List:
-        vecinos = []
-        for dir_name, (dx, dy) in deltas.items():
-            nx, ny = hab.pos[0] + dx, hab.pos[1] + dy
-            coord = (nx, ny)
-            if self._coord_valida(coord) and coord not in self.habitaciones:
-                vecinos.append((dir_name, coord))
-        return vecinos
+    def _vecinos_en_rango(self, pos: Tuple[int, int]) -> List:
+        # desplazamientos validos de una celda, en el orden de DELTAS
+        x, y = pos
+        ancho, alto = self.ancho, self.alto
+        return [
+            (dir_name, (x + dx, y + dy))
+            for dir_name, dx, dy in DELTAS
+            if 0 <= x + dx < ancho and 0 <= y + dy < alto
+        ]
     
     def _coord_valida(self, coord: Tuple[int, int]) -> bool:
         return 0 <= coord[0] < self.ancho and 0 <= coord[1] < self.alto
     
     def _crear_y_conectar(self, origen: habitacion, direccion: str, coord: Tuple[int, int]) -> habitacion:
-        nueva = habitacion(self._next_id, coord)
-        self._next_id += 1
+        nueva = self._nueva_habitacion(coord)
         origen.conectar(direccion, nueva)
-        self.habitaciones[coord] = nueva
         return nueva
+
+    def _nueva_habitacion(self, coord: Tuple[int, int], inicial: bool = False) -> habitacion:
+        # crea y registra la habitacion en el backend activo
+        if self._rejilla is not None:
+            hab = self._rejilla.crear(self._next_id, coord, inicial)
+        else:
+            hab = habitacion(self._next_id, coord, inicial)
+            hab._mapa = self
+            self.habitaciones[coord] = hab
+        self._next_id += 1
+        return hab
+
+    def _al_conectar(self, a: Tuple[int, int], b: Tuple[int, int], nuevas: int = 2):
+        # avisado por habitacion.conectar y la rejilla compacta; nuevas es
+        # cuantas entradas de conexion se agregaron (0 si ya estaban)
+        self._version_topologia += 1
+        self._suma_conexiones += nuevas
+        if not self._conjuntos.sucio:
+            self._conjuntos.unir(self._indice(a), self._indice(b))
+
+    def _al_desconectar(self, a: Tuple[int, int], b: Tuple[int, int], quitadas: int = 2):
+        self._version_topologia += 1
+        self._suma_conexiones -= quitadas
+        self._conjuntos.sucio = True
+
+    def _al_cambiar_contenido(self, pos: Tuple[int, int], anterior, nuevo):
+        # avisado al asignar o limpiar el contenido de una habitacion
+        if self._estadisticas_sucias:
+            return
+        if anterior is not None:
+            self._por_tipo[anterior.tipo].discard(pos)
+        if nuevo is not None:
+            self._por_tipo.setdefault(nuevo.tipo, set()).add(pos)
+
+    def _indice_vigente(self) -> Dict[str, Set[Tuple[int, int]]]:
+        if self._estadisticas_sucias:
+            self._recontar_estadisticas()
+        return self._por_tipo
+
+    def habitaciones_con(self, tipo: str) -> Set[Tuple[int, int]]:
+        # coords de las habitaciones con contenido del tipo dado, sin recorrer el mapa
+        return set(self._indice_vigente().get(tipo, ()))
+
+    def mas_cercana(self, origen: Tuple[int, int], tipo: str) -> Optional[Tuple[Tuple[int, int], list]]:
+        # habitacion con contenido tipo mas cercana a origen por camino:
+        # (coord, [(direccion, coord), ...]) o None si no hay ninguna alcanzable
+        return self.rutas.mas_cercana(origen, self._indice_vigente().get(tipo, ()))
+
+    def campo_distancias(self) -> array:
+        # distancia por camino desde la habitacion inicial a cada celda,
+        # indexada por y*ancho+x; -1 si no hay habitacion o no se alcanza
+        # un solo bfs O(habitaciones), cacheado hasta que cambie la topologia
+        inicio = self.habitacion_inicial.pos if self.habitacion_inicial else None
+        clave = (self._version_topologia, inicio)
+        if self._campo is not None and self._campo[0] == clave:
+            return self._campo[1]
+        campo = array("i", [-1]) * (self.ancho * self.alto)
+        if inicio is not None and self._rejilla is not None:
+            self._bfs_rejilla(campo, self._indice(inicio))
+        elif inicio is not None and inicio in self.habitaciones:
+            ancho = self.ancho
+            vecinos = self.vecinos_conectados
+            campo[self._indice(inicio)] = 0
+            q = deque([inicio])
+            while q:
+                cur = q.popleft()
+                d = campo[cur[1] * ancho + cur[0]] + 1
+                for _, coord in vecinos(cur):
+                    i = coord[1] * ancho + coord[0]
+                    if campo[i] < 0:
+                        campo[i] = d
+                        q.append(coord)
+        self._campo = (clave, campo)
+        return campo
+
+    def _bfs_rejilla(self, campo: array, origen: int):
+        # mismo bfs leyendo las mascaras de la rejilla, sin armar coords
+        rejilla = self._rejilla
+        hidratar = getattr(rejilla, "hidratar_todo", None)
+        if hidratar is not None:
+            # el bfs alcanza todas las regiones igual
+            hidratar()
+        ancho = self.ancho
+        mascaras = rejilla.mascaras
+        campo[origen] = 0
+        q = deque([origen])
+        while q:
+            i = q.popleft()
+            m = mascaras[i]
+            d = campo[i] + 1
+            for bit, j in ((1, i - ancho), (2, i + ancho), (4, i + 1), (8, i - 1)):
+                if m & bit and campo[j] < 0:
+                    campo[j] = d
+                    q.append(j)
+
+    def distancia_camino(self, coord: Tuple[int, int]) -> Optional[int]:
+        # distancia por camino desde el inicio, o None si no se alcanza
+        if not self._coord_valida(coord):
+            return None
+        d = self.campo_distancias()[self._indice(coord)]
+        return d if d >= 0 else None
+
+    def mas_lejana(self) -> Optional[Tuple[int, int]]:
+        # habitacion alcanzable mas lejos del inicio por camino
+        campo = self.campo_distancias()
+        if not campo:
+            return None
+        d = max(campo)
+        if d < 0:
+            return None
+        y, x = divmod(campo.index(d), self.ancho)
+        return (x, y)
+
+    def vecinos_conectados(self, coord: Tuple[int, int]) -> List[Tuple[str, Tuple[int, int]]]:
+        # (direccion, coord) de las habitaciones conectadas a coord
+        if self._rejilla is not None:
+            return self._rejilla.conexiones_de(coord)
+        return [(dir_name, otra.pos) for dir_name, otra in self.habitaciones[coord].conexiones.items()]
     
-    def _conectar_vecinos_existentes(self, hab: habitacion, deltas: dict):
-        for dir_name, (dx, dy) in deltas.items():
+    def _conectar_vecinos_existentes(self, hab: habitacion):
+        for dir_name, dx, dy in DELTAS:
             coord = (hab.pos[0] + dx, hab.pos[1] + dy)
             if coord in self.habitaciones:
                 vecino = self.habitaciones[coord]
@@ -111,30 +329,40 @@ class mapa:
                     except:
                         pass
     
+    @medido("mapa._verificar_mapa")
     def _verificar_mapa(self):
+        # la conectividad ya se mantuvo al conectar, esto es O(1)
         if len(self.habitaciones) == 0:
             raise RuntimeError("no se pudieron colocar todas las habitaciones")
         if not self.es_todo_accesible():
             raise RuntimeError("mapa generado no es accesible")
 
-
-
     def es_todo_accesible(self) -> bool:
         # verifica que todas las habitaciones sean accesibles desde el inicio
+        # consulta el union-find incremental, no recorre el mapa
         if not self.habitacion_inicial:
             return False
-        
-        visitados = set([self.habitacion_inicial.pos])
-        pendientes = [self.habitacion_inicial]
-        
-        while pendientes:
-            actual = pendientes.pop()
-            for vecino in actual.conexiones.values():
-                if vecino.pos not in visitados:
-                    visitados.add(vecino.pos)
-                    pendientes.append(vecino)
-        
-        return len(visitados) == len(self.habitaciones)
+        conjuntos = self._conjuntos_vigentes()
+        return conjuntos.tamano(self._indice(self.habitacion_inicial.pos)) == len(self.habitaciones)
+
+    def conectadas(self, a: Tuple[int, int], b: Tuple[int, int]) -> bool:
+        # true si hay camino entre las habitaciones a y b
+        if a not in self.habitaciones or b not in self.habitaciones:
+            return False
+        return self._conjuntos_vigentes().conectados(self._indice(a), self._indice(b))
+
+    def _indice(self, coord: Tuple[int, int]) -> int:
+        return coord[1] * self.ancho + coord[0]
+
+    def _conjuntos_vigentes(self) -> union_find:
+        # tras una desconexion el union-find se rearma una vez desde las aristas
+        if self._conjuntos.sucio:
+            self._conjuntos.reiniciar()
+            for coord in self.habitaciones:
+                i = self._indice(coord)
+                for _, otra in self.vecinos_conectados(coord):
+                    self._conjuntos.unir(i, self._indice(otra))
+        return self._conjuntos
 
     def imprimir_ascii(self) -> str:
         # representacion ascii del mapa
@@ -152,19 +380,25 @@ class mapa:
 
     def to_dict(self) -> dict:
         # serializa el mapa a diccionario
+        if self._rejilla is not None:
+            habitaciones = self._rejilla.habitaciones_dict()
+        else:
+            habitaciones = [hab.to_dict() for hab in self.habitaciones.values()]
         return {
             "ancho": self.ancho,
             "alto": self.alto,
-            "habitaciones": [hab.to_dict() for hab in self.habitaciones.values()],
+            "habitaciones": habitaciones,
             "inicio": list(self.habitacion_inicial.pos) if self.habitacion_inicial else None
         }
 
     @staticmethod
-    def from_dict(d: dict) -> "mapa":
+    @medido("mapa.from_dict")
+    def from_dict(d: dict, backend: str = "dict") -> "mapa":
         # reconstruye mapa desde diccionario
-        m = mapa(d["ancho"], d["alto"])
+        m = mapa(d["ancho"], d["alto"], backend=backend)
         for h in d["habitaciones"]:
             hab = habitacion.from_dict(h)
+            hab._mapa = m
             m.habitaciones[tuple(hab.pos)] = hab
             m._next_id = max(m._next_id, hab.id + 1)
         for h in d["habitaciones"]:
@@ -184,19 +418,24 @@ class mapa:
     def __repr__(self):
         return f"mapa({self.ancho}x{self.alto}, habitaciones={len(self.habitaciones)})"
     
-    def colocar_contenido(self, seed: Optional[int] = None) -> dict:
+    @medido("mapa.colocar_contenido")
+    def colocar_contenido(self, seed: Optional[int] = None, escala: str = "manhattan") -> dict:
         # distribuye contenido usando generadores y comprehensions
+        # escala="camino" mide el poder con la distancia por camino desde el
+        # inicio en lugar de la manhattan
+        if escala not in ESCALAS:
+            raise ValueError(f"escala desconocida: {escala}")
         if seed is not None:
-            random.seed(seed)
+            self.rng.resembrar("contenido", seed)
 
         if len(self.habitaciones) <= 1:
             return self._stats_vacios()
         
         inicio = tuple(self.habitacion_inicial.pos)
         disponibles = [c for c in self.habitaciones.keys() if c != inicio]
-        random.shuffle(disponibles)
+        self.rng.contenido.shuffle(disponibles)
         
-        stats = self._distribuir_contenido(disponibles, inicio)
+        stats = self._distribuir_contenido(disponibles, inicio, escala)
         return stats
     
     def _stats_vacios(self) -> dict:
@@ -210,82 +449,104 @@ class mapa:
             "eventos": max(0, int(total * 0.08))
         }
     
-    def _distribuir_contenido(self, coords: List, origen: Tuple[int, int]) -> dict:
+    def _distribuir_contenido(self, coords: List, origen: Tuple[int, int], escala: str = "manhattan") -> dict:
+        # asigna tipos por tramos de la permutacion, calcula distancias y
+        # estadisticas por lotes y solo al final crea los objetos
         cantidades = self._calcular_cantidades(len(coords))
-        stats = {k: 0 for k in cantidades.keys()}
-        idx = 0
+        tramos = lotes.repartir(cantidades, len(coords))
+        usados = max(fin for _, fin in tramos.values())
+        if escala == "camino":
+            distancias = lotes.distancias_campo(coords[:usados], self.campo_distancias(), self.ancho, origen)
+        else:
+            distancias = lotes.distancias_manhattan(coords[:usados], origen)
+        stats = {tipo: fin - inicio for tipo, (inicio, fin) in tramos.items()}
         
-        # genera contenido por tipo
-        generadores = {
-            "jefes": self._generar_jefe,
-            "monstruos": self._generar_monstruo,
-            "tesoros": self._generar_tesoro,
-            "eventos": self._generar_evento
-        }
-        
-        for tipo, cantidad in cantidades.items():
-            for _ in range(cantidad):
-                if idx >= len(coords):
-                    break
-                coord = coords[idx]
-                distancia = manhattan(coord, origen)
-                contenido = generadores[tipo](distancia)
-                self.habitaciones[coord].contenido = contenido
-                stats[tipo] += 1
-                idx += 1
+        habitaciones = self.habitaciones
+        for tipo, (inicio, fin) in tramos.items():
+            dist = distancias[inicio:fin]
+            contenidos = self._materializar(tipo, dist, lotes.atributos(tipo, dist))
+            for coord, contenido in zip(coords[inicio:fin], contenidos):
+                habitaciones[coord].contenido = contenido
         
         return stats
     
-    def _generar_jefe(self, dist: int) -> jefe:
-        return jefe(
-            f"jefe nivel {dist}",
-            vida=8 + dist,
-            ataque=3 + dist // 3,
-            recompensa_especial=objeto(f"tesoro jefe", valor=50 + dist * 5, 
-                                      descripcion="recompensa de jefe")
-        )
-    
-    def _generar_monstruo(self, dist: int) -> monstruo:
-        return monstruo(
-            f"monstruo nivel {dist}",
-            vida=5 + dist // 2,
-            ataque=1 + dist // 4
-        )
+    def _materializar(self, tipo: str, dist: List[int], cols: Dict[str, List[int]]) -> List:
+        # crea los objetos de contenido de un tramo a partir de sus columnas
+        if tipo == "jefes":
+            return [
+                jefe(f"jefe nivel {d}", vida=v, ataque=a,
+                     recompensa_especial=objeto.compartido("tesoro jefe", valor=val,
+                                                           descripcion="recompensa de jefe"))
+                for d, v, a, val in zip(dist, cols["vida"], cols["ataque"], cols["valor"])
+            ]
+        if tipo == "monstruos":
+            return [
+                monstruo(f"monstruo nivel {d}", vida=v, ataque=a)
+                for d, v, a in zip(dist, cols["vida"], cols["ataque"])
+            ]
+        if tipo == "tesoros":
+            return [self._nuevo_tesoro(d, val) for d, val in zip(dist, cols["valor"])]
+        # los eventos se sortean uno a uno, en el mismo orden de siempre
+        return [self._generar_evento(d) for d in dist]
     
-    def _generar_tesoro(self, dist: int) -> tesoro:
-        obj = objeto(f"gema nivel {dist}", valor=10 + dist * 2, descripcion="tesoro")
+    def _nuevo_tesoro(self, dist: int, valor: int) -> tesoro:
+        # cada habitacion tiene su tesoro; solo el objeto (inmutable) se comparte
+        obj = objeto.compartido(f"gema nivel {dist}", valor=valor, descripcion="tesoro")
         return tesoro(obj)
     
     def _generar_evento(self, dist: int) -> evento:
-        tipos = {
-            "trampa": lambda: evento("trampa", "una trampa", {"tipo": "trampa", "valor": 2}),
-            "fuente": lambda: evento("fuente", "restaura vida", {"tipo": "curar", "valor": 2}),
-            "portal": lambda: evento("portal", "teletransportador", {"tipo": "portal"})
-        }
-        tipo = random.choice(list(tipos.keys()))
-        return tipos[tipo]()
+        nombre = self.rng.contenido.choice(list(EVENTOS.keys()))
+        descripcion = EVENTOS[nombre][0]
+        return evento(nombre, descripcion, _EFECTOS[nombre])
+
     def obtener_estadisticas_mapa(self) -> dict:
         # retorna estadisticas del mapa: total habitaciones, tipos de contenido
-        # y promedio de conexiones
+        # y promedio de conexiones; O(1) salvo el recuento tras una carga masiva
+        por_tipo = self._indice_vigente()
         total = len(self.habitaciones)
-        conteos = {"vacios": 0, "tesoros": 0, "monstruos": 0, "jefes": 0, "eventos": 0}
+        conteos = {clave: len(por_tipo.get(tipo, ())) for tipo, clave in CATEGORIAS.items()}
+        conteos = {"vacios": total - sum(conteos.values()), **conteos}
+        promedio = (self._suma_conexiones / total) if total > 0 else 0.0
+        resumen = {"Total de habitaciones": total, **conteos, "promedio_conexiones": round(promedio, 2)}
+        return resumen
+
+    def _recontar_estadisticas(self):
+        por_tipo: Dict[str, Set[Tuple[int, int]]] = {}
         suma_conex = 0
-        for hab in self.habitaciones.values():
+        for coord, hab in self.habitaciones.items():
             suma_conex += len(hab.conexiones)
-            if hab.contenido is None:
-                conteos["vacios"] += 1
-            else:
-                t = getattr(hab.contenido, "tipo", None)
-                if t == "tesoro":
-                    conteos["tesoros"] += 1
-                elif t == "monstruo":
-                    conteos["monstruos"] += 1
-                elif t == "jefe":
-                    conteos["jefes"] += 1
-                elif t == "evento":
-                    conteos["eventos"] += 1
-                else:
-                    conteos["vacios"] += 1
-        promedio = (suma_conex / total) if total > 0 else 0.0
-        resumen = {"Total de habitaciones": total, **conteos, "promedio_conexiones": round(promedio, 2)}
-        return resumen
\ No newline at end of file
+            c = hab.contenido
+            if c is not None:
+                por_tipo.setdefault(c.tipo, set()).add(coord)
+        self._por_tipo = por_tipo
+        self._suma_conexiones = suma_conex
+        self._estadisticas_sucias = False
+
+    def evaluar_dificultad(self, vida_jugador: int = 5) -> dict:
+        # puntua la dificultad con las probabilidades exactas de cada combate
+        # (combate.analizar), sin simular peleas; cada pelea se evalua aislada
+        # partiendo de vida_jugador pv
+        combates = 0
+        suma_prob = 0.0
+        minima = 1.0
+        perdida = 0.0
+        prob_jefe = None
+        for hab in self.habitaciones.values():
+            c = hab.contenido
+            tipo = getattr(c, "tipo", None)
+            if tipo not in ("monstruo", "jefe"):
+                continue
+            a = combate.analizar(vida_jugador, c.vida, c.ataque, tipo)
+            combates += 1
+            suma_prob += a.prob_victoria
+            minima = min(minima, a.prob_victoria)
+            perdida += a.perdida_esperada
+            if tipo == "jefe":
+                prob_jefe = a.prob_victoria
+        return {
+            "combates": combates,
+            "prob_victoria_media": round(suma_prob / combates, 4) if combates else 1.0,
+            "prob_victoria_minima": round(minima, 4),
+            "prob_victoria_jefe": round(prob_jefe, 4) if prob_jefe is not None else None,
+            "perdida_esperada_total": round(perdida, 2),
+        }
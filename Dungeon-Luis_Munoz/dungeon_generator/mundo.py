@@ -0,0 +1,226 @@
+from __future__ import annotations
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from .room import habitacion, DELTAS
+from .mapa import mapa
+from .content import contenido_from_dict
+from .rng import flujos_rng, derivar_semilla
+from .rutas import servicio_rutas
+
+# mundo abierto sin limites dividido en chunks de tam_chunk x tam_chunk
+# cada chunk se genera con un mapa local sembrado con (seed, cx, cy), asi el
+# mismo chunk sale igual cada vez que se vuelve a generar
+# dos chunks vecinos comparten una puerta en su borde: la celda de cada lado
+# sale de un hash del borde, los dos chunks la calculan igual y siempre
+# tienen habitacion ahi; al cargar un chunk se conectan sus puertas con las
+# de los vecinos ya cargados
+# se mantiene cargado el anillo de radio chunks alrededor del explorador y
+# el resto se descarta por lru cuando se pasa de max_chunks; con directorio
+# el chunk descartado se escribe a disco y se recupera tal cual, sin
+# directorio se pierde y se vuelve a generar desde cero
+
+Coord = Tuple[int, int]
+
+# direccion -> (dx, dy) en chunks
+_PASOS = {dir_name: (dx, dy) for dir_name, dx, dy in DELTAS}
+
+
+class mundo_abierto:
+    def __init__(self, seed: Optional[int] = None, tam_chunk: int = 16, densidad: float = 0.5,
+                 radio: int = 1, max_chunks: int = 25, directorio: Optional[str] = None):
+        if tam_chunk < 2:
+            raise ValueError("tam_chunk debe ser >= 2")
+        if not 0 < densidad <= 1:
+            raise ValueError("densidad debe estar entre 0 y 1")
+        if radio < 1:
+            # con radio 0 las puertas del chunk actual no tendrian a donde llevar
+            raise ValueError("radio debe ser >= 1")
+        self.tam_chunk = int(tam_chunk)
+        self.densidad = float(densidad)
+        self.radio = int(radio)
+        # el anillo cargado siempre entra en el presupuesto
+        self.max_chunks = max(int(max_chunks), (2 * self.radio + 1) ** 2)
+        self.directorio = Path(directorio) if directorio else None
+        if self.directorio is not None:
+            self.directorio.mkdir(parents=True, exist_ok=True)
+        self.rng = flujos_rng(seed)
+        # solo las habitaciones de los chunks cargados, en coordenadas globales
+        self.habitaciones: Dict[Coord, habitacion] = {}
+        self._chunks: "OrderedDict[Coord, List[Coord]]" = OrderedDict()
+        self._version_topologia = 0
+        self.rutas = servicio_rutas(self)
+        self.generados = 0
+        self.descartados = 0
+        # la habitacion inicial es la puerta este del chunk (0, 0); se vuelve a
+        # buscar cada vez que ese chunk se carga
+        self._inicio = self._coord_global((0, 0), self._puertas(0, 0)["este"])
+        self.habitacion_inicial: Optional[habitacion] = None
+        self.al_mover((0, 0))
+
+    def chunk_de(self, pos: Coord) -> Coord:
+        return (pos[0] // self.tam_chunk, pos[1] // self.tam_chunk)
+
+    def _coord_global(self, chunk: Coord, local: Coord) -> Coord:
+        return (chunk[0] * self.tam_chunk + local[0], chunk[1] * self.tam_chunk + local[1])
+
+    def _desfase_puerta(self, borde: str, cx: int, cy: int) -> int:
+        return derivar_semilla(self.rng.seed, f"puerta:{borde}:{cx}:{cy}") % self.tam_chunk
+
+    def _puertas(self, cx: int, cy: int) -> Dict[str, Coord]:
+        # celda local de la puerta de cada lado; "v" es el borde entre
+        # (cx, cy) y (cx+1, cy), "h" el borde entre (cx, cy) y (cx, cy+1)
+        t = self.tam_chunk - 1
+        return {
+            "este": (t, self._desfase_puerta("v", cx, cy)),
+            "oeste": (0, self._desfase_puerta("v", cx - 1, cy)),
+            "sur": (self._desfase_puerta("h", cx, cy), t),
+            "norte": (self._desfase_puerta("h", cx, cy - 1), 0),
+        }
+
+    def al_mover(self, pos: Coord):
+        # lo llama explorador.mover: asegura el anillo alrededor de pos y
+        # descarta los chunks mas viejos fuera del anillo
+        cx, cy = self.chunk_de(pos)
+        anillo = [
+            (cx + dx, cy + dy)
+            for dy in range(-self.radio, self.radio + 1)
+            for dx in range(-self.radio, self.radio + 1)
+        ]
+        for c in anillo:
+            if c in self._chunks:
+                self._chunks.move_to_end(c)
+            else:
+                self._cargar_chunk(c)
+        protegidos = set(anillo)
+        if len(self._chunks) > self.max_chunks:
+            for c in [c for c in self._chunks if c not in protegidos]:
+                if len(self._chunks) <= self.max_chunks:
+                    break
+                self._descartar_chunk(c)
+
+    def _ruta_chunk(self, chunk: Coord) -> Optional[Path]:
+        if self.directorio is None:
+            return None
+        return self.directorio / f"chunk_{chunk[0]}_{chunk[1]}.json"
+
+    def _cargar_chunk(self, chunk: Coord):
+        ruta = self._ruta_chunk(chunk)
+        if ruta is not None and ruta.exists():
+            habs = self._leer_chunk(ruta)
+        else:
+            habs = self._generar_chunk(chunk)
+            self.generados += 1
+        for hab in habs:
+            self.habitaciones[hab.pos] = hab
+        self._chunks[chunk] = [hab.pos for hab in habs]
+        if chunk == (0, 0):
+            # regenerado sin directorio el chunk no trae la marca de inicial
+            self.habitacion_inicial = self.habitaciones[self._inicio]
+            self.habitacion_inicial.inicial = True
+        # une las puertas con los chunks vecinos que ya estan cargados
+        for dir_name, local in self._puertas(*chunk).items():
+            dx, dy = _PASOS[dir_name]
+            if (chunk[0] + dx, chunk[1] + dy) not in self._chunks:
+                continue
+            x, y = self._coord_global(chunk, local)
+            hab = self.habitaciones[(x, y)]
+            otra = self.habitaciones[(x + dx, y + dy)]
+            if dir_name not in hab.conexiones:
+                hab.conectar(dir_name, otra)
+        self._version_topologia += 1
+
+    def _generar_chunk(self, chunk: Coord) -> List[habitacion]:
+        # genera el chunk con un mapa local que arranca en una puerta, crece
+        # como cualquier mapa y abre pasillos hasta las puertas que falten
+        t = self.tam_chunk
+        local = mapa(t, t, seed=derivar_semilla(self.rng.seed, f"chunk:{chunk[0]}:{chunk[1]}"))
+        puertas = list(dict.fromkeys(self._puertas(*chunk).values()))
+        local._inicializar_mapa()
+        local.habitacion_inicial = local._nueva_habitacion(puertas[0])
+        local._expandir_mapa(max(len(puertas), int(t * t * self.densidad)))
+        for coord in puertas[1:]:
+            self._abrir_pasillo(local, coord)
+        local._verificar_mapa()
+        local.colocar_contenido()
+
+        # pasa las habitaciones a coordenadas globales y las suelta del mapa local
+        habs = list(local.habitaciones.values())
+        for hab in habs:
+            hab._mapa = None
+            hab.pos = self._coord_global(chunk, hab.pos)
+        return habs
+
+    @staticmethod
+    def _abrir_pasillo(local: mapa, coord: Coord):
+        # camina desde coord hacia la habitacion inicial del mapa local creando
+        # habitaciones hasta tocar una existente
+        if coord in local.habitaciones:
+            return
+        rng = local.rng.estructura
+        destino = local.habitacion_inicial.pos
+        actual = local._nueva_habitacion(coord)
+        while True:
+            x, y = actual.pos
+            pasos = []
+            if x != destino[0]:
+                pasos.append(("este", (x + 1, y)) if destino[0] > x else ("oeste", (x - 1, y)))
+            if y != destino[1]:
+                pasos.append(("sur", (x, y + 1)) if destino[1] > y else ("norte", (x, y - 1)))
+            dir_name, siguiente = rng.choice(pasos)
+            otra = local.habitaciones.get(siguiente)
+            if otra is not None:
+                actual.conectar(dir_name, otra)
+                return
+            actual = local._crear_y_conectar(actual, dir_name, siguiente)
+
+    def _descartar_chunk(self, chunk: Coord):
+        coords = self._chunks.pop(chunk)
+        habs = [self.habitaciones.pop(c) for c in coords]
+        # corta las puertas hacia otros chunks antes de guardar
+        for hab in habs:
+            for dir_name, otra in list(hab.conexiones.items()):
+                if self.chunk_de(otra.pos) != chunk:
+                    hab.desconectar(dir_name)
+        ruta = self._ruta_chunk(chunk)
+        if ruta is not None:
+            self._escribir_chunk(ruta, habs)
+        self.descartados += 1
+        self._version_topologia += 1
+
+    @staticmethod
+    def _escribir_chunk(ruta: Path, habs: List[habitacion]):
+        temporal = ruta.with_suffix(".tmp")
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump([hab.to_dict() for hab in habs], f, separators=(",", ":"))
+        os.replace(temporal, ruta)
+
+    @staticmethod
+    def _leer_chunk(ruta: Path) -> List[habitacion]:
+        with open(ruta, encoding="utf-8") as f:
+            datos = json.load(f)
+        habs = {}
+        for h in datos:
+            hab = habitacion.from_dict(h)
+            cont = h.get("contenido")
+            hab.contenido = contenido_from_dict(cont) if cont is not None else None
+            habs[hab.pos] = hab
+        for h in datos:
+            hab = habs[tuple(h["pos"])]
+            for dir_name, otra in h.get("conexiones", {}).items():
+                otra = habs.get(tuple(otra))
+                if otra is not None and dir_name not in hab.conexiones:
+                    hab.conectar(dir_name, otra)
+        return list(habs.values())
+
+    def vecinos_conectados(self, coord: Coord) -> List[Tuple[str, Coord]]:
+        return [(dir_name, otra.pos) for dir_name, otra in self.habitaciones[coord].conexiones.items()]
+
+    def chunks_cargados(self) -> List[Coord]:
+        return list(self._chunks)
+
+    def __repr__(self):
+        return (f"mundo_abierto(chunk={self.tam_chunk}, cargados={len(self._chunks)}, "
+                f"habitaciones={len(self.habitaciones)})")
@@ -0,0 +1,245 @@
+from __future__ import annotations
+import copy
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from .room import habitacion
+from .mapa import mapa, CATEGORIAS
+from .content import contenido_habitacion, monstruo
+from .rng import flujos_rng
+
+# plantillas copy-on-write: una plantilla guarda un mapa generado (estructura
+# y contenido inicial) que no se vuelve a modificar y la comparten muchas
+# sesiones; cada mapa_sesion solo guarda lo que su jugador cambio (visitadas,
+# contenido consumido, monstruos heridos) y el resto lo lee de la plantilla
+#
+#   p = plantilla.generar(40, 40, 600, seed=7)
+#   m = p.sesion(seed=1)
+#   exp = explorador(m)
+#
+# la memoria de cada sesion crece con sus cambios, no con el tamano del mapa
+
+Coord = Tuple[int, int]
+
+
+class plantilla:
+    def __init__(self, base: mapa):
+        # base pasa a ser de la plantilla: no se debe modificar despues
+        if base.habitacion_inicial is None:
+            raise ValueError("la plantilla necesita un mapa con habitacion inicial")
+        self.base = base
+        self.sesiones = 0
+
+    @staticmethod
+    def generar(ancho: int, alto: int, n_habitaciones: int, seed: Optional[int] = None,
+                escala: str = "manhattan") -> "plantilla":
+        m = mapa(ancho, alto, seed=seed)
+        m.generar_estructura(n_habitaciones)
+        m.colocar_contenido(escala=escala)
+        return plantilla(m)
+
+    def sesion(self, seed: Optional[int] = None) -> "mapa_sesion":
+        self.sesiones += 1
+        return mapa_sesion(self, seed)
+
+    def __repr__(self):
+        return f"plantilla({self.base.ancho}x{self.base.alto}, habitaciones={len(self.base.habitaciones)})"
+
+
+class habitacion_sesion(habitacion):
+    # vista de una habitacion de la plantilla vista desde una sesion; como
+    # habitacion_compacta no guarda estado propio y se crea al vuelo
+    __slots__ = ("_sesion", "_base")
+
+    def __init__(self, sesion: "mapa_sesion", base: habitacion):
+        self._sesion = sesion
+        self._base = base
+
+    @property
+    def id(self) -> int:
+        return self._base.id
+
+    @property
+    def pos(self) -> Coord:
+        return self._base.pos
+
+    @property
+    def inicial(self) -> bool:
+        return self._base.inicial
+
+    @property
+    def visitada(self) -> bool:
+        return self._base.pos in self._sesion.visitadas or self._base.visitada
+
+    @visitada.setter
+    def visitada(self, valor: bool):
+        if valor:
+            self._sesion.visitadas.add(self._base.pos)
+        else:
+            self._sesion.visitadas.discard(self._base.pos)
+
+    @property
+    def contenido(self) -> Optional[contenido_habitacion]:
+        contenidos = self._sesion.contenidos
+        pos = self._base.pos
+        if pos in contenidos:
+            return contenidos[pos]
+        return self._base.contenido
+
+    @contenido.setter
+    def contenido(self, valor: Optional[contenido_habitacion]):
+        self._sesion.contenidos[self._base.pos] = valor
+
+    def contenido_propio(self) -> Optional[contenido_habitacion]:
+        # copia del contenido para modificarlo en esta sesion; los monstruos
+        # cambian al pelear, tesoros y eventos solo se consumen
+        contenidos = self._sesion.contenidos
+        pos = self._base.pos
+        if pos in contenidos:
+            return contenidos[pos]
+        c = self._base.contenido
+        if isinstance(c, monstruo):
+            c = copy.copy(c)
+            contenidos[pos] = c
+        return c
+
+    @property
+    def _conexiones(self) -> Dict[str, "habitacion_sesion"]:
+        vista = self._sesion._vista
+        return {dir_name: vista(otra) for dir_name, otra in self._base._conexiones.items()}
+
+    def conectar(self, direccion: str, otra: habitacion):
+        raise RuntimeError("la estructura de una plantilla no se modifica")
+
+    def desconectar(self, direccion: str):
+        raise RuntimeError("la estructura de una plantilla no se modifica")
+
+    def __eq__(self, otra):
+        if isinstance(otra, habitacion_sesion):
+            return self._sesion is otra._sesion and self._base == otra._base
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((id(self._sesion), hash(self._base)))
+
+
+class habitaciones_sesion(Mapping):
+    # coord -> habitacion_sesion sobre las habitaciones de la plantilla
+
+    def __init__(self, sesion: "mapa_sesion"):
+        self._sesion = sesion
+        self._base = sesion.plantilla.base.habitaciones
+
+    def __getitem__(self, coord: Coord) -> habitacion_sesion:
+        return habitacion_sesion(self._sesion, self._base[coord])
+
+    def get(self, coord, default=None):
+        hab = self._base.get(coord)
+        return habitacion_sesion(self._sesion, hab) if hab is not None else default
+
+    def __contains__(self, coord) -> bool:
+        return coord in self._base
+
+    def __iter__(self) -> Iterator[Coord]:
+        return iter(self._base)
+
+    def __len__(self) -> int:
+        return len(self._base)
+
+
+class mapa_sesion:
+    # la api de lectura de mapa sobre una plantilla compartida: sirve para
+    # explorador, guardar_partida, el diario y las politicas de simulacion
+    # la estructura no cambia: rutas y vecinos se leen de la plantilla
+
+    def __init__(self, p: plantilla, seed: Optional[int] = None):
+        self.plantilla = p
+        base = p.base
+        self.ancho = base.ancho
+        self.alto = base.alto
+        # solo lo que cambio esta sesion
+        self.visitadas: Set[Coord] = set()
+        self.contenidos: Dict[Coord, Optional[contenido_habitacion]] = {}
+        # combate propio de la sesion
+        self.rng = flujos_rng(seed)
+        self.habitaciones = habitaciones_sesion(self)
+        self.habitacion_inicial = self.habitaciones[base.habitacion_inicial.pos]
+        self.rutas = base.rutas
+
+    def _vista(self, hab: habitacion) -> habitacion_sesion:
+        return habitacion_sesion(self, hab)
+
+    @property
+    def _next_id(self) -> int:
+        return self.plantilla.base._next_id
+
+    @property
+    def _version_topologia(self) -> int:
+        return self.plantilla.base._version_topologia
+
+    # topologia: la misma de la plantilla
+
+    def vecinos_conectados(self, coord: Coord) -> List[Tuple[str, Coord]]:
+        return self.plantilla.base.vecinos_conectados(coord)
+
+    def campo_distancias(self):
+        return self.plantilla.base.campo_distancias()
+
+    def distancia_camino(self, coord: Coord) -> Optional[int]:
+        return self.plantilla.base.distancia_camino(coord)
+
+    def mas_lejana(self) -> Optional[Coord]:
+        return self.plantilla.base.mas_lejana()
+
+    def es_todo_accesible(self) -> bool:
+        return self.plantilla.base.es_todo_accesible()
+
+    def conectadas(self, a: Coord, b: Coord) -> bool:
+        return self.plantilla.base.conectadas(a, b)
+
+    def imprimir_ascii(self) -> str:
+        return self.plantilla.base.imprimir_ascii()
+
+    # contenido: el indice de la plantilla corregido con los cambios de la
+    # sesion, O(habitaciones del tipo + cambios)
+
+    def habitaciones_con(self, tipo: str) -> Set[Coord]:
+        coords = self.plantilla.base.habitaciones_con(tipo)
+        for coord, c in self.contenidos.items():
+            if getattr(c, "tipo", None) == tipo:
+                coords.add(coord)
+            else:
+                coords.discard(coord)
+        return coords
+
+    def mas_cercana(self, origen: Coord, tipo: str) -> Optional[Tuple[Coord, list]]:
+        return self.rutas.mas_cercana(origen, self.habitaciones_con(tipo))
+
+    def obtener_estadisticas_mapa(self) -> dict:
+        base = self.plantilla.base
+        resumen = base.obtener_estadisticas_mapa()
+        for coord, c in self.contenidos.items():
+            antes = base.habitaciones[coord].contenido
+            resumen[CATEGORIAS.get(getattr(antes, "tipo", None), "vacios")] -= 1
+            resumen[CATEGORIAS.get(getattr(c, "tipo", None), "vacios")] += 1
+        return resumen
+
+    def evaluar_dificultad(self, vida_jugador: int = 5) -> dict:
+        # solo lee habitaciones y contenido, que la sesion ya resuelve
+        return mapa.evaluar_dificultad(self, vida_jugador)
+
+    def cambios(self) -> int:
+        # entradas guardadas por la sesion
+        return len(self.visitadas) + len(self.contenidos)
+
+    def to_dict(self) -> dict:
+        # mismo formato que mapa.to_dict, asi guardar_partida funciona igual
+        base = self.plantilla.base
+        return {
+            "ancho": self.ancho,
+            "alto": self.alto,
+            "habitaciones": [hab.to_dict() for hab in self.habitaciones.values()],
+            "inicio": list(base.habitacion_inicial.pos),
+        }
+
+    def __repr__(self):
+        return f"mapa_sesion({self.ancho}x{self.alto}, cambios={self.cambios()})"
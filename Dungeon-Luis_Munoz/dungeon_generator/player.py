@@ -1,14 +1,17 @@
 from __future__ import annotations
 from typing import Tuple, List, Optional, Dict
-from collections import deque
 from .mapa import mapa
 from .room import habitacion
 from .content import tesoro, monstruo, jefe, evento
-import random
+from .rng import flujos_rng
+from .instrumentacion import medido
 
 class explorador:
-    def __init__(self, m: mapa, posicion: Optional[Tuple[int,int]] = None, vida: int = 5, ataque_base: int = 1):
+    def __init__(self, m: mapa, posicion: Optional[Tuple[int,int]] = None, vida: int = 5, ataque_base: int = 1,
+                 seed: Optional[int] = None):
         self.mapa = m
+        # sin seed usa el flujo de combate del mapa, asi una semilla reproduce toda la partida
+        self.rng = m.rng.combate if seed is None else flujos_rng(seed).combate
         if posicion is None:
             inicial = m.habitacion_inicial
             if inicial is None:
@@ -101,6 +104,10 @@ class explorador:
         otra = hab.conexiones[direccion]
         self.posicion_actual = tuple(otra.pos)
         otra.visitada = True
+        # mapas que cargan por partes (mundo_abierto) preparan lo que rodea la nueva posicion
+        al_mover = getattr(self.mapa, "al_mover", None)
+        if al_mover is not None:
+            al_mover(self.posicion_actual)
         
         # actualiza duracion de buffs temporales
         nuevos = []
@@ -111,8 +118,9 @@ class explorador:
         self.buffs = nuevos
         return True
 
-    def explorar_habitacion(self) -> str:
+    def explorar_habitacion(self, narrar: bool = True) -> str:
         # explora la habitacion actual e interactua con su contenido
+        # narrar=False evita armar el registro de combate turno a turno
         hab = self.mapa.habitaciones.get(tuple(self.posicion_actual))
         if not hab:
             return "no hay habitacion en tu posicion"
@@ -123,7 +131,12 @@ class explorador:
             return "la habitacion esta vacia"
         
         contenido = hab.contenido
-        resultado = contenido.interactuar(self)
+        # las habitaciones de una sesion sobre plantilla dan su propia copia
+        # antes de que el combate la modifique
+        propio = getattr(hab, "contenido_propio", None)
+        if propio is not None:
+            contenido = propio()
+        resultado = contenido.interactuar(self, narrar=narrar)
         
         # limpia contenido si fue usado
         if isinstance(contenido, (tesoro, evento)):
@@ -135,30 +148,10 @@ class explorador:
         hab.visitada = True
         return resultado
 
+    @medido("explorador.encontrar_camino")
     def encontrar_camino(self, destino: Tuple[int,int]) -> list:
-        start = tuple(self.posicion_actual)
-        if start == destino:
-            return []
-        q = deque([start])
-        prev = {start: None}
-        while q:
-            cur = q.popleft()
-            hab = self.mapa.habitaciones[cur]
-            for dir_name, otra in hab.conexiones.items():
-                coord = tuple(otra.pos)
-                if coord not in prev:
-                    prev[coord] = (cur, dir_name)
-                    if coord == destino:
-                        path = []
-                        node = coord
-                        while prev[node] is not None:
-                            pcoord, pdirection = prev[node]
-                            path.append((pdirection, node))
-                            node = pcoord
-                        path.reverse()
-                        return path
-                    q.append(coord)
-        return []
+        # camino mas corto usando los arboles bfs cacheados del mapa
+        return self.mapa.rutas.camino(tuple(self.posicion_actual), tuple(destino))
 
     def mover_hasta(self, destino: Tuple[int,int]) -> bool:
         # mueve el explorador hasta el destino explorando en el camino
@@ -0,0 +1,278 @@
+from __future__ import annotations
+from array import array
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, List, Optional, Tuple
+from .room import habitacion, DELTAS
+from .content import contenido_habitacion
+
+# bit de cada direccion en la mascara de conexiones, en el orden de DELTAS
+BITS = {"norte": 1, "sur": 2, "este": 4, "oeste": 8}
+OPUESTO = {1: 2, 2: 1, 4: 8, 8: 4}
+
+# flags por celda
+VISITADA = 1
+INICIAL = 2
+
+
+class habitacion_compacta(habitacion):
+    # vista ligera sobre una celda de la rejilla; no guarda estado propio
+    # se crea al vuelo, por eso la igualdad compara rejilla e indice
+    __slots__ = ("_rejilla", "_idx")
+
+    def __init__(self, rejilla: "rejilla_compacta", idx: int):
+        self._rejilla = rejilla
+        self._idx = idx
+
+    @property
+    def id(self) -> int:
+        return self._rejilla.ids[self._idx]
+
+    @property
+    def pos(self) -> Tuple[int, int]:
+        return divmod(self._idx, self._rejilla.ancho)[::-1]
+
+    @property
+    def inicial(self) -> bool:
+        return bool(self._rejilla.flags[self._idx] & INICIAL)
+
+    @inicial.setter
+    def inicial(self, valor: bool):
+        self._rejilla._poner_flag(self._idx, INICIAL, valor)
+
+    @property
+    def visitada(self) -> bool:
+        return bool(self._rejilla.flags[self._idx] & VISITADA)
+
+    @visitada.setter
+    def visitada(self, valor: bool):
+        self._rejilla._poner_flag(self._idx, VISITADA, valor)
+
+    @property
+    def contenido(self) -> Optional[contenido_habitacion]:
+        return self._rejilla.contenidos.get(self._idx)
+
+    @contenido.setter
+    def contenido(self, valor: Optional[contenido_habitacion]):
+        r = self._rejilla
+        if valor is None:
+            anterior = r.contenidos.pop(self._idx, None)
+        else:
+            anterior = r.contenidos.get(self._idx)
+            r.contenidos[self._idx] = valor
+        if r._mapa is not None and anterior is not valor:
+            r._mapa._al_cambiar_contenido(r.coord(self._idx), anterior, valor)
+
+    @property
+    def _conexiones(self) -> Dict[str, "habitacion_compacta"]:
+        r = self._rejilla
+        mascara = r.mascaras[self._idx]
+        if not mascara:
+            return {}
+        return {
+            dir_name: r._vista(r.vecino(self._idx, bit))
+            for dir_name, bit in BITS.items()
+            if mascara & bit
+        }
+
+    def conectar(self, direccion: str, otra: "habitacion"):
+        # conecta dos celdas adyacentes de la misma rejilla
+        if direccion not in self.DIRECCIONES:
+            raise ValueError(f"direccion invalida: {direccion}")
+        otro_idx = self._rejilla.indice(otra.pos)
+        self._rejilla.conectar(self._idx, BITS[direccion], otro_idx)
+
+    def desconectar(self, direccion: str):
+        if direccion in BITS:
+            self._rejilla.desconectar(self._idx, BITS[direccion])
+
+    def vecinos_disponibles(self) -> List[str]:
+        mascara = self._rejilla.mascaras[self._idx]
+        return [dir_name for dir_name, bit in BITS.items() if mascara & bit]
+
+    def __eq__(self, otra):
+        if isinstance(otra, habitacion_compacta):
+            return self._rejilla is otra._rejilla and self._idx == otra._idx
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((id(self._rejilla), self._idx))
+
+    def __reduce__(self):
+        # la vista se rearma sobre su rejilla, sin recorrer los vecinos
+        return (habitacion_compacta, (self._rejilla, self._idx))
+
+
+class rejilla_compacta(MutableMapping):
+    # almacen de habitaciones en arreglos planos indexados por y*ancho+x
+    # ids: id de la habitacion o -1, mascaras: 4 bits de conexiones,
+    # flags: visitada/inicial, contenidos: solo celdas con contenido
+
+    def __init__(self, ancho: int, alto: int):
+        self.ancho = ancho
+        self.alto = alto
+        self.ids, self.mascaras, self.flags = self._arreglos()
+        self.contenidos: Dict[int, contenido_habitacion] = {}
+        # indices en orden de creacion, para iterar igual que el backend dict
+        self.orden = array("i")
+        # mapa dueno, se avisa cuando cambia la topologia
+        self._mapa = None
+
+    def _arreglos(self):
+        # ids, mascaras y flags vacios de toda la rejilla
+        total = self.ancho * self.alto
+        return array("i", [-1]) * total, bytearray(total), bytearray(total)
+
+    def indice(self, coord: Tuple[int, int]) -> int:
+        x, y = coord
+        if not (0 <= x < self.ancho and 0 <= y < self.alto):
+            raise KeyError(coord)
+        return y * self.ancho + x
+
+    def coord(self, idx: int) -> Tuple[int, int]:
+        y, x = divmod(idx, self.ancho)
+        return (x, y)
+
+    def vecino(self, idx: int, bit: int) -> int:
+        if bit == 1:
+            return idx - self.ancho
+        if bit == 2:
+            return idx + self.ancho
+        if bit == 4:
+            return idx + 1
+        return idx - 1
+
+    def _vista(self, idx: int) -> habitacion_compacta:
+        return habitacion_compacta(self, idx)
+
+    def _poner_flag(self, idx: int, flag: int, valor: bool):
+        if valor:
+            self.flags[idx] |= flag
+        else:
+            self.flags[idx] &= ~flag & 0xFF
+
+    def crear(self, id: int, coord: Tuple[int, int], inicial: bool = False) -> habitacion_compacta:
+        # registra una habitacion nueva en la celda y retorna su vista
+        idx = self.indice(coord)
+        if self.ids[idx] < 0:
+            self.orden.append(idx)
+        else:
+            # se reemplaza una habitacion: se sueltan sus conexiones y contenido
+            for bit in (1, 2, 4, 8):
+                self.desconectar(idx, bit)
+            self._quitar_contenido(idx)
+        self.ids[idx] = id
+        self.flags[idx] = INICIAL if inicial else 0
+        return self._vista(idx)
+
+    def _quitar_contenido(self, idx: int):
+        anterior = self.contenidos.pop(idx, None)
+        if anterior is not None and self._mapa is not None:
+            self._mapa._al_cambiar_contenido(self.coord(idx), anterior, None)
+
+    def conectar(self, idx: int, bit: int, otro_idx: int):
+        if otro_idx != self.vecino(idx, bit) or self.ids[otro_idx] < 0:
+            raise ValueError("solo se pueden conectar celdas adyacentes de la rejilla")
+        nuevas = (not self.mascaras[idx] & bit) + (not self.mascaras[otro_idx] & OPUESTO[bit])
+        self.mascaras[idx] |= bit
+        self.mascaras[otro_idx] |= OPUESTO[bit]
+        if self._mapa is not None:
+            self._mapa._al_conectar(self.coord(idx), self.coord(otro_idx), nuevas)
+
+    def desconectar(self, idx: int, bit: int):
+        if self.mascaras[idx] & bit:
+            otro_idx = self.vecino(idx, bit)
+            quitadas = 1 + bool(self.mascaras[otro_idx] & OPUESTO[bit])
+            self.mascaras[idx] &= ~bit & 0xFF
+            self.mascaras[otro_idx] &= ~OPUESTO[bit] & 0xFF
+            if self._mapa is not None:
+                self._mapa._al_desconectar(self.coord(idx), self.coord(otro_idx), quitadas)
+
+    # interfaz de mapping: coord -> habitacion_compacta
+
+    def __getitem__(self, coord: Tuple[int, int]) -> habitacion_compacta:
+        idx = self.indice(coord)
+        if self.ids[idx] < 0:
+            raise KeyError(coord)
+        return self._vista(idx)
+
+    def get(self, coord, default=None):
+        x, y = coord
+        if 0 <= x < self.ancho and 0 <= y < self.alto:
+            idx = y * self.ancho + x
+            if self.ids[idx] >= 0:
+                return self._vista(idx)
+        return default
+
+    def __contains__(self, coord) -> bool:
+        x, y = coord
+        return 0 <= x < self.ancho and 0 <= y < self.alto and self.ids[y * self.ancho + x] >= 0
+
+    def __setitem__(self, coord: Tuple[int, int], hab: habitacion):
+        # copia una habitacion normal en la rejilla, incluidas sus conexiones
+        # hacia celdas que ya existen
+        vista = self.crear(hab.id, coord, hab.inicial)
+        vista.visitada = hab.visitada
+        vista.contenido = hab.contenido
+        for dir_name, otra in hab.conexiones.items():
+            if tuple(otra.pos) in self:
+                vista.conectar(dir_name, otra)
+
+    def __delitem__(self, coord: Tuple[int, int]):
+        idx = self.indice(coord)
+        if self.ids[idx] < 0:
+            raise KeyError(coord)
+        for bit in (1, 2, 4, 8):
+            self.desconectar(idx, bit)
+        self.ids[idx] = -1
+        self.flags[idx] = 0
+        self._quitar_contenido(idx)
+        self.orden.remove(idx)
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        ancho = self.ancho
+        for idx in self.orden:
+            yield (idx % ancho, idx // ancho)
+
+    def __len__(self) -> int:
+        return len(self.orden)
+
+    def clear(self):
+        self.ids, self.mascaras, self.flags = self._arreglos()
+        self.contenidos.clear()
+        self.orden = array("i")
+        if self._mapa is not None:
+            self._mapa._estadisticas_sucias = True
+
+    # recorridos directos sobre los arreglos
+
+    def conexiones_de(self, coord: Tuple[int, int]) -> List[Tuple[str, Tuple[int, int]]]:
+        # (direccion, coord vecina) leidos de la mascara, sin crear vistas
+        x, y = coord
+        m = self.mascaras[y * self.ancho + x]
+        return [(dir_name, (x + dx, y + dy)) for dir_name, dx, dy in DELTAS if m & BITS[dir_name]]
+
+    def habitaciones_dict(self) -> List[dict]:
+        # serializa todas las celdas sin crear vistas
+        res = []
+        ancho = self.ancho
+        ids, mascaras, flags, contenidos = self.ids, self.mascaras, self.flags, self.contenidos
+        for idx in self.orden:
+            x, y = idx % ancho, idx // ancho
+            m = mascaras[idx]
+            conexiones = {}
+            for dir_name, dx, dy in DELTAS:
+                if m & BITS[dir_name]:
+                    conexiones[dir_name] = [x + dx, y + dy]
+            c = contenidos.get(idx)
+            res.append({
+                "id": ids[idx],
+                "pos": [x, y],
+                "inicial": bool(flags[idx] & INICIAL),
+                "visitada": bool(flags[idx] & VISITADA),
+                "conexiones": conexiones,
+                "contenido": c.to_dict() if c is not None else None,
+            })
+        return res
+
+    def __repr__(self):
+        return f"rejilla_compacta({self.ancho}x{self.alto}, habitaciones={len(self)})"
@@ -0,0 +1,88 @@
+from __future__ import annotations
+import hashlib
+import random
+import secrets
+import threading
+from typing import Any, Dict, Optional
+
+# flujos que usa cada mapa: estructura, contenido y combate
+FLUJOS = ("estructura", "contenido", "combate")
+
+
+def derivar_semilla(raiz: int, etiqueta: str) -> int:
+    # deriva una semilla de 64 bits estable a partir de la raiz y una etiqueta
+    digest = hashlib.sha256(f"{int(raiz)}:{etiqueta}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+class flujos_rng:
+    # conjunto de generadores independientes derivados de una semilla raiz
+    # cada flujo es un random.Random propio, nunca el global del modulo
+
+    def __init__(self, seed: Optional[int] = None):
+        if seed is None:
+            seed = secrets.randbits(64)
+        self.seed = int(seed)
+        self._lock = threading.Lock()
+        self._flujos: Dict[str, random.Random] = {}
+        for nombre in FLUJOS:
+            self._flujos[nombre] = random.Random(derivar_semilla(self.seed, nombre))
+
+    @property
+    def estructura(self) -> random.Random:
+        return self._flujos["estructura"]
+
+    @property
+    def contenido(self) -> random.Random:
+        return self._flujos["contenido"]
+
+    @property
+    def combate(self) -> random.Random:
+        return self._flujos["combate"]
+
+    def flujo(self, nombre: str) -> random.Random:
+        # retorna el flujo con ese nombre, creandolo si no existe
+        with self._lock:
+            if nombre not in self._flujos:
+                self._flujos[nombre] = random.Random(derivar_semilla(self.seed, nombre))
+            return self._flujos[nombre]
+
+    def resembrar(self, nombre: str, seed: int) -> None:
+        # reinicia un solo flujo desde otra semilla sin tocar los demas
+        r = self.flujo(nombre)
+        with self._lock:
+            r.seed(derivar_semilla(seed, nombre))
+
+    def derivar(self, etiqueta: str) -> "flujos_rng":
+        # crea un conjunto hijo independiente, util para hilos o procesos
+        return flujos_rng(derivar_semilla(self.seed, etiqueta))
+
+    def estado(self) -> Dict[str, Any]:
+        # captura el estado de todos los flujos
+        with self._lock:
+            return {
+                "seed": self.seed,
+                "flujos": {nombre: r.getstate() for nombre, r in self._flujos.items()},
+            }
+
+    def restaurar(self, estado: Dict[str, Any]) -> None:
+        # restaura un estado capturado con estado()
+        with self._lock:
+            self.seed = int(estado["seed"])
+            for nombre, st in estado["flujos"].items():
+                if nombre not in self._flujos:
+                    self._flujos[nombre] = random.Random()
+                version, interno, gauss = st
+                self._flujos[nombre].setstate((version, tuple(interno), gauss))
+
+    def __getstate__(self):
+        # el lock no se copia, asi el mapa viaja entre procesos
+        with self._lock:
+            return {"seed": self.seed, "_flujos": dict(self._flujos)}
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"flujos_rng(seed={self.seed}, flujos={list(self._flujos)})"
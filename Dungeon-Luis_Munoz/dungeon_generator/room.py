@@ -2,23 +2,39 @@ from __future__ import annotations
 from typing import Dict, Optional, Tuple, List
 from .content import contenido_habitacion  
 
+# desplazamiento de cada direccion en la rejilla
+DELTAS = (("norte", 0, -1), ("sur", 0, 1), ("este", 1, 0), ("oeste", -1, 0))
 
 class habitacion:
     # direcciones opuestas como constante de clase
     DIRECCIONES = {"norte": "sur", "sur": "norte", "este": "oeste", "oeste": "este"}
+    __slots__ = ("id", "pos", "inicial", "_contenido", "_conexiones", "visitada", "_mapa")
     
     def __init__(self, id: int, pos: Tuple[int, int], inicial: bool = False):
         self.id: int = id
         self.pos: Tuple[int, int] = (int(pos[0]), int(pos[1]))
         self.inicial: bool = inicial
-        self.contenido: Optional[contenido_habitacion] = None
+        self._contenido: Optional[contenido_habitacion] = None
         self._conexiones: Dict[str, "habitacion"] = {}
         self.visitada: bool = False
+        # mapa dueno, se avisa cuando cambia la topologia o el contenido
+        self._mapa = None
     
     @property
     def conexiones(self) -> Dict[str, "habitacion"]:
         return self._conexiones
 
+    @property
+    def contenido(self) -> Optional[contenido_habitacion]:
+        return self._contenido
+
+    @contenido.setter
+    def contenido(self, valor: Optional[contenido_habitacion]):
+        anterior = self._contenido
+        self._contenido = valor
+        if self._mapa is not None and anterior is not valor:
+            self._mapa._al_cambiar_contenido(self.pos, anterior, valor)
+
     @property
     def x(self) -> int:
         return self.pos[0]
@@ -31,16 +47,25 @@ class habitacion:
         # conecta dos habitaciones bidireccionalmente
         if direccion not in self.DIRECCIONES:
             raise ValueError(f"direccion invalida: {direccion}")
+        opp = self.DIRECCIONES[direccion]
+        # entradas nuevas en las dos listas de conexiones
+        nuevas = (direccion not in self._conexiones) + (opp not in otra._conexiones)
         self._conexiones[direccion] = otra
-        otra._conexiones[self.DIRECCIONES[direccion]] = self
+        otra._conexiones[opp] = self
+        if self._mapa is not None:
+            self._mapa._al_conectar(self.pos, otra.pos, nuevas)
 
     def desconectar(self, direccion: str):
         # desconecta dos habitaciones
         if direccion in self._conexiones:
             otra = self._conexiones.pop(direccion)
             opp = self.DIRECCIONES[direccion]
+            quitadas = 1
             if opp in otra._conexiones and otra._conexiones[opp] is self:
                 otra._conexiones.pop(opp)
+                quitadas += 1
+            if self._mapa is not None:
+                self._mapa._al_desconectar(self.pos, otra.pos, quitadas)
     
     def vecinos_disponibles(self) -> List[str]:
         # retorna lista de direcciones con conexiones
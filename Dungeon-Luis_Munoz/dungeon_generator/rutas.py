@@ -0,0 +1,210 @@
+from __future__ import annotations
+import heapq
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+from .instrumentacion import medido, contar
+
+Coord = Tuple[int, int]
+# arbol bfs: coord -> (coord previa, direccion usada) o None para el origen
+Arbol = Dict[Coord, Optional[Tuple[Coord, str]]]
+
+
+def _manhattan(a: Coord, b: Coord) -> int:
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+class servicio_rutas:
+    # consultas de caminos sobre un mapa: arboles bfs cacheados por origen,
+    # a* con heuristica manhattan y distancias de uno a muchos
+    # camino solo arma (y cachea) el arbol completo para la habitacion inicial
+    # o un origen ya pedido con arbol(); desde cualquier otro origen, como la
+    # posicion del explorador que cambia en cada paso, usa un bfs que se
+    # detiene en el destino
+    # la cache se descarta sola cuando cambia la version de topologia del mapa
+
+    def __init__(self, m, max_arboles: int = 16):
+        self.mapa = m
+        self.max_arboles = max(1, int(max_arboles))
+        self._arboles: "OrderedDict[Coord, Arbol]" = OrderedDict()
+        self._version = -1
+
+    def _validar_cache(self):
+        if self._version != self.mapa._version_topologia:
+            self._arboles.clear()
+            self._version = self.mapa._version_topologia
+
+    def invalidar(self):
+        self._arboles.clear()
+        self._version = -1
+
+    def arbol(self, origen: Coord) -> Arbol:
+        # arbol bfs completo desde origen, guardado en una cache lru
+        self._validar_cache()
+        origen = tuple(origen)
+        arbol = self._arboles.get(origen)
+        if arbol is not None:
+            self._arboles.move_to_end(origen)
+            contar("rutas.arbol_acierto")
+            return arbol
+        contar("rutas.arbol_fallo")
+        arbol = {origen: None}
+        if origen in self.mapa.habitaciones:
+            vecinos = self.mapa.vecinos_conectados
+            q = deque([origen])
+            while q:
+                cur = q.popleft()
+                for dir_name, coord in vecinos(cur):
+                    if coord not in arbol:
+                        arbol[coord] = (cur, dir_name)
+                        q.append(coord)
+        self._arboles[origen] = arbol
+        if len(self._arboles) > self.max_arboles:
+            self._arboles.popitem(last=False)
+        return arbol
+
+    @medido("rutas.camino")
+    def camino(self, origen: Coord, destino: Coord) -> list:
+        # camino mas corto [(direccion, coord), ...] como explorador.encontrar_camino
+        origen, destino = tuple(origen), tuple(destino)
+        if origen == destino:
+            return []
+        self._validar_cache()
+        arbol = self._arboles.get(origen)
+        if arbol is not None:
+            self._arboles.move_to_end(origen)
+            contar("rutas.arbol_acierto")
+        elif self._es_inicio(origen):
+            arbol = self.arbol(origen)
+        else:
+            # consulta suelta: bfs con salida temprana, mismo camino que el arbol
+            hallado = self.mas_cercana(origen, {destino})
+            return hallado[1] if hallado else []
+        if destino not in arbol:
+            return []
+        path = []
+        node = destino
+        while arbol[node] is not None:
+            previo, direccion = arbol[node]
+            path.append((direccion, node))
+            node = previo
+        path.reverse()
+        return path
+
+    def _es_inicio(self, origen: Coord) -> bool:
+        inicial = getattr(self.mapa, "habitacion_inicial", None)
+        return inicial is not None and tuple(inicial.pos) == origen
+
+    def _desde_inicio(self, origen: Coord) -> bool:
+        # true si el mapa tiene campo de distancias y origen es su inicio
+        return hasattr(self.mapa, "campo_distancias") and self._es_inicio(origen)
+
+    def distancia(self, origen: Coord, destino: Coord) -> Optional[int]:
+        origen, destino = tuple(origen), tuple(destino)
+        if origen == destino:
+            return 0 if origen in self.mapa.habitaciones else None
+        if self._desde_inicio(origen):
+            # desde el inicio se lee del campo precalculado
+            return self.mapa.distancia_camino(destino)
+        path = self.camino(origen, destino)
+        return len(path) if path else None
+
+    @medido("rutas.distancias")
+    def distancias(self, origen: Coord, destinos: Iterable[Coord]) -> Dict[Coord, int]:
+        # distancias de origen a varios destinos en un solo barrido bfs
+        # que se detiene al encontrar el ultimo; omite los inalcanzables
+        self._validar_cache()
+        origen = tuple(origen)
+        faltan = {tuple(d) for d in destinos}
+        if origen not in self.mapa.habitaciones:
+            return {}
+        if self._desde_inicio(origen):
+            campo = {d: self.mapa.distancia_camino(d) for d in faltan}
+            return {d: v for d, v in campo.items() if v is not None}
+        arbol = self._arboles.get(origen)
+        if arbol is not None:
+            return {d: len(self.camino(origen, d)) for d in faltan if d in arbol}
+        res = {}
+        if origen in faltan:
+            res[origen] = 0
+            faltan.discard(origen)
+        vecinos = self.mapa.vecinos_conectados
+        dist = {origen: 0}
+        q = deque([origen])
+        while q and faltan:
+            cur = q.popleft()
+            for _, coord in vecinos(cur):
+                if coord not in dist:
+                    dist[coord] = dist[cur] + 1
+                    if coord in faltan:
+                        res[coord] = dist[coord]
+                        faltan.discard(coord)
+                    q.append(coord)
+        return res
+
+    @medido("rutas.mas_cercana")
+    def mas_cercana(self, origen: Coord, destinos) -> Optional[Tuple[Coord, list]]:
+        # bfs desde origen que se detiene en el primer destino alcanzado:
+        # (destino, camino como en camino) o None; destinos debe soportar in
+        origen = tuple(origen)
+        if not destinos or origen not in self.mapa.habitaciones:
+            return None
+        if origen in destinos:
+            return origen, []
+        vecinos = self.mapa.vecinos_conectados
+        previo: Arbol = {origen: None}
+        q = deque([origen])
+        while q:
+            cur = q.popleft()
+            for dir_name, coord in vecinos(cur):
+                if coord in previo:
+                    continue
+                previo[coord] = (cur, dir_name)
+                if coord in destinos:
+                    path = []
+                    node = coord
+                    while previo[node] is not None:
+                        anterior, direccion = previo[node]
+                        path.append((direccion, node))
+                        node = anterior
+                    path.reverse()
+                    return coord, path
+                q.append(coord)
+        return None
+
+    @medido("rutas.camino_a_estrella")
+    def camino_a_estrella(self, origen: Coord, destino: Coord) -> list:
+        # a* con heuristica manhattan: explora menos que el bfs en mapas grandes
+        # y da un camino de la misma longitud (la heuristica es admisible)
+        origen, destino = tuple(origen), tuple(destino)
+        if origen == destino or destino not in self.mapa.habitaciones:
+            return []
+        if origen not in self.mapa.habitaciones:
+            return []
+        vecinos = self.mapa.vecinos_conectados
+        g = {origen: 0}
+        previo: Dict[Coord, Tuple[Coord, str]] = {}
+        contador = 0
+        abiertos = [(_manhattan(origen, destino), contador, origen)]
+        while abiertos:
+            _, _, cur = heapq.heappop(abiertos)
+            if cur == destino:
+                path = []
+                node = destino
+                while node != origen:
+                    anterior, direccion = previo[node]
+                    path.append((direccion, node))
+                    node = anterior
+                path.reverse()
+                return path
+            g_cur = g[cur]
+            for dir_name, coord in vecinos(cur):
+                g_nuevo = g_cur + 1
+                if g_nuevo < g.get(coord, g_nuevo + 1):
+                    g[coord] = g_nuevo
+                    previo[coord] = (cur, dir_name)
+                    contador += 1
+                    heapq.heappush(abiertos, (g_nuevo + _manhattan(coord, destino), contador, coord))
+        return []
+
+    def __repr__(self):
+        return f"servicio_rutas(arboles={len(self._arboles)}, max={self.max_arboles})"
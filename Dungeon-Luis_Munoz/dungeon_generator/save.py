@@ -1,42 +1,81 @@
 import json
-from typing import Tuple
+from typing import Any, Dict, Tuple
 from .mapa import mapa
 from .player import explorador
 from .content import contenido_from_dict
 from .items import objeto
+from . import binario
+from .instrumentacion import medido
 from pathlib import Path
 
+# formatos de guardado: json legible o binario columnar (ver binario.py)
+FORMATOS = ("json", "binario")
 
-def guardar_partida(m: mapa, exp: explorador, archivo: str) -> None:
-    # guarda el estado completo del juego en json
+
+def _datos_explorador(exp: explorador) -> Dict[str, Any]:
     # serializa inventario ignorando elementos none
     inventario_serializado = []
     for obj in exp.inventario:
         if obj is None:
             continue
         inventario_serializado.append(obj.to_dict())
+    return {
+        "vida": exp.vida,
+        "posicion": list(exp.posicion_actual),
+        "inventario": inventario_serializado
+    }
+
+
+def _crear_explorador(m: mapa, exp_data: Dict[str, Any]) -> explorador:
+    posicion = tuple(exp_data.get("posicion", m.habitacion_inicial.pos))
+    exp = explorador(m, posicion=posicion, vida=int(exp_data.get("vida", 5)))
+
+    invent = []
+    for o in exp_data.get("inventario", []):
+        try:
+            invent.append(objeto.from_dict(o))
+        except Exception:
+            continue
+    exp.inventario = invent
+    return exp
+
+
+@medido("save.guardar_partida")
+def guardar_partida(m: mapa, exp: explorador, archivo: str, formato: str = "json") -> None:
+    # guarda el estado completo del juego en json o en binario columnar
+    if formato not in FORMATOS:
+        raise ValueError(f"formato desconocido: {formato}")
+    if formato == "binario":
+        binario.guardar(m, _datos_explorador(exp), archivo)
+        return
 
     data = {
         "mapa": m.to_dict(),
-        "explorador": {
-            "vida": exp.vida,
-            "posicion": list(exp.posicion_actual),
-            "inventario": inventario_serializado
-        }
+        "explorador": _datos_explorador(exp)
     }
     p = Path(archivo)
     p.write_text(json.dumps(data, indent=2), encoding="utf-8")
 
 
-def cargar_partida(archivo: str) -> Tuple[mapa, explorador]:
-    # carga partida desde json y reconstruye mapa y explorador
-    # retorna tupla (mapa, explorador)
+@medido("save.cargar_partida")
+def cargar_partida(archivo: str, backend: str = "dict", perezoso: bool = False) -> Tuple[mapa, explorador]:
+    # carga partida y reconstruye mapa y explorador; detecta el formato
+    # retorna tupla (mapa, explorador); backend elige el almacen del mapa
+    # perezoso=True (solo binario) retorna enseguida y carga cada region del
+    # mapa cuando se accede; el mapa queda con backend compacto
+    if binario.es_binario(archivo):
+        if perezoso:
+            m, exp_data = binario.cargar_perezoso(archivo)
+            return m, _crear_explorador(m, exp_data)
+        m, exp_data = binario.cargar(archivo, backend=backend)
+        return m, _crear_explorador(m, exp_data)
+
     p = Path(archivo)
     text = p.read_text(encoding="utf-8")
     data = json.loads(text)
 
     mapa_dict = data["mapa"]
-    m = mapa.from_dict(mapa_dict)
+    m = mapa.from_dict(mapa_dict, backend=backend)
 
     for h in mapa_dict.get("habitaciones", []):
         cont = h.get("contenido")
@@ -48,16 +87,4 @@ def cargar_partida(archivo: str) -> Tuple[mapa, explorador]:
                 except Exception:
                     m.habitaciones[coord].contenido = None
 
-    exp_data = data.get("explorador", {})
-    posicion = tuple(exp_data.get("posicion", m.habitacion_inicial.pos))
-    exp = explorador(m, posicion=posicion, vida=int(exp_data.get("vida", 5)))
-
-    invent = []
-    for o in exp_data.get("inventario", []):
-        try:
-            invent.append(objeto.from_dict(o))
-        except Exception:
-            continue
-    exp.inventario = invent
-
-    return m, exp
+    return m, _crear_explorador(m, data.get("explorador", {}))
@@ -0,0 +1,208 @@
+from __future__ import annotations
+import argparse
+import asyncio
+import signal
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Optional, Tuple
+from .mapa import mapa
+from .player import explorador
+from .rng import derivar_semilla
+from .plantilla import plantilla
+from .cache import cache_mapas
+from . import comandos
+from .instrumentacion import contar, temporizador
+
+# servidor asyncio de partidas: cada conexion tcp o unix es una sesion con su
+# propio mapa y explorador y los mismos comandos que juego_interactivo
+#
+# protocolo de lineas en utf-8: el cliente manda un comando por linea y el
+# servidor responde un bloque de texto terminado por una linea con solo un
+# punto (FIN).
+# al conectar llega el bloque de bienvenida con el estado; cuando la partida
+# termina (salir o muerte) el ultimo bloque trae el resumen y se cierra
+#
+# la generacion del mapa es cpu en python puro: corre en un executor de
+# procesos, en hilos el gil igual frenaria el loop y a las demas sesiones;
+# los comandos son cortos y se atienden en el loop
+# con compartir=True se genera una sola plantilla y cada sesion guarda solo
+# sus cambios sobre ella (ver plantilla.py)
+# con cache (un directorio) los mapas con seed se leen de cache_mapas, asi
+# reiniciar el servidor no vuelve a generarlos
+
+FIN = "."
+
+
+def generar_mapa(ancho: int, alto: int, n_habitaciones: int, seed: Optional[int],
+                 cache: Optional[str] = None) -> mapa:
+    # corre en el executor
+    if cache is not None:
+        return cache_mapas(cache).obtener(ancho, alto, n_habitaciones, seed)
+    m = mapa(ancho, alto, seed=seed)
+    m.generar_estructura(n_habitaciones)
+    m.colocar_contenido()
+    return m
+
+
+def nueva_plantilla(ancho: int, alto: int, n_habitaciones: int, seed: Optional[int],
+                    cache: Optional[str] = None) -> plantilla:
+    return plantilla(generar_mapa(ancho, alto, n_habitaciones, seed, cache))
+
+
+class servidor_juego:
+    def __init__(self, ancho: int = 8, alto: int = 6, n_habitaciones: int = 15, seed: Optional[int] = None,
+                 max_sesiones: int = 1000, executor: Optional[Executor] = None, compartir: bool = False,
+                 cache: Optional[str] = None):
+        if max_sesiones < 1:
+            raise ValueError("max_sesiones debe ser >= 1")
+        self.ancho = ancho
+        self.alto = alto
+        self.n_habitaciones = n_habitaciones
+        # con seed cada sesion deriva la suya; sin seed los mapas son al azar
+        self.seed = seed
+        self.max_sesiones = max_sesiones
+        # None crea un executor de procesos propio con la primera sesion y
+        # lo cierra en cerrar(); el mapa vuelve por pickle
+        self.executor = executor
+        self._executor_propio: Optional[ProcessPoolExecutor] = None
+        self.compartir = compartir
+        # directorio de cache_mapas o None
+        self.cache = cache
+        # future con la plantilla compartida, se genera con la primera sesion
+        self._plantilla: Optional[asyncio.Future] = None
+        self.activas = 0
+        self.atendidas = 0
+        self.comandos = 0
+        self._servidores: List[asyncio.AbstractServer] = []
+
+    def _semilla_sesion(self, n: int) -> Optional[int]:
+        if self.seed is None:
+            return None
+        return derivar_semilla(self.seed, f"sesion:{n}")
+
+    def _executor(self) -> Executor:
+        if self.executor is not None:
+            return self.executor
+        if self._executor_propio is None:
+            self._executor_propio = ProcessPoolExecutor()
+        return self._executor_propio
+
+    async def _nueva_sesion(self, n: int) -> Tuple[object, explorador]:
+        loop = asyncio.get_running_loop()
+        semilla = self._semilla_sesion(n)
+        if not self.compartir:
+            m = await loop.run_in_executor(
+                self._executor(), generar_mapa, self.ancho, self.alto, self.n_habitaciones, semilla, self.cache)
+            return m, explorador(m)
+        if self._plantilla is None:
+            self._plantilla = loop.run_in_executor(
+                self._executor(), nueva_plantilla, self.ancho, self.alto, self.n_habitaciones, self.seed, self.cache)
+        p = await self._plantilla
+        m = p.sesion(semilla)
+        return m, explorador(m)
+
+    @staticmethod
+    async def _enviar(writer: asyncio.StreamWriter, texto: str):
+        writer.write(f"{texto}\n{FIN}\n".encode("utf-8"))
+        await writer.drain()
+
+    async def atender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # una sesion completa, de la conexion al cierre
+        if self.activas >= self.max_sesiones:
+            await self._enviar(writer, "servidor lleno, intenta mas tarde")
+            writer.close()
+            return
+        self.activas += 1
+        contar("servidor.sesiones")
+        n = self.atendidas
+        self.atendidas += 1
+        try:
+            m, exp = await self._nueva_sesion(n)
+            await self._enviar(writer, "=== generador de dungeons ===\n" + comandos.estado_texto(m, exp))
+            jugando = True
+            while jugando:
+                linea = await reader.readline()
+                if not linea:
+                    break
+                comando = linea.decode("utf-8", errors="replace").strip().lower()
+                if not comando:
+                    await self._enviar(writer, comandos.estado_texto(m, exp))
+                    continue
+                with temporizador("servidor.comando"):
+                    salida, jugando = comandos.ejecutar(m, exp, comando)
+                self.comandos += 1
+                if jugando:
+                    await self._enviar(writer, salida + "\n" + comandos.estado_texto(m, exp))
+                else:
+                    await self._enviar(writer, salida + comandos.resumen_final(exp))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.activas -= 1
+            writer.close()
+
+    async def iniciar(self, host: str = "127.0.0.1", puerto: int = 7777,
+                      unix: Optional[str] = None) -> asyncio.AbstractServer:
+        # abre el socket y empieza a aceptar conexiones; retorna el servidor
+        # la cola de espera alcanza para que todas las sesiones conecten juntas
+        backlog = max(100, self.max_sesiones)
+        if unix is not None:
+            srv = await asyncio.start_unix_server(self.atender, path=unix, backlog=backlog)
+        else:
+            srv = await asyncio.start_server(self.atender, host, puerto, backlog=backlog)
+        self._servidores.append(srv)
+        return srv
+
+    async def cerrar(self):
+        for srv in self._servidores:
+            srv.close()
+            await srv.wait_closed()
+        self._servidores.clear()
+        if self._executor_propio is not None:
+            self._executor_propio.shutdown(wait=False, cancel_futures=True)
+            self._executor_propio = None
+
+    def __repr__(self):
+        return f"servidor_juego(activas={self.activas}, atendidas={self.atendidas}, comandos={self.comandos})"
+
+
+async def servir(juego: servidor_juego, host: str = "127.0.0.1", puerto: int = 7777, unix: Optional[str] = None):
+    srv = await juego.iniciar(host, puerto, unix)
+    direcciones = ", ".join(str(s.getsockname()) for s in srv.sockets)
+    print(f"escuchando en {direcciones}", file=sys.stderr, flush=True)
+    async with srv:
+        await srv.serve_forever()
+
+
+def _interrumpir(*_):
+    raise KeyboardInterrupt
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="servidor de partidas por tcp o socket unix")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=7777)
+    parser.add_argument("--unix", default=None, help="ruta de socket unix en lugar de tcp")
+    parser.add_argument("--ancho", type=int, default=8)
+    parser.add_argument("--alto", type=int, default=6)
+    parser.add_argument("--habitaciones", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--max-sesiones", type=int, default=1000)
+    parser.add_argument("--plantilla", action="store_true", help="todas las sesiones comparten un mismo mapa base")
+    parser.add_argument("--cache", default=None, help="directorio de cache de mapas generados")
+    parser.add_argument("--procesos", type=int, default=None, help="procesos que generan mapas (por defecto uno por cpu)")
+    args = parser.parse_args(argv)
+    # sigterm sale igual que ctrl-c, asi el executor cierra sus procesos
+    signal.signal(signal.SIGTERM, _interrumpir)
+    with ProcessPoolExecutor(args.procesos) as executor:
+        juego = servidor_juego(args.ancho, args.alto, args.habitaciones, args.seed, args.max_sesiones,
+                               executor=executor, compartir=args.plantilla, cache=args.cache)
+        try:
+            asyncio.run(servir(juego, args.host, args.puerto, args.unix))
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+from __future__ import annotations
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from .mapa import mapa
+from .player import explorador
+from .rng import derivar_semilla
+from .cache import cache_mapas
+
+# simulador de partidas sin interfaz: genera un mapa, maneja un explorador
+# con una politica hasta que muere o termina y anota el resultado
+# las partidas se reparten en un pool de procesos, cada una con su semilla
+# derivada de la semilla base, y los resultados salen como lineas json
+# con cache (un directorio) los mapas se leen de cache_mapas si ya estan
+
+Coord = Tuple[int, int]
+# politica: (explorador, rng) -> direcciones a seguir; lista vacia = termino
+Politica = Callable[[explorador, random.Random], List[str]]
+
+
+def _camino_mas_cercano(m, origen: Coord, criterio: Callable) -> List[str]:
+    # bfs desde origen que se detiene en la primera habitacion que cumple
+    # criterio; retorna las direcciones hasta ella o [] si no hay ninguna
+    previo = {origen: None}
+    q = deque([origen])
+    while q:
+        cur = q.popleft()
+        if cur != origen and criterio(m.habitaciones[cur]):
+            path = []
+            while previo[cur] is not None:
+                cur, direccion = previo[cur]
+                path.append(direccion)
+            path.reverse()
+            return path
+        for dir_name, coord in m.vecinos_conectados(cur):
+            if coord not in previo:
+                previo[coord] = (cur, dir_name)
+                q.append(coord)
+    return []
+
+
+def paseo_aleatorio(exp: explorador, rng: random.Random) -> List[str]:
+    # un paso al azar; nunca termina por si sola, la corta max_pasos
+    direcciones = exp.obtener_habitaciones_adyacentes()
+    return [rng.choice(direcciones)] if direcciones else []
+
+
+def codicioso_tesoros(exp: explorador, rng: random.Random) -> List[str]:
+    # va al tesoro mas cercano segun el indice de contenido del mapa;
+    # termina cuando no quedan tesoros alcanzables
+    hallado = exp.mapa.mas_cercana(tuple(exp.posicion_actual), "tesoro")
+    return [direccion for direccion, _ in hallado[1]] if hallado else []
+
+
+def limpiar_todo(exp: explorador, rng: random.Random) -> List[str]:
+    # va a la habitacion mas cercana con contenido o sin visitar
+    return _camino_mas_cercano(exp.mapa, tuple(exp.posicion_actual),
+                               lambda hab: hab.contenido is not None or not hab.visitada)
+
+
+POLITICAS: Dict[str, Politica] = {
+    "aleatorio": paseo_aleatorio,
+    "codicioso": codicioso_tesoros,
+    "limpiar": limpiar_todo,
+}
+
+
+def jugar_partida(seed: int, politica: str = "limpiar", ancho: int = 20, alto: int = 20,
+                  n_habitaciones: int = 150, vida: int = 5, max_pasos: int = 5000,
+                  cache: Optional[str] = None) -> dict:
+    # juega una partida completa y retorna sus metricas
+    elegir = POLITICAS[politica]
+    if cache is not None:
+        m = cache_mapas(cache).obtener(ancho, alto, n_habitaciones, seed)
+    else:
+        m = mapa(ancho, alto, seed=seed)
+        m.generar_estructura(n_habitaciones)
+        m.colocar_contenido()
+    exp = explorador(m, vida=vida)
+    rng = random.Random(derivar_semilla(seed, "politica"))
+    habitaciones = m.habitaciones
+
+    pasos = 0
+    monstruos = 0
+    jefe = False
+    resultado = "limite"
+    while pasos < max_pasos:
+        plan = elegir(exp, rng)
+        if not plan:
+            resultado = "completo"
+            break
+        for direccion in plan:
+            if pasos >= max_pasos or not exp.mover(direccion):
+                break
+            pasos += 1
+            hab = habitaciones[exp.posicion_actual]
+            tipo = getattr(hab.contenido, "tipo", None)
+            exp.explorar_habitacion(narrar=False)
+            if not exp.esta_vivo:
+                break
+            if tipo in ("monstruo", "jefe") and hab.contenido is None:
+                monstruos += 1
+                jefe = jefe or tipo == "jefe"
+        if not exp.esta_vivo:
+            resultado = "muerte"
+            break
+
+    visitadas = sum(1 for hab in habitaciones.values() if hab.visitada)
+    return {
+        "seed": seed,
+        "politica": politica,
+        "resultado": resultado,
+        "pasos": pasos,
+        "vida": exp.vida,
+        "tesoros": len(exp.inventario),
+        "valor": sum(getattr(o, "valor", 0) for o in exp.inventario),
+        "monstruos_derrotados": monstruos,
+        "jefe_derrotado": jefe,
+        "visitadas": round(visitadas / len(habitaciones), 4),
+    }
+
+
+def _jugar(args: tuple) -> dict:
+    # punto de entrada de cada proceso del pool
+    return jugar_partida(*args)
+
+
+def semillas(seed: int, partidas: int) -> Iterator[int]:
+    for i in range(partidas):
+        yield derivar_semilla(seed, f"partida:{i}")
+
+
+def simular(partidas: int, politica: str = "limpiar", seed: int = 0, ancho: int = 20, alto: int = 20,
+            n_habitaciones: int = 150, vida: int = 5, max_pasos: int = 5000,
+            procesos: Optional[int] = None, salida: Optional[str] = None,
+            cache: Optional[str] = None) -> dict:
+    # juega muchas partidas en paralelo; cada resultado se escribe apenas
+    # llega si hay salida. retorna un resumen con partidas por segundo
+    if politica not in POLITICAS:
+        raise ValueError(f"politica desconocida: {politica}")
+    if partidas <= 0:
+        raise ValueError("partidas debe ser >= 1")
+    procesos = procesos or os.cpu_count() or 1
+    trabajos = ((s, politica, ancho, alto, n_habitaciones, vida, max_pasos, cache)
+                for s in semillas(seed, partidas))
+    conteo = {"completo": 0, "muerte": 0, "limite": 0}
+    pasos = 0
+    f = open(salida, "w", encoding="utf-8") if salida else None
+    pool = ProcessPoolExecutor(max_workers=procesos) if procesos > 1 else None
+    inicio = time.perf_counter()
+    try:
+        if pool is None:
+            resultados = map(_jugar, trabajos)
+        else:
+            resultados = pool.map(_jugar, trabajos, chunksize=max(1, partidas // (procesos * 8)))
+        for r in resultados:
+            conteo[r["resultado"]] += 1
+            pasos += r["pasos"]
+            if f is not None:
+                f.write(json.dumps(r) + "\n")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if f is not None:
+            f.close()
+    segundos = time.perf_counter() - inicio
+    return {
+        "partidas": partidas,
+        "politica": politica,
+        "procesos": procesos,
+        "segundos": round(segundos, 3),
+        "partidas_por_segundo": round(partidas / segundos, 2) if segundos > 0 else None,
+        "pasos_medios": round(pasos / partidas, 2),
+        **conteo,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="simulador de partidas sin interfaz")
+    parser.add_argument("-n", "--partidas", type=int, default=1000)
+    parser.add_argument("-p", "--politica", choices=sorted(POLITICAS), default="limpiar")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ancho", type=int, default=20)
+    parser.add_argument("--alto", type=int, default=20)
+    parser.add_argument("--habitaciones", type=int, default=150)
+    parser.add_argument("--vida", type=int, default=5)
+    parser.add_argument("--max-pasos", type=int, default=5000)
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("-o", "--salida", default=None, help="archivo jsonl con una linea por partida")
+    parser.add_argument("--cache", default=None, help="directorio de cache de mapas generados")
+    args = parser.parse_args(argv)
+    resumen = simular(args.partidas, args.politica, args.seed, args.ancho, args.alto, args.habitaciones,
+                      args.vida, args.max_pasos, args.procesos, args.salida, args.cache)
+    print(json.dumps(resumen), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
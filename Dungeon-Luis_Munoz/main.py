@@ -3,13 +3,14 @@ from dungeon_generator.player import explorador
 from dungeon_generator.content import tesoro, monstruo
 from pathlib import Path
 
-try:
-    from dungeon_generator.save import guardar_partida, cargar_partida
-    HAS_SERIALIZACION = True
-except Exception:
-    guardar_partida = None
-    cargar_partida = None
-    HAS_SERIALIZACION = False
+
+def cargar_serializacion():
+    # el modulo de guardado se importa recien cuando la demo lo usa
+    try:
+        from dungeon_generator.save import guardar_partida, cargar_partida
+        return guardar_partida, cargar_partida
+    except Exception:
+        return None, None
 
 
 def mostrar_mapa_simple(m, exp=None):
@@ -84,17 +85,13 @@ def demo():
     mostrar_mapa_simple(m)
     mostrar_estadisticas(m)
 
-    coord_tesoro = None
-    coord_mon = None
-    for coord, hab in m.habitaciones.items():
-        if hab.contenido is not None:
-            tipo = getattr(hab.contenido, "tipo", None)
-            if tipo == "tesoro" and coord_tesoro is None:
-                coord_tesoro = coord
-            if tipo == "monstruo" and coord_mon is None:
-                coord_mon = coord
-        if coord_tesoro and coord_mon:
-            break
+    # las habitaciones mas cercanas al inicio con tesoro y con monstruo,
+    # buscadas con el indice de contenido del mapa
+    inicio = m.habitacion_inicial.pos
+    tesoro_cercano = m.mas_cercana(inicio, "tesoro")
+    mon_cercano = m.mas_cercana(inicio, "monstruo")
+    coord_tesoro = tesoro_cercano[0] if tesoro_cercano else None
+    coord_mon = mon_cercano[0] if mon_cercano else None
 
     exp = explorador(m)
     print("\n--- estado inicial ---")
@@ -124,6 +121,8 @@ def demo():
         mostrar_mapa_simple(m, exp)
 
     save_file = "prueba.json"
+    guardar_partida, cargar_partida = cargar_serializacion()
+    HAS_SERIALIZACION = guardar_partida is not None
     if HAS_SERIALIZACION:
         try:
             guardar_partida(m, exp, save_file)
@@ -0,0 +1,67 @@
+import json
+import pytest
+from dungeon_generator import binario
+from dungeon_generator.mapa import mapa, BACKENDS
+from dungeon_generator.player import explorador
+from dungeon_generator.save import guardar_partida, cargar_partida
+
+
+def generar(backend="dict", ancho=80, alto=70, n=900, seed=2):
+    m = mapa(ancho, alto, seed=seed, backend=backend)
+    m.generar_estructura(n)
+    m.colocar_contenido()
+    return m
+
+
+def exacto(m):
+    # json con el orden de las claves: tambien compara el orden de conexiones
+    return json.dumps(m.to_dict())
+
+
+@pytest.mark.parametrize("origen", BACKENDS)
+@pytest.mark.parametrize("destino", BACKENDS)
+def test_ida_y_vuelta(tmp_path, origen, destino):
+    m = generar(origen)
+    exp = explorador(m, vida=7)
+    exp.mover(exp.obtener_habitaciones_adyacentes()[0])
+    archivo = str(tmp_path / "p.dgnb")
+    guardar_partida(m, exp, archivo, formato="binario")
+    assert binario.es_binario(archivo)
+    m2, exp2 = cargar_partida(archivo, backend=destino)
+    assert m2.to_dict() == m.to_dict()
+    if origen == destino:
+        assert exacto(m2) == exacto(m)
+    assert (exp2.posicion_actual, exp2.vida) == (exp.posicion_actual, exp.vida)
+    assert m2.obtener_estadisticas_mapa() == m.obtener_estadisticas_mapa()
+    assert m2.es_todo_accesible()
+
+
+def test_perezoso_equivale_a_carga_completa(tmp_path):
+    m = generar("compacto", 300, 200, 4000)
+    archivo = str(tmp_path / "p.dgnb")
+    guardar_partida(m, explorador(m), archivo, formato="binario")
+    completo, _ = cargar_partida(archivo, backend="compacto")
+    perezoso, exp = cargar_partida(archivo, perezoso=True)
+    rejilla = perezoso.habitaciones
+    # una consulta local solo hidrata unas pocas regiones
+    hab = perezoso.habitaciones[exp.posicion_actual]
+    assert hab.to_dict() == completo.habitaciones[exp.posicion_actual].to_dict()
+    assert not rejilla.completa and rejilla.regiones_cargadas() < len(rejilla._cargadas)
+    assert len(rejilla.ids.bloques) <= rejilla.regiones_cargadas()
+    # recorrer todo termina de cargar y pasa a arreglos planos
+    assert exacto(perezoso) == exacto(completo)
+    assert rejilla.completa
+    assert perezoso.campo_distancias() == completo.campo_distancias()
+
+
+def test_perezoso_admite_cambios(tmp_path):
+    m = generar("compacto", 200, 200, 2000)
+    archivo = str(tmp_path / "p.dgnb")
+    guardar_partida(m, explorador(m), archivo, formato="binario")
+    perezoso, exp = cargar_partida(archivo, perezoso=True)
+    hab = perezoso.habitaciones[exp.posicion_actual]
+    direccion = hab.vecinos_disponibles()[0]
+    hab.desconectar(direccion)
+    m.habitaciones[exp.posicion_actual].desconectar(direccion)
+    assert exacto(perezoso) == exacto(m)
+    assert perezoso.es_todo_accesible() == m.es_todo_accesible()
@@ -0,0 +1,71 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+from dungeon_generator import cache
+from dungeon_generator.cache import cache_mapas
+
+BACKENDS = ["dict", "compacto"]
+PARAMETROS = (20, 20, 120)
+
+
+def texto(m):
+    return json.dumps(m.to_dict(), sort_keys=True)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_acierto_igual_a_generar(tmp_path, backend):
+    c = cache_mapas(str(tmp_path))
+    fresco = cache.generar(*PARAMETROS, seed=7, backend=backend)
+    primero = c.obtener(*PARAMETROS, seed=7, backend=backend)
+    segundo = c.obtener(*PARAMETROS, seed=7, backend=backend)
+    assert (c.fallos, c.aciertos) == (1, 1)
+    assert texto(primero) == texto(segundo) == texto(fresco)
+    # los flujos rng siguen igual que en el mapa recien generado
+    assert segundo.rng.combate.random() == fresco.rng.combate.random()
+    assert segundo.rng.contenido.random() == fresco.rng.contenido.random()
+
+
+def test_sin_seed_no_guarda(tmp_path):
+    c = cache_mapas(str(tmp_path))
+    c.obtener(*PARAMETROS, seed=None)
+    assert c.tamano() == 0 and (c.aciertos, c.fallos) == (0, 0)
+
+
+def test_archivo_danado_se_regenera(tmp_path):
+    c = cache_mapas(str(tmp_path))
+    c.obtener(*PARAMETROS, seed=3)
+    ruta = tmp_path / f"{cache.clave(*PARAMETROS, 3)}{cache.EXTENSION}"
+    ruta.write_bytes(b"basura")
+    m = c.obtener(*PARAMETROS, seed=3)
+    assert c.fallos == 2
+    assert texto(m) == texto(cache.generar(*PARAMETROS, seed=3))
+
+
+def test_recorte_lru(tmp_path):
+    c = cache_mapas(str(tmp_path))
+    for seed in (1, 2, 3):
+        c.obtener(*PARAMETROS, seed=seed)
+    rutas = {seed: tmp_path / f"{cache.clave(*PARAMETROS, seed)}{cache.EXTENSION}" for seed in (1, 2, 3)}
+    # la seed 1 es la usada mas recientemente, la 2 la mas vieja
+    for seed, t in ((2, 1000), (3, 2000), (1, 3000)):
+        os.utime(rutas[seed], (t, t))
+    c.max_bytes = rutas[1].stat().st_size + rutas[3].stat().st_size
+    assert c.recortar() == 1
+    assert not rutas[2].exists() and rutas[1].exists() and rutas[3].exists()
+
+
+def _obtener_en_proceso(directorio):
+    c = cache_mapas(directorio)
+    m = c.obtener(*PARAMETROS, seed=11)
+    return texto(m), c.fallos
+
+
+@pytest.mark.skipif(not cache.HAS_FCNTL, reason="sin bloqueos de archivo")
+def test_varios_procesos_generan_una_vez(tmp_path):
+    with ProcessPoolExecutor(4) as ex:
+        resultados = list(ex.map(_obtener_en_proceso, [str(tmp_path)] * 8))
+    assert len({t for t, _ in resultados}) == 1
+    assert resultados[0][0] == texto(cache.generar(*PARAMETROS, seed=11))
+    assert sum(f for _, f in resultados) == 1
+    assert not list(tmp_path.glob(".tmp_*"))
@@ -0,0 +1,68 @@
+import math
+import random
+import pytest
+from dungeon_generator import combate
+
+CASOS = [
+    (10, 5, 2, "monstruo"),
+    (10, 8, 4, "monstruo"),
+    (6, 9, 3, "monstruo"),
+    (15, 20, 6, "jefe"),
+    (30, 25, 8, "jefe"),
+]
+VUELTAS = 20_000
+
+
+def simular(vida, vida_m, ataque, tipo, seed):
+    rng = random.Random(seed)
+    ganadas = perdida = 0
+    for _ in range(VUELTAS):
+        r = combate.resolver(vida, vida_m, ataque, tipo, rng)
+        ganadas += r.gana
+        perdida += r.danio_recibido
+    return ganadas / VUELTAS, perdida / VUELTAS
+
+
+@pytest.mark.parametrize("vida,vida_m,ataque,tipo", CASOS)
+def test_analizar_coincide_con_monte_carlo(vida, vida_m, ataque, tipo):
+    exacto = combate.analizar(vida, vida_m, ataque, tipo)
+    p, perdida = simular(vida, vida_m, ataque, tipo, seed=vida * 1000 + vida_m)
+    # cuatro desviaciones estandar de la estimacion
+    sigma = math.sqrt(max(exacto.prob_victoria * (1 - exacto.prob_victoria), 1e-4) / VUELTAS)
+    assert abs(p - exacto.prob_victoria) < 4 * sigma
+    assert abs(perdida - exacto.perdida_esperada) < 0.05 * vida
+    assert exacto.vida_esperada + exacto.perdida_esperada == pytest.approx(vida)
+
+
+def test_analizar_casos_borde():
+    assert combate.analizar(0, 5, 2).prob_victoria == 0.0
+    assert combate.analizar(10, 0, 2) == (1.0, 10.0, 0.0)
+    # con ataque 1 y vida de sobra el jugador siempre gana
+    assert combate.analizar(50, 3, 1).prob_victoria == pytest.approx(1.0)
+
+
+def distribucion(valores):
+    total = len(valores)
+    cuenta = {}
+    for v in valores:
+        cuenta[v] = cuenta.get(v, 0) + 1
+    return {v: c / total for v, c in cuenta.items()}
+
+
+@pytest.mark.parametrize("vida,vida_m,ataque,tipo", CASOS)
+def test_resolver_lote_numpy_igual_en_distribucion(monkeypatch, vida, vida_m, ataque, tipo):
+    pytest.importorskip("numpy")
+    peleas = [(vida, vida_m, ataque)] * VUELTAS
+    con_numpy = combate.resolver_lote(peleas, tipo, random.Random(1))
+    monkeypatch.setattr(combate, "HAS_NUMPY", False)
+    en_python = combate.resolver_lote(peleas, tipo, random.Random(2))
+    exacto = combate.analizar(vida, vida_m, ataque, tipo)
+    sigma = math.sqrt(max(exacto.prob_victoria * (1 - exacto.prob_victoria), 1e-4) / VUELTAS)
+    for res in (con_numpy, en_python):
+        assert abs(sum(res["gana"]) / VUELTAS - exacto.prob_victoria) < 4 * sigma
+        assert sum(res["vida_jugador"]) / VUELTAS == pytest.approx(exacto.vida_esperada, abs=0.05 * vida)
+    # distancia de variacion total entre las distribuciones de vida restante
+    for clave in ("vida_jugador", "vida_enemigo"):
+        a, b = distribucion(con_numpy[clave]), distribucion(en_python[clave])
+        tv = sum(abs(a.get(v, 0) - b.get(v, 0)) for v in set(a) | set(b)) / 2
+        assert tv < 0.03
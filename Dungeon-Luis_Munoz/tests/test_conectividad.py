@@ -0,0 +1,70 @@
+import random
+from collections import deque
+import pytest
+from dungeon_generator.mapa import mapa
+
+BACKENDS = ["dict", "compacto"]
+
+
+def generar(backend, seed=5):
+    m = mapa(20, 20, seed=seed, backend=backend)
+    m.generar_estructura(150)
+    return m
+
+
+def componentes(m):
+    # referencia: bfs sobre las conexiones actuales
+    comp = {}
+    for inicio in m.habitaciones:
+        if inicio in comp:
+            continue
+        comp[inicio] = inicio
+        cola = deque([inicio])
+        while cola:
+            actual = cola.popleft()
+            for _, otra in m.vecinos_conectados(actual):
+                if otra not in comp:
+                    comp[otra] = inicio
+                    cola.append(otra)
+    return comp
+
+
+def verificar(m, rng):
+    comp = componentes(m)
+    coords = list(m.habitaciones)
+    for _ in range(300):
+        a, b = rng.choice(coords), rng.choice(coords)
+        assert m.conectadas(a, b) == (comp[a] == comp[b])
+    inicio = m.habitacion_inicial.pos
+    assert m.es_todo_accesible() == all(c == comp[inicio] for c in comp.values())
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_conectividad_tras_desconectar(backend):
+    m = generar(backend)
+    rng = random.Random(1)
+    assert m.es_todo_accesible()
+    coords = list(m.habitaciones)
+    quitadas = []
+    for _ in range(40):
+        hab = m.habitaciones[rng.choice(coords)]
+        direcciones = hab.vecinos_disponibles()
+        if not direcciones:
+            continue
+        d = rng.choice(direcciones)
+        quitadas.append((hab.pos, d, hab.conexiones[d].pos))
+        hab.desconectar(d)
+        verificar(m, rng)
+    assert not m.es_todo_accesible()
+    # reconectar todo vuelve a dejar el mapa accesible
+    for pos, d, otra in reversed(quitadas):
+        m.habitaciones[pos].conectar(d, m.habitaciones[otra])
+        verificar(m, rng)
+    assert m.es_todo_accesible()
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_conectadas_fuera_del_mapa(backend):
+    m = generar(backend)
+    libre = next((x, y) for x in range(m.ancho) for y in range(m.alto) if (x, y) not in m.habitaciones)
+    assert not m.conectadas(m.habitacion_inicial.pos, libre)
@@ -0,0 +1,83 @@
+import copy
+import pickle
+import pytest
+from dungeon_generator.items import objeto
+from dungeon_generator.mapa import mapa
+from dungeon_generator.player import explorador
+from dungeon_generator.content import tesoro
+from dungeon_generator.save import guardar_partida, cargar_partida
+
+
+def test_objeto_compartido_inmutable():
+    efecto = {"tipo": "curar", "valor": 2}
+    a = objeto.compartido("pocion", 5, "cura", "consumible", efecto)
+    b = objeto.compartido("pocion", 5, "cura", "consumible", dict(efecto))
+    assert a is b
+    with pytest.raises(TypeError):
+        a.efecto["valor"] = 99
+    # cambiar el dict original no toca la instancia compartida
+    efecto["valor"] = 99
+    assert b.efecto["valor"] == 2
+    assert a.to_dict()["efecto"] == {"tipo": "curar", "valor": 2}
+
+
+def test_objeto_pickle_y_copia():
+    a = objeto.compartido("anillo", 10, "brilla", "normal", {"tipo": "buff"})
+    otro = pickle.loads(pickle.dumps(a))
+    assert otro is not a and otro.to_dict() == a.to_dict()
+    assert copy.deepcopy(a).to_dict() == a.to_dict()
+    # la memo de pickle mantiene lo compartido dentro de un mismo volcado
+    x, y = pickle.loads(pickle.dumps([a, a]))
+    assert x is y
+
+
+def test_contenido_propio_por_habitacion():
+    m = mapa(20, 20, seed=6)
+    m.generar_estructura(300)
+    m.colocar_contenido()
+    for tipo in ("tesoro", "evento"):
+        contenidos = [m.habitaciones[c].contenido for c in m.habitaciones_con(tipo)]
+        assert len({id(c) for c in contenidos}) == len(contenidos)
+    tesoros = [m.habitaciones[c].contenido for c in m.habitaciones_con("tesoro")]
+    # el objeto inmutable si se comparte entre tesoros iguales
+    assert len({id(t.recompensa) for t in tesoros}) < len(tesoros)
+    eventos = [m.habitaciones[c].contenido for c in m.habitaciones_con("evento")]
+    with pytest.raises(TypeError):
+        eventos[0].efecto["valor"] = 0
+
+
+def generar():
+    m = mapa(20, 20, seed=6)
+    m.generar_estructura(300)
+    m.colocar_contenido()
+    return m
+
+
+@pytest.mark.parametrize("formato", ["json", "binario"])
+def test_inventario_cargado_con_objetos_propios(tmp_path, formato):
+    m = generar()
+    exp = explorador(m)
+    exp.inventario = [objeto("pocion", 5, "cura", "consumible", {"tipo": "curar", "valor": 1}) for _ in range(2)]
+    archivo = str(tmp_path / "partida")
+    guardar_partida(m, exp, archivo, formato=formato)
+    _, cargado = cargar_partida(archivo)
+    a, b = cargado.inventario
+    assert a is not b and a.to_dict() == b.to_dict()
+    cargado.usar(b)
+    assert len(cargado.inventario) == 1 and cargado.inventario[0] is a
+
+
+def test_recoger_tesoros_iguales_da_entradas_distintas(tmp_path):
+    m = generar()
+    exp = explorador(m, vida=100)
+    gema = objeto.compartido("gema nivel 2", valor=5, descripcion="tesoro")
+    for _ in range(2):
+        tesoro(gema).interactuar(exp, narrar=False)
+    a, b = exp.inventario
+    assert a is not b and a is not gema and a.to_dict() == gema.to_dict()
+    # las recompensas de los tesoros cargados siguen compartidas
+    archivo = str(tmp_path / "partida.json")
+    guardar_partida(m, exp, archivo)
+    otro, _ = cargar_partida(archivo)
+    recompensas = [otro.habitaciones[c].contenido.recompensa for c in otro.habitaciones_con("tesoro")]
+    assert len({id(r) for r in recompensas}) < len(recompensas)
@@ -0,0 +1,34 @@
+import pytest
+
+pytest.importorskip("rich")
+
+from dungeon_generator.display import visualizador, _pagina_mapa
+from dungeon_generator.mapa import mapa
+
+
+def test_paginas_ralas_usan_cubetas():
+    m = mapa(300, 300, seed=4)
+    m.generar_estructura(400)
+    v = visualizador(m)
+    w, h = 40, 30
+    cubetas = v._cubetas(w, h)
+    vistas = 0
+    for (px, py), cubeta in cubetas.items():
+        x0, y0 = px * w, py * h
+        rala = _pagina_mapa(v, x0, y0, min(w, m.ancho - x0), min(h, m.alto - y0), False, cubeta)
+        densa = _pagina_mapa(v, x0, y0, min(w, m.ancho - x0), min(h, m.alto - y0), False)
+        filas = rala._habitaciones()
+        assert {y: [x for x, _ in f] for y, f in filas.items()} == \
+            {y: [x for x, _ in f] for y, f in densa._habitaciones().items()}
+        vistas += sum(len(f) for f in filas.values())
+    assert vistas == len(m.habitaciones)
+    # la misma particion se reusa mientras el mapa no cambie
+    assert v._cubetas(w, h) is cubetas
+
+
+def test_console_se_crea_al_importarla(monkeypatch):
+    import dungeon_generator.display as display
+    monkeypatch.delitem(vars(display), "console", raising=False)
+    from dungeon_generator.display import console
+    assert console is not None
+    assert display.obtener_consola() is console
@@ -0,0 +1,34 @@
+import pytest
+from dungeon_generator.mapa import mapa, BACKENDS, CATEGORIAS
+
+
+def recuento(m):
+    # estadisticas recorriendo todo el mapa, sin los contadores incrementales
+    total = len(m.habitaciones)
+    conteos = {clave: 0 for clave in CATEGORIAS.values()}
+    conexiones = 0
+    for hab in m.habitaciones.values():
+        conexiones += len(hab.conexiones)
+        if hab.contenido is not None:
+            conteos[CATEGORIAS[hab.contenido.tipo]] += 1
+    return {"Total de habitaciones": total, "vacios": total - sum(conteos.values()), **conteos,
+            "promedio_conexiones": round(conexiones / total, 2)}
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_estadisticas_tras_regenerar(backend):
+    m = mapa(10, 10, seed=1, backend=backend)
+    m.generar_estructura(40)
+    m.colocar_contenido()
+    m.generar_estructura(20)
+    m.colocar_contenido()
+    assert m.obtener_estadisticas_mapa() == recuento(m)
+
+
+def test_estadisticas_al_consumir_contenido():
+    m = mapa(10, 10, seed=5)
+    m.generar_estructura(50)
+    m.colocar_contenido()
+    for coord in list(m.habitaciones_con("tesoro"))[:3]:
+        m.habitaciones[coord].contenido = None
+    assert m.obtener_estadisticas_mapa() == recuento(m)
@@ -0,0 +1,31 @@
+import pytest
+from dungeon_generator.mapa import mapa, BACKENDS, CATEGORIAS
+
+
+def indice(m, tipo):
+    return {c for c, hab in m.habitaciones.items() if getattr(hab.contenido, "tipo", None) == tipo}
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_indice_tras_regenerar(backend):
+    m = mapa(12, 12, seed=3, backend=backend)
+    m.generar_estructura(80)
+    m.colocar_contenido()
+    m.generar_estructura(25)
+    m.colocar_contenido()
+    for tipo in CATEGORIAS:
+        assert m.habitaciones_con(tipo) == indice(m, tipo)
+    destino = m.mas_cercana(m.habitacion_inicial.pos, "tesoro")
+    if destino is not None:
+        assert destino[0] in m.habitaciones
+
+
+def test_mas_cercana_por_camino():
+    m = mapa(15, 15, seed=8)
+    m.generar_estructura(120)
+    m.colocar_contenido()
+    origen = m.habitacion_inicial.pos
+    coord, camino = m.mas_cercana(origen, "monstruo")
+    assert coord in indice(m, "monstruo")
+    minima = min(m.distancia_camino(c) for c in indice(m, "monstruo"))
+    assert len(camino) == minima
@@ -0,0 +1,51 @@
+import pytest
+from dungeon_generator import instrumentacion as ins
+from dungeon_generator.mapa import mapa
+from dungeon_generator.player import explorador
+from dungeon_generator.diario import diario_partida, cargar_diario
+from dungeon_generator.save import guardar_partida, cargar_partida
+
+
+@pytest.fixture
+def mem():
+    s = ins.sumidero_memoria()
+    ins.activar(s)
+    yield s
+    ins.desactivar()
+
+
+def test_contadores_y_tiempos(mem, tmp_path):
+    m = mapa(40, 40, seed=1)
+    m.generar_estructura(600)
+    m.colocar_contenido()
+    exp = explorador(m)
+    ruta = str(tmp_path / "partida.sav")
+    with diario_partida(ruta) as d:
+        d.iniciar(m, exp)
+        for _ in range(3):
+            exp.mover(exp.obtener_habitaciones_adyacentes()[0])
+            d.registrar(exp)
+    cargar_diario(ruta)
+    m.rutas.camino(m.habitacion_inicial.pos, list(m.habitaciones)[-1])
+    m.rutas.camino(m.habitacion_inicial.pos, list(m.habitaciones)[-2])
+    guardar_partida(m, exp, ruta, formato="binario")
+    m2, _ = cargar_partida(ruta, perezoso=True)
+    list(m2.habitaciones)
+    r = mem.resumen()
+    assert r["diario.registros"]["tipo"] == "contador"
+    assert r["diario.registros"]["total"] == r["diario.reproducidos"]["total"] > 0
+    assert r["diario.reproducir"]["n"] == 1
+    assert r["rutas.arbol_fallo"]["n"] == 1
+    assert r["rutas.arbol_acierto"]["n"] == 1
+    assert r["binario.habitaciones_hidratadas"]["total"] == 600
+    assert r["mapa.generar_estructura"]["tipo"] == "tiempo"
+
+
+def test_apagada_no_emite():
+    s = ins.sumidero_memoria()
+    ins.activar(s)
+    ins.desactivar()
+    ins.contar("x")
+    with ins.temporizador("y"):
+        pass
+    assert not ins.ACTIVO and s.resumen() == {}
@@ -0,0 +1,44 @@
+import json
+import random
+from array import array
+import pytest
+from dungeon_generator import lotes
+from dungeon_generator.mapa import mapa
+
+pytest.importorskip("numpy")
+
+BACKENDS = ["dict", "compacto"]
+
+
+def generar(backend, escala, seed=9):
+    m = mapa(30, 30, seed=seed, backend=backend)
+    m.generar_estructura(450)
+    stats = m.colocar_contenido(escala=escala)
+    return json.dumps(m.to_dict(), sort_keys=True), stats
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("escala", ["manhattan", "camino"])
+def test_numpy_y_python_colocan_lo_mismo(monkeypatch, backend, escala):
+    con_numpy = generar(backend, escala)
+    monkeypatch.setattr(lotes, "HAS_NUMPY", False)
+    assert generar(backend, escala) == con_numpy
+
+
+def test_funciones_de_lote_iguales(monkeypatch):
+    rng = random.Random(2)
+    ancho = 40
+    coords = [(rng.randrange(ancho), rng.randrange(ancho)) for _ in range(500)]
+    # el campo deja celdas sin alcanzar (-1), que caen a la manhattan
+    campo = array("i", (rng.randrange(-1, 60) for _ in range(ancho * ancho)))
+    origen = (3, 7)
+
+    def todas():
+        res = [lotes.distancias_manhattan(coords, origen), lotes.distancias_campo(coords, campo, ancho, origen)]
+        for tipo in ("jefes", "monstruos", "tesoros", "eventos"):
+            res.append(lotes.atributos(tipo, res[1]))
+        return res
+
+    con_numpy = todas()
+    monkeypatch.setattr(lotes, "HAS_NUMPY", False)
+    assert todas() == con_numpy
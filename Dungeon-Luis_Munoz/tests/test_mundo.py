@@ -0,0 +1,19 @@
+import pytest
+from dungeon_generator.mundo import mundo_abierto
+
+
+def iniciales(m):
+    return [h for h in m.habitaciones.values() if h.inicial]
+
+
+@pytest.mark.parametrize("con_directorio", [False, True])
+def test_inicio_tras_descartar_y_recargar_chunk_origen(tmp_path, con_directorio):
+    m = mundo_abierto(seed=3, tam_chunk=8, max_chunks=9,
+                      directorio=str(tmp_path) if con_directorio else None)
+    pos = m.habitacion_inicial.pos
+    m.al_mover((8 * 6, 0))
+    assert (0, 0) not in m.chunks_cargados()
+    m.al_mover((0, 0))
+    assert (0, 0) in m.chunks_cargados()
+    assert m.habitacion_inicial is m.habitaciones[pos]
+    assert iniciales(m) == [m.habitacion_inicial]
@@ -0,0 +1,93 @@
+import random
+import pytest
+from dungeon_generator.mapa import CATEGORIAS
+from dungeon_generator.plantilla import plantilla
+from dungeon_generator.player import explorador
+from dungeon_generator.save import guardar_partida, cargar_partida
+from dungeon_generator.diario import diario_partida
+from dungeon_generator.simulacion import codicioso_tesoros
+
+
+@pytest.fixture
+def p():
+    return plantilla.generar(15, 15, 120, seed=7)
+
+
+def recuento(m):
+    total = len(m.habitaciones)
+    conteos = {clave: 0 for clave in CATEGORIAS.values()}
+    for hab in m.habitaciones.values():
+        if hab.contenido is not None:
+            conteos[CATEGORIAS[hab.contenido.tipo]] += 1
+    return {"vacios": total - sum(conteos.values()), **conteos}
+
+
+def jugar(m, pasos=200):
+    exp = explorador(m, vida=1000)
+    rng = random.Random(1)
+    for _ in range(pasos):
+        plan = codicioso_tesoros(exp, rng)
+        if not plan:
+            break
+        for direccion in plan:
+            exp.mover(direccion)
+            exp.explorar_habitacion(narrar=False)
+    return exp
+
+
+def test_sesiones_aisladas(p):
+    base = p.base.to_dict()
+    a, b = p.sesion(seed=1), p.sesion(seed=2)
+    exp = jugar(a)
+    assert exp.inventario
+    assert a.cambios() > 0
+    # ni la plantilla ni la otra sesion ven los cambios
+    assert p.base.to_dict() == base
+    assert b.to_dict() == base
+    assert b.cambios() == 0
+    assert a.habitaciones_con("tesoro") != p.base.habitaciones_con("tesoro")
+
+
+def test_monstruo_herido_solo_en_su_sesion(p):
+    coord = next(iter(p.base.habitaciones_con("monstruo")))
+    a, b = p.sesion(seed=1), p.sesion(seed=2)
+    vida = p.base.habitaciones[coord].contenido.vida
+    propio = a.habitaciones[coord].contenido_propio()
+    propio.vida -= 1
+    assert a.habitaciones[coord].contenido.vida == vida - 1
+    assert b.habitaciones[coord].contenido.vida == vida
+    assert p.base.habitaciones[coord].contenido.vida == vida
+
+
+def test_estadisticas_e_indice_de_la_sesion(p):
+    m = p.sesion(seed=3)
+    jugar(m)
+    stats = m.obtener_estadisticas_mapa()
+    assert {k: stats[k] for k in recuento(m)} == recuento(m)
+    for tipo in CATEGORIAS:
+        esperado = {c for c, hab in m.habitaciones.items() if getattr(hab.contenido, "tipo", None) == tipo}
+        assert m.habitaciones_con(tipo) == esperado
+    assert m.evaluar_dificultad()["combates"] == recuento(m)["monstruos"] + recuento(m)["jefes"]
+    assert m.es_todo_accesible()
+
+
+@pytest.mark.parametrize("formato", ["json", "binario"])
+def test_guardar_sesion(p, tmp_path, formato):
+    m = p.sesion(seed=4)
+    exp = jugar(m, pasos=5)
+    archivo = str(tmp_path / "partida.sav")
+    guardar_partida(m, exp, archivo, formato=formato)
+    cargado, exp2 = cargar_partida(archivo)
+    assert cargado.to_dict() == m.to_dict()
+    assert exp2.posicion_actual == exp.posicion_actual
+
+
+def test_diario_de_sesion(p, tmp_path):
+    m = p.sesion(seed=5)
+    exp = explorador(m)
+    ruta = str(tmp_path / "partida.sav")
+    with diario_partida(ruta) as d:
+        d.iniciar(m, exp)
+        direccion = exp.obtener_habitaciones_adyacentes()[0]
+        exp.mover(direccion)
+        assert d.registrar(exp) > 0
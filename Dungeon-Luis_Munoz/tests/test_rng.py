@@ -0,0 +1,65 @@
+import random
+import pytest
+from dungeon_generator.mapa import mapa
+from dungeon_generator.player import explorador
+from dungeon_generator.content import monstruo
+from dungeon_generator.rng import flujos_rng
+
+
+def generar(seed, backend="dict"):
+    m = mapa(20, 20, seed=seed, backend=backend)
+    m.generar_estructura(200)
+    m.colocar_contenido()
+    return m
+
+
+def pelear(m):
+    exp = explorador(m, vida=10_000)
+    return [monstruo("m", 5, 2).interactuar(exp, narrar=False) for _ in range(20)], exp.vida
+
+
+@pytest.mark.parametrize("backend", ["dict", "compacto"])
+def test_misma_semilla_mismo_mapa_y_combates(backend):
+    a, b = generar(11, backend), generar(11, backend)
+    assert a.to_dict() == b.to_dict()
+    assert pelear(a) == pelear(b)
+    assert generar(12, backend).to_dict() != a.to_dict()
+
+
+def test_flujos_independientes_y_global_intacto():
+    random.seed(0)
+    esperado = random.random()
+    a = mapa(20, 20, seed=3)
+    # gastar el flujo de combate no cambia la estructura ni el contenido
+    for _ in range(100):
+        a.rng.combate.random()
+    a.generar_estructura(200)
+    a.colocar_contenido()
+    assert a.to_dict() == generar(3).to_dict()
+    random.seed(0)
+    generar(3)
+    pelear(generar(3))
+    assert random.random() == esperado
+
+
+def test_estado_y_restaurar():
+    r = flujos_rng(5)
+    r.contenido.random()
+    estado = r.estado()
+    antes = [r.combate.random(), r.contenido.random()]
+    otro = flujos_rng(99)
+    otro.restaurar(estado)
+    assert [otro.combate.random(), otro.contenido.random()] == antes
+
+
+def test_combate_sin_rng_usa_el_flujo_del_mapa():
+    a, b = generar(8), generar(8)
+    exp_a, exp_b = explorador(a, vida=10_000), explorador(b, vida=10_000)
+    exp_b.rng = None
+    m1, m2 = monstruo("m", 5, 2), monstruo("m", 5, 2)
+    assert m1.interactuar(exp_a, narrar=False) == m2.interactuar(exp_b, narrar=False)
+
+    class sin_rng:
+        vida = 5
+    with pytest.raises(ValueError):
+        monstruo("m", 5, 2).interactuar(sin_rng(), narrar=False)
@@ -0,0 +1,46 @@
+import random
+from dungeon_generator.mapa import mapa
+
+
+def bfs(m, origen):
+    dist = {origen: 0}
+    pendientes = [origen]
+    for cur in pendientes:
+        for _, coord in m.vecinos_conectados(cur):
+            if coord not in dist:
+                dist[coord] = dist[cur] + 1
+                pendientes.append(coord)
+    return dist
+
+
+def recorrer(m, origen, camino):
+    cur = origen
+    for direccion, coord in camino:
+        assert (direccion, coord) in m.vecinos_conectados(cur)
+        cur = coord
+    return cur
+
+
+def test_camino_mas_corto():
+    m = mapa(20, 20, seed=2)
+    m.generar_estructura(250)
+    coords = list(m.habitaciones)
+    rng = random.Random(0)
+    for _ in range(30):
+        a, b = rng.choice(coords), rng.choice(coords)
+        camino = m.rutas.camino(a, b)
+        assert recorrer(m, a, camino) == b
+        assert len(camino) == bfs(m, a)[b]
+        assert len(m.rutas.camino_a_estrella(a, b)) == len(camino)
+
+
+def test_solo_cachea_arboles_del_inicio():
+    m = mapa(20, 20, seed=3)
+    m.generar_estructura(200)
+    inicio = m.habitacion_inicial.pos
+    coords = list(m.habitaciones)
+    for b in coords[:20]:
+        m.rutas.camino(coords[-1], b)
+    assert len(m.rutas._arboles) == 0
+    m.rutas.camino(inicio, coords[-1])
+    assert list(m.rutas._arboles) == [inicio]
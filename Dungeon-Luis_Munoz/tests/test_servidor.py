@@ -0,0 +1,62 @@
+import asyncio
+import json
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+from dungeon_generator import comandos
+from dungeon_generator.mapa import mapa
+from dungeon_generator.player import explorador
+from dungeon_generator.servidor import servidor_juego, generar_mapa, FIN
+
+BACKENDS = ["dict", "compacto"]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_mapa_viaja_por_pickle(backend):
+    m = mapa(60, 60, seed=4, backend=backend)
+    m.generar_estructura(2000)
+    m.colocar_contenido()
+    otro = pickle.loads(pickle.dumps(m))
+    assert json.dumps(otro.to_dict(), sort_keys=True) == json.dumps(m.to_dict(), sort_keys=True)
+    assert otro.es_todo_accesible()
+    assert otro.habitacion_inicial == otro.habitaciones[m.habitacion_inicial.pos]
+    # los flujos siguen donde estaban
+    assert otro.rng.combate.random() == m.rng.combate.random()
+
+
+async def leer_bloque(reader):
+    lineas = []
+    while True:
+        linea = (await reader.readline()).decode("utf-8").rstrip("\n")
+        if linea == FIN:
+            return "\n".join(lineas)
+        lineas.append(linea)
+
+
+async def sesion(juego, ruta):
+    await juego.iniciar(unix=ruta)
+    try:
+        reader, writer = await asyncio.open_unix_connection(ruta)
+        bienvenida = await leer_bloque(reader)
+        writer.write(b"salir\n")
+        await writer.drain()
+        await leer_bloque(reader)
+        writer.close()
+        return bienvenida
+    finally:
+        await juego.cerrar()
+
+
+def test_sesion_genera_en_otro_proceso(tmp_path):
+    juego = servidor_juego(8, 6, 15, seed=7)
+    bienvenida = asyncio.run(sesion(juego, str(tmp_path / "s.sock")))
+    m = generar_mapa(8, 6, 15, juego._semilla_sesion(0))
+    assert bienvenida.endswith(comandos.estado_texto(m, explorador(m)))
+    assert juego._executor_propio is None and juego.atendidas == 1
+
+
+def test_executor_por_defecto_es_de_procesos():
+    juego = servidor_juego()
+    assert isinstance(juego._executor(), ProcessPoolExecutor)
+    asyncio.run(juego.cerrar())
+    assert juego._executor_propio is None